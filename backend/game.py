@@ -11,7 +11,7 @@ import pandas as pd
 import networkx as nx
 from mtdnetwork.component.time_network import TimeNetwork
 from mtdnetwork.operation.mtd_operation import MTDOperation
-from mtdnetwork.data.constants import ATTACKER_THRESHOLD, OS_TYPES, NODE_COLOURS
+from mtdnetwork.data.constants import ATTACKER_THRESHOLD, OS_TYPES, NODE_COLOURS, MTD_OPTIONS
 from mtdnetwork.component.adversary import Adversary
 from mtdnetwork.operation.attack_operation import AttackOperation
 from mtdnetwork.snapshot.snapshot_checkpoint import SnapshotCheckpoint
@@ -47,6 +47,8 @@ BRUTE_FORCE_DURATION = 5   # physical second
 MAX_TOPO_SHUFFLE_TIME = 2
 OS_RECOVERY = 0.15       # the probability to recover a node when OS diversity in human vs computer mode
 SERVICE_RECOVERY = 0.3    # the probability to recover a node when service diversity in human vs computer mode
+CATALOG_SEED = 0    # every room draws its services from the service catalog of this seed, so the rooms share it
+PERSIST_CATALOG = True    # the rooms load the shared service catalog from the snapshots directory once it is saved
 
 class Node:
 
@@ -164,20 +166,20 @@ class Game:
             self.attacker_new_message.popleft()
     
     def get_host_os_type(self, host_id):
-        return self.time_network.graph.nodes[host_id]["host"].os_type
+        return self.time_network.get_host(host_id).os_type
     
     def get_host_os_version(self, host_id):
-        return self.time_network.graph.nodes[host_id]["host"].os_version
+        return self.time_network.get_host(host_id).os_version
     
     def get_host_ip(self, host_id):
-        return self.time_network.graph.nodes[host_id]["host"].ip
+        return self.time_network.get_host(host_id).ip
     
     def get_host_info(self, host_id):
         info = {
-            'host_id': self.time_network.graph.nodes[host_id]["host"].host_id,
-            'os_type': self.time_network.graph.nodes[host_id]["host"].os_type,
-            'os_version': self.time_network.graph.nodes[host_id]["host"].os_version,
-            'ip': self.time_network.graph.nodes[host_id]["host"].ip
+            'host_id': self.time_network.get_host(host_id).host_id,
+            'os_type': self.time_network.get_host(host_id).os_type,
+            'os_version': self.time_network.get_host(host_id).os_version,
+            'ip': self.time_network.get_host(host_id).ip
         }
         return info
 
@@ -186,12 +188,11 @@ class Game:
         Perform IP Shuffling MTD operation on the specified host.
         :param host_id: ID of the host that needs to perform IP shuffling operation.
         """
-        hosts = self.time_network.get_hosts()
-        if host_id in hosts:
-            existing_ips = [host.ip for host in hosts.values()]  # list to hold all IP addresses in the network
-            target_host = hosts[host_id]
+        target_host = self.time_network.get_host(host_id)
+        if target_host is not None:
             # Generate a new IP address that doesn't conflict with the existing ones
-            new_ip = target_host.get_random_address(existing_addresses=existing_ips)
+            new_ip = self.time_network.get_address_allocator().reallocate(target_host.ip,
+                                                                         rng=self.time_network.get_rng().mtd)
             target_host.ip = new_ip
             # Interrupt the brute force progress for this IP
             self.brute_force_progress[host_id] = False
@@ -202,7 +203,8 @@ class Game:
         
     def topology_shuffle(self):
         if self.topo_shuffle_time < MAX_TOPO_SHUFFLE_TIME:
-            mtd_strategy = CompleteTopologyShuffle(network=self.time_network)
+            mtd_strategy = CompleteTopologyShuffle(network=self.time_network,
+                                                   **MTD_OPTIONS['CompleteTopologyShuffle'])
             mtd_strategy.mtd_operation()
             self._interrupt_adversary(mtd_type=1)
             self.update_network()
@@ -227,7 +229,7 @@ class Game:
             if self.get_game_mode() == 'Human' and self.exploit_vuln_progress[index]:
                 recovery_result = not self.judge_if_still_exploited(index)
             # when human vs computer, get recovery result by probability when the node is compromised
-            if self.get_game_mode() == 'Computer' and index in self.get_current_compromised_hosts():
+            if self.get_game_mode() == 'Computer' and index in self.adversary.get_compromised_hosts():
                 recovery_result = random.random() < OS_RECOVERY
             if recovery_result:
                 self.recovery_a_node(index)
@@ -246,7 +248,7 @@ class Game:
         if host_id in self.time_network.exposed_endpoints:
             msg = f'You can not change the services on an endpoint(green node). Because it need to keep running for your users.'
         else:
-            if host_id in self.get_current_compromised_hosts():
+            if host_id in self.adversary.get_compromised_hosts():
                 msg = f'You have changed some services on node {host_id} but it is still compromised. There are 2 reasons: 1. Compromised is not because some services on OS is exploited. 2. Some exploited services are still running on it.'
             else:
                 msg = f'You have changed some services on node {host_id}.'
@@ -257,7 +259,7 @@ class Game:
             recovery_result = False
             if self.get_game_mode() == 'Human' and self.exploit_vuln_progress[host_id]:
                 recovery_result = not self.judge_if_still_exploited(host_id)
-            if self.get_game_mode() == 'Computer' and host_id in self.get_current_compromised_hosts():
+            if self.get_game_mode() == 'Computer' and host_id in self.adversary.get_compromised_hosts():
                 recovery_result = random.random() < SERVICE_RECOVERY
             if recovery_result:
                 self.recovery_a_node(host_id)
@@ -338,10 +340,10 @@ class Game:
 
             # Return all details about this host
             all_details = {
-                'host_id': self.time_network.graph.nodes[host_id]["host"].host_id,
-                'os_type': self.time_network.graph.nodes[host_id]["host"].os_type,
-                'os_version': self.time_network.graph.nodes[host_id]["host"].os_version,
-                'ip': self.time_network.graph.nodes[host_id]["host"].ip,
+                'host_id': self.time_network.get_host(host_id).host_id,
+                'os_type': self.time_network.get_host(host_id).os_type,
+                'os_version': self.time_network.get_host(host_id).os_version,
+                'ip': self.time_network.get_host(host_id).ip,
                 'is_compromised': host.is_compromised(),
                 'service_info': services_info,
             }
@@ -366,10 +368,9 @@ class Game:
                             
     def get_current_compromised_hosts(self):
         """
-        return a list of host that has been compromised, such as [0, 1, 2]
+        return a sorted list of host that has been compromised, such as [0, 1, 2]. The list is cached, do not modify it
         """
-        compromised_hosts = self.adversary.get_compromised_hosts()
-        return sorted(set(compromised_hosts))
+        return self.adversary.get_compromised_hosts().get_sorted()
     
     # this function is not used now, can be commented
     def get_current_uncompromised_hosts(self):
@@ -457,7 +458,7 @@ class Game:
         return 0 if the host_id is uncompromised, because only the compromised hosts can scan their neighbour
         return -1 if this node is not reachable
         """
-        if host_id not in self.get_current_compromised_hosts():
+        if host_id not in self.adversary.get_compromised_hosts():
             return 0
         
         if not self.judge_if_reachable(host_id):
@@ -521,7 +522,7 @@ class Game:
     
     def start_exploit_vuln(self, host_id):
         # return 1 if the host has been compromised
-        if host_id in self.get_current_compromised_hosts():
+        if host_id in self.adversary.get_compromised_hosts():
             return 1
         # return -1 if the host is unvisible(it will happen when some MTD executed after attacker choose a node and before him click the button)
         # or because it is not reachable now(it will happen after a topological shuffling and no visible path from endpoints to this node)
@@ -556,7 +557,7 @@ class Game:
             
         exploit_result = adversary.get_curr_host().check_compromised()
 
-        if host_id in self.get_current_compromised_hosts():
+        if host_id in self.adversary.get_compromised_hosts():
             self.add_attacker_new_message(f"Message: Node {host_id} has been already compromised")
         elif self.scan_port_progress[host_id] is not True:
             self.add_attacker_new_message(f"Message: Exploiting vulnerability of services on node {host_id} failed")
@@ -592,7 +593,7 @@ class Game:
         self.update_network()
         
     def start_brute_force(self, host_id):
-        if host_id in self.get_current_compromised_hosts():
+        if host_id in self.adversary.get_compromised_hosts():
             return 1
         elif host_id in self.get_visible_hosts() and self.judge_if_reachable(host_id):
             # set the brute force progress to be True before attacking
@@ -622,7 +623,7 @@ class Game:
         # brute_force_result = adversary.get_curr_host().compromise_with_users(adversary.get_compromised_users())
         brute_force_result = probability_function()
 
-        if host_id in self.get_current_compromised_hosts():
+        if host_id in self.adversary.get_compromised_hosts():
             self.add_attacker_new_message(f"Message: Node {host_id} has been already compromised")
         else:
             if brute_force_result and self.brute_force_progress[host_id]:
@@ -646,12 +647,7 @@ class Game:
         """
         adversary = self.adversary
         found_neighbors = adversary.get_curr_host().discover_neighbors()
-        new__host_stack = found_neighbors + [
-            node_id
-            for node_id in adversary.get_host_stack()
-            if node_id not in found_neighbors
-        ]
-        adversary.set_host_stack(new__host_stack)
+        adversary.get_host_stack().push_front(found_neighbors)
 
     def __update_compromise_progress(self):
         """
@@ -660,7 +656,7 @@ class Game:
         adversary = self.adversary
         adversary._pivot_host_id = adversary.get_curr_host_id()
         if adversary.get_curr_host_id() not in adversary.get_compromised_hosts():
-            adversary.get_compromised_hosts().append(adversary.get_curr_host_id())
+            adversary.get_compromised_hosts().add(adversary.get_curr_host_id())
             adversary.get_attack_stats().update_compromise_host(adversary.curr_host)
             logging.info("Adversary: Host %i has been compromised at %.1fs!" % (adversary.get_curr_host_id(), self.env.now))
             adversary.get_network().update_reachable_compromise(adversary.get_curr_host_id(), adversary.get_compromised_hosts())
@@ -669,7 +665,7 @@ class Game:
             for user in adversary.get_curr_host().get_compromised_users():
                 if user not in adversary.get_compromised_users():
                     adversary.get_attack_stats().update_compromise_user(user)
-            adversary._compromised_users = list(set(adversary.get_compromised_users() + adversary.get_curr_host().get_compromised_users()))
+            adversary.get_compromised_users().update(adversary.get_curr_host().get_compromised_users())
 
     def recovery_a_node(self, node_id):
         """
@@ -680,9 +676,9 @@ class Game:
             self.time_network.get_hosts()[node_id].compromised = False
             adversary.get_compromised_hosts().remove(node_id)
             logging.info("MTD: Host %i has been set to uncompromised at %.1fs!" % (node_id, self.env.now))
-            adversary.get_network().update_reachable_compromise(node_id, adversary.get_compromised_hosts())
+            adversary.get_network().update_reachable_recovery(node_id, adversary.get_compromised_hosts())
             # change the node color to normal color
-            self.time_network.colour_map[node_id] = NODE_COLOURS[self.time_network.graph.nodes[node_id]['layer']]
+            self.time_network.colour_map[node_id] = NODE_COLOURS[self.time_network.get_layer(node_id)]
             self.add_attacker_new_message(f"Message: Node {node_id} was set to uncompromised because some services on it has been changed")
 
     def update_network(self):
@@ -732,7 +728,7 @@ class Game:
                 self.isrunning = False
 
             for node_id in self.target_node_num_list:
-                if node_id in self.get_current_compromised_hosts():
+                if node_id in self.adversary.get_compromised_hosts():
                     logging.info(f"Now the target node has been compromised, the attackers win at {self.env.now:.1f}s!")
                     self.winner = 'Attacker'
                     self.isrunning = False
@@ -743,7 +739,8 @@ class Game:
     
     def execute_simulation(self, start_time=0, finish_time=None, scheme='random', mtd_interval=None, custom_strategies=None,
                         checkpoints=None, total_nodes=32, total_endpoints=5, total_subnets=8, total_layers=4,
-                        target_layer=4, total_database=2, terminate_compromise_ratio=0.8, new_network=True):
+                        target_layer=4, total_database=2, terminate_compromise_ratio=0.8, new_network=True,
+                        mtd_options=None):
         """
         :param start_time: the time to start the simulation, need to load timestamp-based snapshots if set start_time > 0
         :param finish_time: the time to finish the simulation. Set to None will run the simulation until
@@ -760,6 +757,7 @@ class Game:
         :param total_database: the number of database nodes used for computing DAP algorithm
         :param terminate_compromise_ratio: terminate the simulation if reached compromise ratio
         :param new_network: True: create new snapshots based on network size, False: load snapshots based on network size
+        :param mtd_options: the keyword arguments of the MTD strategies by MTD name, defaults to MTD_OPTIONS
         """
         # if some error happen and the game mode or create role have not been set, automatically set it
         if self.get_game_mode() == None:
@@ -774,7 +772,8 @@ class Game:
         self.time_network = TimeNetwork(total_nodes=total_nodes, total_endpoints=total_endpoints,
                                 total_subnets=total_subnets, total_layers=total_layers,
                                 target_layer=target_layer, total_database=total_database,
-                                terminate_compromise_ratio=terminate_compromise_ratio)
+                                terminate_compromise_ratio=terminate_compromise_ratio,
+                                persist_catalog=PERSIST_CATALOG, catalog_seed=CATALOG_SEED)
 
         self.adversary = Adversary(network=self.time_network, attack_threshold=ATTACKER_THRESHOLD)
 
@@ -798,7 +797,8 @@ class Game:
         # start mtd
         self.mtd_operation = MTDOperation(env=self.env, end_event=end_event, network=self.time_network, scheme=scheme,
                                     attack_operation=self.attack_operation, proceed_time=0,
-                                    mtd_trigger_interval=mtd_interval, custom_strategies=custom_strategies)
+                                    mtd_trigger_interval=mtd_interval, custom_strategies=custom_strategies,
+                                    mtd_options=mtd_options)
         if self.get_game_mode() == 'Computer' and self.get_creator_role() == 'attacker':
             self.mtd_operation.proceed_mtd()
 
@@ -0,0 +1,102 @@
+class AddressAllocator:
+    # every octet of an address is between 1 and 256
+    OCTET_VALUES = 256
+    TOTAL_ADDRESSES = OCTET_VALUES ** 4
+
+    def __init__(self):
+        """
+        Allocates the IPv4 addresses of the hosts of a network without collisions.
+
+        Addresses are tracked as integers in a set, so checking whether an address is free is O(1)
+        and a bulk allocation of k addresses is a single random.sample over the address space.
+        """
+        self._allocated = set()
+
+    @staticmethod
+    def to_address(code):
+        """
+        Converts an integer in range(TOTAL_ADDRESSES) to its IPv4 address string.
+        """
+        octets = []
+        for _i in range(4):
+            code, octet = divmod(code, AddressAllocator.OCTET_VALUES)
+            octets.append(octet + 1)
+        return "{}.{}.{}.{}".format(*reversed(octets))
+
+    @staticmethod
+    def to_code(address):
+        """
+        Converts an IPv4 address string to its integer in range(TOTAL_ADDRESSES).
+        """
+        code = 0
+        for octet in address.split("."):
+            code = code * AddressAllocator.OCTET_VALUES + int(octet) - 1
+        return code
+
+    def is_allocated(self, address):
+        return AddressAllocator.to_code(address) in self._allocated
+
+    def reserve(self, address):
+        """
+        Marks an address that was assigned elsewhere as allocated.
+        """
+        self._allocated.add(AddressAllocator.to_code(address))
+
+    def release(self, address):
+        self._allocated.discard(AddressAllocator.to_code(address))
+
+    def allocate(self, rng):
+        """
+        Allocates a random free address. The octets are drawn in the same way as Host.get_random_address.
+
+        Parameters:
+            rng:
+                the random stream to draw from
+
+        Returns:
+            a IPv4 address
+        """
+        while True:
+            address = "{}.{}.{}.{}".format(*[rng.randint(1, AddressAllocator.OCTET_VALUES) for _i in range(4)])
+            code = AddressAllocator.to_code(address)
+            if code not in self._allocated:
+                self._allocated.add(code)
+                return address
+
+    def allocate_many(self, total, rng):
+        """
+        Allocates distinct random free addresses in a single draw.
+
+        Parameters:
+            total:
+                the number of addresses to allocate
+            rng:
+                the random stream to draw from
+
+        Returns:
+            a list of IPv4 addresses
+        """
+        if total > AddressAllocator.TOTAL_ADDRESSES - len(self._allocated):
+            raise ValueError("Not enough free addresses")
+        # At most len(self._allocated) of the drawn addresses are taken already
+        draw_size = min(total + len(self._allocated), AddressAllocator.TOTAL_ADDRESSES)
+        codes = [code for code in rng.sample(range(AddressAllocator.TOTAL_ADDRESSES), draw_size)
+                 if code not in self._allocated][:total]
+        self._allocated.update(codes)
+        return [AddressAllocator.to_address(code) for code in codes]
+
+    def reallocate(self, address, rng):
+        """
+        Replaces an allocated address with a different random free address.
+        """
+        new_address = self.allocate(rng)
+        self.release(address)
+        return new_address
+
+    def reallocate_many(self, addresses, rng):
+        """
+        Releases the addresses and allocates as many random free addresses in a single draw.
+        """
+        for address in addresses:
+            self.release(address)
+        return self.allocate_many(len(addresses), rng)
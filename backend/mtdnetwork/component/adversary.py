@@ -1,16 +1,19 @@
 import logging
 from mtdnetwork.statistic.attack_statistics import AttackStatistics
+from mtdnetwork.component.host_stack import HostStack
+from mtdnetwork.component.ordered_set import OrderedSet
 from mtdnetwork.data.constants import HACKER_ATTACK_ATTEMPT_MULTIPLER
 
 
 class Adversary:
     def __init__(self, network, attack_threshold):
         self.network = network
-        self._compromised_users = []
-        self._compromised_hosts = []
-        self._host_stack = []
+        # In the order they were compromised
+        self._compromised_users = OrderedSet()
+        self._compromised_hosts = OrderedSet()
+        self._host_stack = HostStack(rng=network.get_rng())
         self._attack_counter = [0 for n in range(len(self.network.get_graph().nodes()))]
-        self._stop_attack = []
+        self._stop_attack = set()
         self._attack_threshold = attack_threshold
         self._pivot_host_id = -1
         self._curr_host_id = -1
@@ -29,17 +32,7 @@ class Adversary:
         """
         update compromised host ids for hosttopology shuffle
         """
-        new_compromised_hosts = []
-
-        for i in self._compromised_hosts:
-            if i == host_id:
-                new_compromised_hosts.append(other_host_id)
-            elif i == other_host_id:
-                new_compromised_hosts.append(host_id)
-            else:
-                new_compromised_hosts.append(i)
-
-        self._compromised_hosts = new_compromised_hosts
+        self._compromised_hosts.swap(host_id, other_host_id)
 
     def get_compromised_hosts(self):
         return self._compromised_hosts
@@ -95,6 +88,15 @@ class Adversary:
         return self.network
 
     # setter
+    def set_network(self, network):
+        """
+        attach the adversary to a network, e.g. the network snapshot loaded with it, so that the attack and
+        the MTDs run on the same network and draw from the same random streams
+        """
+        self.network = network
+        self._host_stack.rng = network.get_rng()
+        self.curr_host = network.get_host(self._curr_host_id) if self._curr_host_id >= 0 else None
+
     def set_curr_host_id(self, host_id):
         self._curr_host_id = host_id
 
@@ -114,7 +116,7 @@ class Adversary:
         self._curr_attempts = curr_attempts
 
     def set_host_stack(self, host_stack):
-        self._host_stack = host_stack
+        self._host_stack = HostStack(host_stack, rng=self.network.get_rng())
 
     def set_curr_process(self, curr_process):
         self._curr_process = curr_process
@@ -0,0 +1,68 @@
+class DistanceIndex:
+
+    def __init__(self, graph, sources):
+        """
+        The shortest distances and paths from a set of source nodes to every node of a graph, computed with a
+        single multi-source breadth first search.
+
+        Every node is reached from the first source in `sources` among the closest ones, which is the source
+        found by searching a shortest path from each source in turn.
+
+        Parameters:
+            graph:
+                the graph (or subgraph view) to search
+            sources:
+                the source nodes in order of preference. Sources that are not in the graph are ignored.
+        """
+        self.distance = {}
+        self.predecessor = {}
+        self.source = {}
+        rank = {}
+
+        level = []
+        for source in sources:
+            if source in graph and source not in self.distance:
+                self.distance[source] = 0
+                self.predecessor[source] = None
+                self.source[source] = source
+                rank[source] = len(level)
+                level.append(source)
+
+        distance = 0
+        while level:
+            distance += 1
+            # The parent of every node of the next level, reached from the preferred source
+            parents = {}
+            for u in level:
+                for v in graph.neighbors(u):
+                    if v in self.distance:
+                        continue
+                    if v not in parents or rank[u] < rank[parents[v]]:
+                        parents[v] = u
+            for v, u in parents.items():
+                self.distance[v] = distance
+                self.predecessor[v] = u
+                self.source[v] = self.source[u]
+                rank[v] = rank[u]
+            level = list(parents)
+
+    def get_distance(self, node):
+        """
+        Returns:
+            the number of hops from the closest source to the node, None if it cannot be reached
+        """
+        return self.distance.get(node)
+
+    def get_path(self, node):
+        """
+        Returns:
+            the shortest path from the closest source to the node, an empty list if it cannot be reached
+        """
+        if node not in self.distance:
+            return []
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self.predecessor[node]
+        path.reverse()
+        return path
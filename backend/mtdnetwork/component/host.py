@@ -1,12 +1,13 @@
 import random, uuid
 import networkx as nx
 import mtdnetwork.data.constants as constants
+from mtdnetwork.component.internal_topology import get_internal_topology
 
 
 class Host:
     def __init__(self, operating_system, os_version, host_id, host_ip, users_list,
                  network, service_generator, k_nearest_neighbors_percent=0.5,
-                 prob_strogatz_rewire=0.5):
+                 prob_strogatz_rewire=0.5, rng=None):
         """
         Initialises the host with the specified Operating System with a random network of internal
         services that the host runs.
@@ -17,6 +18,9 @@ class Host:
         A host is said to be compromised if a service adjacent to the target node is compromised or
         the hacker has been able to obtain the password for a user on the Host
 
+        The structure of the internal service network is a pooled InternalTopology shared with other hosts,
+        the host only stores the port and service of each of its service nodes.
+
         Parameters:
             operating_system:
                 the operating system of the host
@@ -38,8 +42,17 @@ class Host:
                 the ratio for the k nearest neighbors when generating the internal graph using Watts-Strogatz random graph
             prob_strogatz_rewire:
                 the probability that an edge is rewired for the Watts-Strogatz random graph
-        """
-        self.graph = None
+            rng:
+                the SimulationRandom instance of the simulation, defaults to the one of the network
+        """
+        if rng is None:
+            rng = network.get_rng()
+        self.rng = rng
+        self.topology = None
+        self.ports = None
+        self.services = None
+        # Incremented every time a service of the host is replaced
+        self.services_version = 0
         self.os_type = operating_system
         self.os_version = os_version
         self.ip = host_ip
@@ -49,11 +62,19 @@ class Host:
         self.total_users = 0
         self.uuid = str(uuid.uuid4())
 
-        self.total_services = random.randint(constants.HOST_SERVICES_MIN, constants.HOST_SERVICES_MAX)
+        self.total_services = self.rng.topology.randint(constants.HOST_SERVICES_MIN, constants.HOST_SERVICES_MAX)
         # +1 for the target service node the adversary needs to be adjacent inorder to compromise the host
         self.total_nodes = self.total_services + 1
         self.compromised = False
         self.compromised_services = []
+        # The exploited services and the services seen through them, see _update_exploited_services
+        self._vuln_state = service_generator.vuln_state
+        self._exploited_state = None
+        # The ids of the services of every vulnerability row
+        self._vuln_services = {}
+        self._exploited_services = set()
+        self._visible_services = []
+        self._port_scan_services = []
         self.gen_internal_network(
             k_nearest_neighbors_percent,
             prob_strogatz_rewire
@@ -69,11 +90,73 @@ class Host:
             return False
         return other.uuid == self.uuid
 
+    @property
+    def graph(self):
+        return self.topology.graph
+
+    @property
+    def target_node(self):
+        return self.topology.target_node
+
+    @property
+    def exposed_endpoints(self):
+        return self.topology.exposed_endpoints
+
+    @property
+    def colour_map(self):
+        colour_map = list(self.topology.colour_map)
+        for service_id in self.compromised_services:
+            colour_map[service_id] = "red"
+        return colour_map
+
+    def get_port(self, service_id):
+        return self.ports[service_id]
+
+    def set_port(self, service_id, port):
+        self.ports[service_id] = port
+
+    def get_service(self, service_id):
+        if 0 <= service_id < self.total_nodes:
+            return self.services[service_id]
+        return None
+
+    def set_service(self, service_id, service):
+        self.services[service_id] = service
+        self.services_version += 1
+
+    def allocate_ports(self, rng):
+        """
+        Assigns distinct random ports to all the services of the host in a single draw,
+        replacing the previous ports.
+
+        Parameters:
+            rng:
+                the random stream to draw from
+        """
+        service_ids = [node_id for node_id in range(self.total_nodes) if node_id != self.target_node]
+        self.ports = [None] * self.total_nodes
+        for service_id, port in zip(service_ids, Host.get_random_ports(len(service_ids), rng=rng)):
+            self.ports[service_id] = port
+
+    def get_port_map(self):
+        """
+        Returns:
+            a dict where the key is the service ID and the value is the port, without the target node
+        """
+        return {service_id: port for service_id, port in enumerate(self.ports) if port is not None}
+
+    def get_service_map(self):
+        """
+        Returns:
+            a dict where the key is the service ID and the value is the Service instance, without the target node
+        """
+        return {service_id: service for service_id, service in enumerate(self.services) if service is not None}
+
     def get_all_services(self):
-        return list(dict(nx.get_node_attributes(self.graph, "service")).values())
+        return [service for service in self.services if service is not None]
 
     def get_test_values(self):
-        return [(nx.get_node_attributes(self.graph, "port")), (nx.get_node_attributes(self.graph, "service"))]
+        return [self.get_port_map(), self.get_service_map()]
 
     def get_total_nodes(self):
         return self.total_nodes
@@ -84,12 +167,14 @@ class Host:
         total_vulns = 0
 
         all_vulns = []
+        seen = set()
         for service in all_services:
             service_vulns = service.get_all_vulns()
             total_vulns += len(service_vulns)
 
             for v in service_vulns:
-                if not v in all_vulns:
+                if v.id not in seen:
+                    seen.add(v.id)
                     all_vulns.append(v)
         # print("Services on this host has average of this many vulns: ", total_vulns/len(all_services))
 
@@ -98,11 +183,13 @@ class Host:
     def get_vulns_for_list(self, list):
 
         vulns = []
+        seen = set()
         for service in list:
             service_vulns = service.get_all_vulns()
 
             for v in service_vulns:
-                if not v in vulns:
+                if v.id not in seen:
+                    seen.add(v.id)
                     vulns.append(v)
 
         return vulns
@@ -111,17 +198,18 @@ class Host:
         self.network = network
 
     def setup_network(self, service_generator, keep_ports=False):
-        port_addresses = []
+        if not keep_ports:
+            self.allocate_ports(self.rng.topology)
+        self.services = [None] * self.total_nodes
         for node_id in range(self.total_nodes):
             if node_id == self.target_node:
                 continue
-            if not keep_ports:
-                node_port = Host.get_random_port(existing_ports=port_addresses)
-                self.graph.nodes[node_id]["port"] = node_port
-            self.graph.nodes[node_id]["service"] = service_generator.get_random_service(
+            self.services[node_id] = service_generator.get_random_service(
                 self.os_type,
-                self.os_version
+                self.os_version,
+                rng=self.rng.services
             )
+        self.services_version += 1
 
     def set_compromised(self):
         """
@@ -173,7 +261,7 @@ class Host:
         """
         attempt_users = [username for username in self.users.keys() if username in compromised_users]
 
-        if random.random() < constants.HOST_MAX_PROB_FOR_USER_COMPROMISE * len(attempt_users) / self.total_users:
+        if self.rng.attack.random() < constants.HOST_MAX_PROB_FOR_USER_COMPROMISE * len(attempt_users) / self.total_users:
             self.set_compromised()
             return True
         return False
@@ -182,7 +270,7 @@ class Host:
         """
         Returns a dictionary of all non-target nodes and their vulnerabilities
         """
-        services = nx.get_node_attributes(self.graph, "service")
+        services = self.get_service_map()
         return {
             service_id: service.get_vulns()
             for (service_id, service) in services.items()
@@ -194,33 +282,6 @@ class Host:
     def get_exposed_nodes(self):
         return self.exposed_endpoints
 
-    def remove_no_vuln_nodes(self):
-        """
-        Removes all service nodes with no vulnerabilities
-        EDIT: Removed due to assigning a vulnerability to every service (Random element of adding vulnerabilites caused many graphs to break)
-        """
-        vulns = self.get_service_and_vulns()
-        blank_endpoints = []
-        blank_endpoints_index = 0
-
-        for key, value in vulns.items():
-            if not value:
-                blank_endpoints.append(key)
-        self.graph.remove_nodes_from(blank_endpoints)
-
-        if blank_endpoints:
-            for n in range(self.total_nodes):
-                if n == blank_endpoints[blank_endpoints_index]:
-                    self.colour_map.pop(n - blank_endpoints_index)
-                    blank_endpoints_index += 1
-                    if blank_endpoints_index == len(blank_endpoints):
-                        blank_endpoints_index = 0
-                    if n in self.exposed_endpoints:
-                        self.exposed_endpoints.remove(n)
-
-        print("Blank endpoints: ", blank_endpoints, "target node: ", self.target_node)
-        self.total_nodes = self.total_nodes - len(blank_endpoints)
-
     def get_services(self, just_exploited=False):
         """
         Gets the services on the host
@@ -232,32 +293,77 @@ class Host:
         Returns:
             a dict where the key is the service ID and the value is the Service instance
         """
-        services = nx.get_node_attributes(self.graph, "service")
+        self._update_exploited_services()
         if just_exploited:
-            return {
-                service_id: service
-                for (service_id, service) in services.items()
-                if service.is_exploited()
-            }
+            return {service_id: self.services[service_id] for service_id in sorted(self._exploited_services)}
+        return {service_id: self.services[service_id] for service_id in self._visible_services}
+
+    def _update_exploited_services(self):
+        """
+        Updates the exploited services of the host and the services the adversary sees through them.
+
+        Vulnerabilities are never unexploited, so after vulnerabilities of the network are exploited only the
+        services of the host that have one of them and are not exploited yet are checked again, and the services
+        seen through the exploited services are only computed again when one of them is exploited. Everything is
+        computed again when a service is replaced.
+        """
+        vuln_state = self._vuln_state
+        state = (self.topology, self.services_version, vuln_state.epoch)
+        if state == self._exploited_state:
+            return
+        if self._exploited_state is None or self._exploited_state[:2] != state[:2]:
+            self._exploited_services = set()
+            self._visible_services = None
+            self._vuln_services = {}
+            for service_id, service in enumerate(self.services):
+                if service is None:
+                    continue
+                for vuln in service.get_all_vulns():
+                    self._vuln_services.setdefault(vuln.row, []).append(service_id)
+            service_ids = range(len(self.services))
+        else:
+            service_ids = set()
+            for row in vuln_state.get_changed_rows(self._exploited_state[2]):
+                service_ids.update(self._vuln_services.get(row, ()))
+        self._exploited_state = state
+        for service_id in service_ids:
+            service = self.services[service_id]
+            if service is not None and service_id not in self._exploited_services and service.is_exploited():
+                self._exploited_services.add(service_id)
+                self._visible_services = None
+        if self._visible_services is not None:
+            return
+
+        exploited_services = self._exploited_services
         exposed_services = [
-            host_id
-            for (host_id, service) in services.items()
-            if host_id in self.exposed_endpoints or service.is_exploited()
+            service_id
+            for service_id, service in enumerate(self.services)
+            if service is not None and (service_id in self.exposed_endpoints or service_id in exploited_services)
         ]
-
+        seen = set(exposed_services)
         adjacent_services = []
         for ec_service_id in exposed_services:
-            if not services[ec_service_id].is_exploited():
+            if ec_service_id not in exploited_services:
                 continue
-            for n_id in self.graph.neighbors(ec_service_id):
+            for n_id in self.topology.neighbors[ec_service_id]:
                 if n_id == self.target_node: continue
-                if not n_id in exposed_services and not n_id in adjacent_services:
+                if n_id not in seen:
+                    seen.add(n_id)
                     adjacent_services.append(n_id)
+        self._visible_services = exposed_services + adjacent_services
 
-        return {
-            service_id: services[service_id]
-            for service_id in exposed_services + adjacent_services
-        }
+        # The services found by a port scan, in the order of a breadth first search from the exposed services
+        service_q = list(self.exposed_endpoints)
+        seen = set(service_q)
+        for service_id in service_q:
+            if service_id not in exploited_services:
+                continue
+            for n in self.topology.neighbors[service_id]:
+                if n == self.target_node: continue
+                if n in seen: continue
+                service_q.append(n)
+                seen.add(n)
+        self._port_scan_services = service_q
 
     def get_services_from_list(self, list):
         """
@@ -271,8 +377,7 @@ class Host:
         target = list.pop(len(list) - 1)
         service_list = []
         for service_id in list:
-            service = self.graph.nodes.get(service_id, {}).get("service", None)
-            service_list.append(service)
+            service_list.append(self.get_service(service_id))
         return service_list
 
     def get_services_from_ports(self, discovered_service_ports, ignore_services=[]):
@@ -285,13 +390,10 @@ class Host:
             ignore_services:
                 a list of service IDs that will be ignored
         """
-        discovered_service_ports = discovered_service_ports + self.exposed_endpoints
+        discovered_service_ports = set(discovered_service_ports).union(self.exposed_endpoints)
         exposed_services = self.get_services()
-        port_numbers = nx.get_node_attributes(self.graph, "port")
-        shortest_path_to_target = dict(nx.single_target_shortest_path_length(
-            self.graph,
-            self.target_node
-        ))
+        port_numbers = self.ports
+        shortest_path_to_target = self.topology.distance_to_target
 
         result = [
             {
@@ -313,31 +415,12 @@ class Host:
         )
 
     def port_scan(self):
-        port_numbers_dict = nx.get_node_attributes(self.graph, "port")
-        services = nx.get_node_attributes(self.graph, "service")
-        port_numbers = []
-
-        service_q = []
-        seen = []
-        for ec_service_id in self.exposed_endpoints:
-            service_q.append(ec_service_id)
-            seen.append(ec_service_id)
-            port_numbers.append(port_numbers_dict[ec_service_id])
-
-        while len(service_q) > 0:
-            service_id = service_q.pop(0)
-            service = services[service_id]
-
-            if not service_id in self.exposed_endpoints:
-                port_numbers.append(port_numbers_dict[service_id])
-
-            if service.is_exploited():
-                for n in self.graph.neighbors(service_id):
-                    if n == self.target_node: continue
-                    if n in seen: continue
-                    service_q.append(n)
-                    seen.append(n)
-        return port_numbers
+        """
+        Returns:
+            the ports of the exposed services and of the services reachable from them through exploited services
+        """
+        self._update_exploited_services()
+        return [self.ports[service_id] for service_id in self._port_scan_services]
 
     def get_vulns(self, discovered_service_ports, ignore_services=[], roa_threshold=0):
         """
@@ -403,8 +486,7 @@ class Host:
         for service_id in services:
             if service_id not in self.compromised_services:
                 self.compromised_services.append(service_id)
-                self.colour_map[service_id] = "red"
-            if self.target_node in list(self.graph.neighbors(service_id)):
+            if self.target_node in self.topology.neighbors[service_id]:
                 self.set_compromised()
         return self.compromised
 
@@ -422,14 +504,14 @@ class Host:
         """
         Returns all of the ports on the host
         """
-        port_map = nx.get_node_attributes(self.graph, "port")
+        port_map = self.get_port_map()
         return sorted([
             port_map[s]
             for s in port_map
         ], reverse=True)
 
     def get_ports_for_services(self, services):
-        port_map = nx.get_node_attributes(self.graph, "port")
+        port_map = self.get_port_map()
         return sorted([
             port_map[s]
             for s in services
@@ -477,104 +559,20 @@ class Host:
                 self.p_u_compromise = True
                 break
 
-    def graph_choose_target_and_exposed(self, graph, target_distance):
-        """
-        Chooses the target and exposed services on the internal network.
-
-        Exposed services means that an adversary can see the ports open externally
-
-        Parameters:
-            graph:
-                the graph that is being generated
-            target_distance:
-                the target distance from the target node for exposed services
-        """
-        shortest_path_length = dict(nx.all_pairs_shortest_path_length(graph))
-        nodes_list = list(graph.nodes)
-
-        exposed_endpoints, adjacent_to_target = [], []
-        target_node = -1
-        exposed_endpoints = []
-        target_count = -1
-
-        for x in nodes_list:
-            x_count = 0
-            e_endpoints = []
-            for y in nodes_list:
-                if shortest_path_length[x][y] >= target_distance:
-                    x_count += 1
-                    e_endpoints.append(y)
-
-            if x_count > target_count:
-                target_node = x
-                target_count = x_count
-                exposed_endpoints = e_endpoints
-
-        if target_node in exposed_endpoints:
-            exposed_endpoints.remove(target_node)
-
-        return shortest_path_length, target_node, exposed_endpoints, adjacent_to_target
-
     def get_exposed_endpoints(self):
         return self.exposed_endpoints
 
     def gen_internal_network(self, k_nearest_neighbors_percent, p):
+        """
+        Picks the internal service network of the host from the pool of internal topologies.
+        See InternalTopology for how the topologies are generated.
+        """
         k = int(self.total_services * k_nearest_neighbors_percent)
         if k < 2:
             k = 2
 
-        self.graph = nx.connected_watts_strogatz_graph(self.total_nodes, k, p)
-        results = self.graph_choose_target_and_exposed(self.graph, nx.diameter(self.graph) - 1)
-
-        self.shortest_path_length = results[0]
-        self.target_node = results[1]
-        self.exposed_endpoints = results[2]
-        self.adjacent_to_target = results[3]
-
-        other_nodes = [
-            node_id for node_id in range(self.total_nodes)
-            if node_id != self.target_node and not node_id in self.exposed_endpoints
-        ]
-
-        for o1_node in other_nodes:
-            exposed_neighbors = [n for n in self.graph.neighbors(o1_node) if n in self.exposed_endpoints]
-            if len(exposed_neighbors) == 0:
-                self.graph.add_edge(o1_node, random.choice(self.exposed_endpoints))
-
-            for o2_node in other_nodes:
-                if o1_node == o2_node: continue
-                if self.graph.has_edge(o1_node, o2_node):
-                    self.graph.remove_edge(o1_node, o2_node)
-                self.graph.add_edge(o1_node, self.target_node)
-                self.graph.add_edge(o2_node, self.target_node)
-
-        for e1_node in self.exposed_endpoints:
-            for e2_node in self.exposed_endpoints:
-                if e1_node == e2_node: continue
-                if self.graph.has_edge(e1_node, e2_node):
-                    self.graph.remove_edge(e1_node, e2_node)
-                    if len(other_nodes) > 0:
-                        o1_node = random.choice(other_nodes)
-                        o2_node = random.choice(other_nodes)
-                        if not self.graph.has_edge(e1_node, o1_node):
-                            self.graph.add_edge(e1_node, o1_node)
-
-                        if not self.graph.has_edge(e2_node, o2_node):
-                            self.graph.add_edge(e2_node, o2_node)
-                    else:
-                        if nx.is_isolate(self.graph, e1_node):
-                            self.graph.add_edge(e1_node, self.target_node)
-                        if nx.is_isolate(self.graph, e2_node):
-                            self.graph.add_edge(e2_node, self.target_node)
-
-        self.colour_map = []
-        for node in list(self.graph.nodes):
-            if node == self.target_node:
-                self.colour_map.append("yellow")
-            elif node in self.exposed_endpoints:
-                self.colour_map.append("green")
-            else:
-                self.colour_map.append("blue")
+        bucket = self.rng.topology.randrange(constants.HOST_TOPOLOGY_POOL_BUCKETS)
+        self.topology = get_internal_topology(self.total_nodes, k, p, bucket)
 
     def draw(self):
         """
@@ -583,7 +581,7 @@ class Host:
         return nx.draw_networkx(self.graph, node_color=self.colour_map, with_labels=True)
 
     @staticmethod
-    def get_random_os_version(operating_system):
+    def get_random_os_version(operating_system, rng=random):
         """
         Gets a random Operating System version.
 
@@ -592,87 +590,94 @@ class Host:
         Parameters:
             operating_system:
                 the name of the operating system to pick a random version for
+            rng:
+                the random stream to draw from
 
         Returns:
             a random version where the latest versions of the OS are more likely to be chose over older ones
         """
         versions = constants.OS_VERSION_DICT[operating_system]
         total_versions = len(versions)
-        return random.choices(versions, weights=[total_versions - index for index in range(total_versions)], k=1)[0]
+        return rng.choices(versions, weights=[total_versions - index for index in range(total_versions)], k=1)[0]
 
     @staticmethod
-    def get_random_os():
+    def get_random_os(rng=random):
         """
+        Parameters:
+            rng:
+                the random stream to draw from
+
         Returns:
             A random OS
         """
-        return random.choice(constants.OS_TYPES)
+        return rng.choice(constants.OS_TYPES)
 
     @staticmethod
-    def get_random_address(existing_addresses=None):
+    def get_random_address(existing_addresses=None, rng=random):
         """
         Gets a Random IP address and makes sure that one does not already exist.
 
         Parameters:
             existing_addresses:
                 a list of already allocated IP addresses on the network
+            rng:
+                the random stream to draw from
             
         Returns:    
             a IPv4 address
         """
         if existing_addresses is None:
             existing_addresses = []
-        new_ip = "{}.{}.{}.{}".format(*[random.randint(1, 256) for _i in range(4)])
-        if new_ip in existing_addresses:
-            return Host.get_random_address(existing_addresses=existing_addresses)
-        return new_ip
+        existing_addresses = set(existing_addresses)
+        while True:
+            new_ip = "{}.{}.{}.{}".format(*[rng.randint(1, 256) for _i in range(4)])
+            if new_ip not in existing_addresses:
+                return new_ip
 
     @staticmethod
-    def get_random_port(existing_ports=None):
+    def get_random_port(existing_ports=None, rng=random):
         """
         Gets a random port while checking a port has already been allocated for a host
 
         Parameters:
             existing_ports:
                 the port numbers that have already been allocated to the host
+            rng:
+                the random stream to draw from
 
         Returns:
             a new port number for the new service
         """
         if existing_ports is None:
             existing_ports = []
-        new_port = random.choice(constants.HOST_PORT_RANGE)
-        if new_port in existing_ports:
-            return Host.get_random_port(existing_ports=existing_ports)
-        return new_port
+        existing_ports = set(existing_ports)
+        while True:
+            new_port = rng.choice(constants.HOST_PORT_RANGE)
+            if new_port not in existing_ports:
+                return new_port
 
-    def get_path_from_exposed(self):
+    @staticmethod
+    def get_random_ports(total_ports, rng=random):
         """
-        Gets the shortest path and distance from the exposed endpoints.
+        Gets distinct random ports in a single draw
 
-        Can also specify a subgraph to use for finding
+        Parameters:
+            total_ports:
+                the number of ports
+            rng:
+                the random stream to draw from
 
         Returns:
-            a tuple where the first element is the shortest path and the second element is the distance
+            a list of distinct port numbers
         """
-        graph = self.graph
-
-        shortest_distance = constants.LARGE_INT
-        shortest_path = []
-
-        for ex_service in self.exposed_endpoints:
-            try:
-                path = nx.shortest_path(graph, ex_service, self.target_node)
-                path_len = len(path)
-
-                if path_len < shortest_distance:
-                    shortest_distance = path_len
-                    shortest_path = path
-            except:
-                pass
+        return rng.sample(constants.HOST_PORT_RANGE, total_ports)
 
-        # This function is used for sorting so shouldn't raise an exception
-        # some MTD cause this exception to be raised.
-        #
+    def get_path_from_exposed(self):
+        """
+        Gets the shortest path from the exposed endpoints to the target node.
 
-        return shortest_path
+        Returns:
+            a list of the service ids on the shortest path, ending with the target node.
+            The path is cached by the shared internal topology.
+        """
+        return list(self.topology.get_path_from_exposed())
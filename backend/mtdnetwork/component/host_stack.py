@@ -0,0 +1,147 @@
+import heapq
+
+
+class HostStack:
+
+    def __init__(self, hosts=(), rng=None):
+        """
+        The hosts the adversary wants to attack, in the order they are attacked.
+
+        Every host has a key, and the hosts with the same key are kept in a bucket. The keys with a bucket are
+        kept in a heap, so popping the next host is O(log n) and checking if a host is on the stack is O(1).
+        A host is popped at random among the hosts with the lowest key, which is the same as sorting the stack by
+        key plus a random number in [0, 1) before every pop.
+
+        Hosts that are pushed are ordered by their position on the stack until the stack is reordered with
+        `reorder`, which keys them with the given key function. All the hosts are keyed again only when the key
+        epoch changes. The position of a host is kept until it is popped or moved, so keys may include it to keep
+        the order of the stack between hosts that are not tied at random.
+
+        Parameters:
+            hosts:
+                the initial hosts, from the top of the stack
+            rng:
+                the SimulationRandom of the simulation, whose attack stream breaks ties between hosts with the
+                same key. The stream is read on every pop, so the stack keeps up with a reseed.
+        """
+        self.rng = rng
+        self._keys = {}
+        self._buckets = {}
+        self._bucket_indexes = {}
+        self._positions = {}
+        self._heap = []
+        self._heap_keys = set()
+        # Hosts pushed since the last reorder, keyed by their position
+        self._unkeyed = {}
+        self._front = 0
+        self._back = 0
+        self._key_epoch = None
+        for host in hosts:
+            self.append(host)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, host):
+        return host in self._keys
+
+    def __iter__(self):
+        """
+        Iterates over the hosts by key, without breaking ties at random.
+        """
+        for key in sorted(self._buckets):
+            yield from self._buckets[key]
+
+    def _insert(self, host, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = []
+            if key not in self._heap_keys:
+                self._heap_keys.add(key)
+                heapq.heappush(self._heap, key)
+        self._keys[host] = key
+        self._bucket_indexes[host] = len(bucket)
+        bucket.append(host)
+
+    def _detach(self, host):
+        key = self._keys.pop(host)
+        bucket = self._buckets[key]
+        bucket_index = self._bucket_indexes.pop(host)
+        last_host = bucket.pop()
+        if last_host != host:
+            bucket[bucket_index] = last_host
+            self._bucket_indexes[last_host] = bucket_index
+        if len(bucket) == 0:
+            # The key is removed from the heap when it reaches the top
+            del self._buckets[key]
+
+    def append(self, host):
+        """
+        Pushes a host to the bottom of the stack, unless it is on the stack already.
+        """
+        if host in self._keys:
+            return
+        self._positions[host] = self._back
+        self._insert(host, (-1, self._back))
+        self._back += 1
+        self._unkeyed[host] = None
+
+    def push_front(self, hosts):
+        """
+        Pushes hosts to the top of the stack, in order. Hosts that are on the stack already are moved.
+        """
+        for host in reversed(hosts):
+            if host in self._keys:
+                self._detach(host)
+            self._front -= 1
+            self._positions[host] = self._front
+            self._insert(host, (-1, self._front))
+            self._unkeyed[host] = None
+
+    def get_position(self, host):
+        """
+        Returns:
+            the position of a host on the stack, lower positions were pushed closer to the top
+        """
+        return self._positions[host]
+
+    def remove(self, host):
+        self._detach(host)
+        del self._positions[host]
+        self._unkeyed.pop(host, None)
+
+    def pop(self):
+        """
+        Pops a random host among the hosts with the lowest key.
+        """
+        if len(self._keys) == 0:
+            raise IndexError("pop from empty host stack")
+        while self._heap[0] not in self._buckets:
+            self._heap_keys.discard(heapq.heappop(self._heap))
+        bucket = self._buckets[self._heap[0]]
+        if len(bucket) == 1:
+            host = bucket[0]
+        else:
+            host = bucket[self.rng.attack.randrange(len(bucket))]
+        self.remove(host)
+        return host
+
+    def reorder(self, key_epoch, get_key):
+        """
+        Keys the hosts pushed since the last reorder, or all the hosts if the key epoch changed.
+
+        Parameters:
+            key_epoch:
+                a value that changes whenever the key of a host may change
+            get_key:
+                a function that returns the key of a host
+        """
+        if key_epoch != self._key_epoch:
+            hosts = list(self._keys)
+        else:
+            hosts = list(self._unkeyed)
+        for host in hosts:
+            self._detach(host)
+            self._insert(host, get_key(host))
+        self._unkeyed.clear()
+        self._key_epoch = key_epoch
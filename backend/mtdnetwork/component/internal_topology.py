@@ -0,0 +1,243 @@
+import functools
+import random
+import networkx as nx
+import mtdnetwork.data.constants as constants
+
+
+class InternalTopology:
+
+    def __init__(self, total_nodes, k, p, bucket):
+        """
+        An immutable internal service network shared by every Host with the same parameters and bucket.
+        Hosts keep a reference to a pooled topology (see get_internal_topology) and only store their own
+        ports and services, so the graph structure is not duplicated for every host.
+
+        The topology is generated from a connected Watts-Strogatz random graph. The target service is the
+        service with the most services at least (diameter - 1) away from it, which become the exposed services.
+        The other services are connected to the target and to an exposed service, and the edges between two
+        other services or two exposed services are removed.
+
+        Parameters:
+            total_nodes:
+                the number of service nodes, including the target node
+            k:
+                each node is joined with its k nearest neighbors in the Watts-Strogatz ring topology
+            p:
+                the probability of rewiring each edge of the Watts-Strogatz random graph
+            bucket:
+                the index of the topology among the topologies with the same parameters. The topology is
+                generated from a random stream seeded by the parameters and the bucket.
+        """
+        self.key = (total_nodes, k, p, bucket)
+        self.total_nodes = total_nodes
+        topology_random = random.Random("{}-{}-{}-{}".format(*self.key))
+
+        adjacency = InternalTopology.connected_watts_strogatz_adjacency(total_nodes, k, p, topology_random)
+        shortest_path_length, target_node, exposed_endpoints = InternalTopology.choose_target_and_exposed(adjacency)
+        self.target_node = target_node
+        # Shared between hosts, must not be modified
+        self.exposed_endpoints = exposed_endpoints
+
+        exposed = set(exposed_endpoints)
+        other_nodes = [
+            node_id for node_id in range(total_nodes)
+            if node_id != target_node and node_id not in exposed
+        ]
+
+        def add_edge(u, v):
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+
+        def remove_edge(u, v):
+            adjacency[u].discard(v)
+            adjacency[v].discard(u)
+
+        # Every other service is connected to an exposed service and, if there are several, to the target only
+        for o_node in other_nodes:
+            if adjacency[o_node].isdisjoint(exposed):
+                add_edge(o_node, topology_random.choice(exposed_endpoints))
+        if len(other_nodes) > 1:
+            for o_node in other_nodes:
+                for other in adjacency[o_node] - exposed - {target_node}:
+                    remove_edge(o_node, other)
+                add_edge(o_node, target_node)
+
+        # Edges between exposed services are replaced by edges to random other services
+        for i, e1_node in enumerate(exposed_endpoints):
+            for e2_node in exposed_endpoints[i + 1:]:
+                if e2_node not in adjacency[e1_node]:
+                    continue
+                remove_edge(e1_node, e2_node)
+                if len(other_nodes) > 0:
+                    add_edge(e1_node, topology_random.choice(other_nodes))
+                    add_edge(e2_node, topology_random.choice(other_nodes))
+                else:
+                    if len(adjacency[e1_node]) == 0:
+                        add_edge(e1_node, target_node)
+                    if len(adjacency[e2_node]) == 0:
+                        add_edge(e2_node, target_node)
+
+        self.neighbors = tuple(tuple(sorted(adjacency[u])) for u in range(total_nodes))
+        distance_to_target = InternalTopology.bfs_path_length(self.neighbors, target_node)
+        self.distance_to_target = tuple(distance_to_target.get(u) for u in range(total_nodes))
+        self.colour_map = tuple(
+            "yellow" if node == target_node else "green" if node in exposed else "blue"
+            for node in range(total_nodes)
+        )
+        self._graph = None
+        self._path_from_exposed = None
+
+    def __reduce__(self):
+        # Pickled as its key, so unpickled hosts share the pooled instance again
+        return get_internal_topology, self.key
+
+    @property
+    def graph(self):
+        """
+        A networkx graph of the topology, built on first use and shared by every host. Must not be modified.
+        """
+        if self._graph is None:
+            graph = nx.Graph()
+            graph.add_nodes_from(range(self.total_nodes))
+            graph.add_edges_from((u, v) for u in range(self.total_nodes) for v in self.neighbors[u] if u < v)
+            self._graph = graph
+        return self._graph
+
+    def get_path_from_exposed(self):
+        """
+        Gets the shortest path from the exposed services to the target service, computed on first use.
+
+        Returns:
+            a tuple of the service ids on the path, starting from the closest exposed service and ending with
+            the target service, or an empty tuple if there is no path
+        """
+        if self._path_from_exposed is None:
+            shortest_distance = constants.LARGE_INT
+            shortest_path = []
+            for ex_service in self.exposed_endpoints:
+                try:
+                    path = nx.shortest_path(self.graph, ex_service, self.target_node)
+                except nx.NetworkXNoPath:
+                    continue
+                if len(path) < shortest_distance:
+                    shortest_distance = len(path)
+                    shortest_path = path
+            self._path_from_exposed = tuple(shortest_path)
+        return self._path_from_exposed
+
+    @staticmethod
+    def bfs_path_length(graph, source):
+        """
+        Returns:
+            a dict with the shortest path length from source to every node reachable from it
+        """
+        lengths = {source: 0}
+        level = [source]
+        distance = 0
+        while level:
+            distance += 1
+            next_level = []
+            for u in level:
+                for v in graph[u]:
+                    if v not in lengths:
+                        lengths[v] = distance
+                        next_level.append(v)
+            level = next_level
+        return lengths
+
+    @staticmethod
+    def choose_target_and_exposed(graph, target_distance=None):
+        """
+        Chooses the target and exposed services on the internal network.
+
+        Exposed services means that an adversary can see the ports open externally
+
+        Parameters:
+            graph:
+                a list with the set of neighbours of every node
+            target_distance:
+                the target distance from the target node for exposed services.
+                If None, the diameter of the graph - 1 is used.
+
+        Returns:
+            a tuple of the all pairs shortest path lengths, the target node and the exposed nodes
+        """
+        shortest_path_length = {x: InternalTopology.bfs_path_length(graph, x) for x in range(len(graph))}
+        nodes_list = list(range(len(graph)))
+        if target_distance is None:
+            target_distance = max(max(lengths.values()) for lengths in shortest_path_length.values()) - 1
+
+        target_node = -1
+        exposed_endpoints = []
+        target_count = -1
+
+        for x in nodes_list:
+            e_endpoints = [y for y in nodes_list if shortest_path_length[x][y] >= target_distance]
+            if len(e_endpoints) > target_count:
+                target_node = x
+                target_count = len(e_endpoints)
+                exposed_endpoints = e_endpoints
+
+        if target_node in exposed_endpoints:
+            exposed_endpoints.remove(target_node)
+
+        return shortest_path_length, target_node, exposed_endpoints
+
+    @staticmethod
+    def connected_watts_strogatz_adjacency(n, k, p, rng, tries=100):
+        """
+        Generates a connected Watts-Strogatz random graph as a list with the set of neighbours of every node.
+        Draws from rng in the same way as nx.connected_watts_strogatz_graph, so the generated graphs are the same.
+
+        Parameters:
+            n:
+                the number of nodes
+            k:
+                each node is joined with its k nearest neighbors in a ring topology
+            p:
+                the probability of rewiring each edge
+            rng:
+                the random stream to draw from
+            tries:
+                the number of attempts to generate a connected graph
+        """
+        if k > n:
+            raise nx.NetworkXError("k>n, choose smaller k or larger n")
+        nodes = list(range(n))
+        if k == n:
+            return [set(nodes) - {u} for u in nodes]
+
+        for _i in range(tries):
+            adjacency = [set() for _u in nodes]
+            for j in range(1, k // 2 + 1):
+                for u in nodes:
+                    v = (u + j) % n
+                    adjacency[u].add(v)
+                    adjacency[v].add(u)
+            for j in range(1, k // 2 + 1):
+                for u in nodes:
+                    v = (u + j) % n
+                    if rng.random() < p:
+                        w = rng.choice(nodes)
+                        skip = False
+                        while w == u or w in adjacency[u]:
+                            w = rng.choice(nodes)
+                            if len(adjacency[u]) >= n - 1:
+                                skip = True
+                                break
+                        if not skip:
+                            adjacency[u].discard(v)
+                            adjacency[v].discard(u)
+                            adjacency[u].add(w)
+                            adjacency[w].add(u)
+            if len(InternalTopology.bfs_path_length(adjacency, 0)) == n:
+                return adjacency
+        raise nx.NetworkXError("Maximum number of tries exceeded")
+
+
+@functools.lru_cache(maxsize=None)
+def get_internal_topology(total_nodes, k, p, bucket):
+    """
+    Returns the pooled InternalTopology for the parameters and bucket, generating it on first use.
+    """
+    return InternalTopology(total_nodes, k, p, bucket)
@@ -1,4 +1,3 @@
-import random
 from collections import deque
 from mtdnetwork.mtd.completetopologyshuffle import CompleteTopologyShuffle
 from mtdnetwork.mtd.ipshuffle import IPShuffle
@@ -8,13 +7,14 @@ from mtdnetwork.mtd.osdiversity import OSDiversity
 from mtdnetwork.mtd.servicediversity import ServiceDiversity
 from mtdnetwork.mtd.usershuffle import UserShuffle
 from mtdnetwork.mtd.osdiversityassignment import OSDiversityAssignment
-from mtdnetwork.data.constants import MTD_TRIGGER_INTERVAL
+from mtdnetwork.data.constants import MTD_TRIGGER_INTERVAL, MTD_OPTIONS
 from heapq import heappush, heappop
 
 
 class MTDScheme:
 
-    def __init__(self, scheme: str, network, mtd_trigger_interval=None, mtd_trigger_std=0.5, custom_strategies=None):
+    def __init__(self, scheme: str, network, mtd_trigger_interval=None, mtd_trigger_std=0.5, custom_strategies=None,
+                 rng=None, mtd_options=None):
         self._scheme = scheme
         self._mtd_trigger_interval = mtd_trigger_interval
         self._mtd_trigger_std = mtd_trigger_std
@@ -30,7 +30,13 @@ class MTDScheme:
                                 # UserShuffle
                                 ]
         self._mtd_custom_strategies = custom_strategies
+        if mtd_options is None:
+            mtd_options = MTD_OPTIONS
+        self._mtd_options = mtd_options
         self.network = network
+        if rng is None:
+            rng = network.get_rng()
+        self.rng = rng
         self._init_mtd_scheme(scheme)
 
     def _init_mtd_scheme(self, scheme):
@@ -55,7 +61,7 @@ class MTDScheme:
         register an MTD strategy to the queue
         """
         if isinstance(mtd, type):
-            mtd_strategy = mtd(network=self.network)
+            mtd_strategy = mtd(network=self.network, **self._mtd_options.get(mtd.__name__, {}))
         else:
             mtd_strategy = mtd
         heappush(self.network.get_mtd_queue(), (mtd_strategy.get_priority(), mtd_strategy))
@@ -72,7 +78,7 @@ class MTDScheme:
         """
         register an MTD for random scheme
         """
-        self._mtd_register(mtd=random.choice(self._mtd_strategies))
+        self._mtd_register(mtd=self.rng.mtd.choice(self._mtd_strategies))
 
     def _register_mtd_alternatively(self):
         """
@@ -1,20 +1,49 @@
+import functools
+from collections import OrderedDict
 import networkx as nx
 import pkg_resources
 import matplotlib.pyplot as plt
 import numpy as np
-import random
 import mtdnetwork.data.constants as constants
 import mtdnetwork.component.services as services
 from mtdnetwork.component.host import Host
+from mtdnetwork.component.address_allocator import AddressAllocator
+from mtdnetwork.component.reachability import Reachability
+from mtdnetwork.component.distance_index import DistanceIndex
+from mtdnetwork.component.simulation_random import SimulationRandom
 from mtdnetwork.statistic.scorer import Scorer
+from mtdnetwork.statistic.attack_path_exposure import AttackPathExposure
 import os
 
 
+@functools.lru_cache(maxsize=constants.NETWORK_LAYOUT_CACHE_SIZE)
+def subnet_layout(total_nodes, edges):
+    """
+    Computes the spring layout of a subnet, memoized by the structure of the subnet.
+
+    Parameters:
+        total_nodes:
+            the number of nodes of the subnet, numbered 0 to total_nodes - 1
+        edges:
+            a frozenset of the (smaller node, larger node) edges of the subnet
+
+    Returns:
+        a tuple with the (x, y) coordinates of every node
+    """
+    subgraph = nx.Graph()
+    subgraph.add_nodes_from(range(total_nodes))
+    subgraph.add_edges_from(edges)
+    # node_distance of 5 decides the distance between nodes in a same subnet
+    subgraph_pos = nx.spring_layout(subgraph, k=5, iterations=60)
+    return tuple((float(subgraph_pos[n][0]), float(subgraph_pos[n][1])) for n in range(total_nodes))
+
+
 class Network:
 
     def __init__(self, total_nodes, total_endpoints, total_subnets, total_layers, total_database, target_layer=None,
                  users_to_nodes_ratio=constants.USER_TO_NODES_RATIO,
-                 prob_user_reuse_pass=constants.USER_PROB_TO_REUSE_PASS, seed=None):
+                 prob_user_reuse_pass=constants.USER_PROB_TO_REUSE_PASS, seed=None, rng=None, headless=False,
+                 persist_catalog=False, catalog_seed=None):
         """
         Initialises the state of the network for the simulation.
 
@@ -35,17 +64,38 @@ class Network:
                 the probability that a user has reused their password.
             seed:
                 the seed for the random number generator if one needs to be set
+            rng:
+                the SimulationRandom instance shared by the simulation. If None, one is created from `seed`.
+            headless:
+                if True, gen_graph does not compute the node positions. They are computed the first time
+                `pos`, `min_y_pos` or `max_y_pos` is accessed.
+            persist_catalog:
+                if True and the network is seeded, the service catalog is saved to and loaded from the snapshots
+                directory, see get_service_catalog
+            catalog_seed:
+                if set, the service catalog is generated from this seed instead of the seed of the network, so
+                networks with different seeds or no seed share it
         """
         self.graph = None
         self.colour_map = None
+        # Host registry: the Host instance, layer and subnet of every node, indexed by host id
+        self._hosts = []
+        self._layers = []
+        self._subnets = []
         self.users_per_host = None
         self.total_users = None
         self.users_list = None
-        self.pos = None
-        self.min_y_pos = None
-        self.max_y_pos = None
-        if seed is not None:
-            random.seed(seed)
+        self.headless = headless
+        # (removed edges, added edges) of the last rewire_topology, None if the graph was regenerated instead
+        self.topology_delta = None
+        # Incremented every time the edges of the graph change
+        self.topology_version = 0
+        self._pos = None
+        self._min_y_pos = None
+        self._max_y_pos = None
+        if rng is None:
+            rng = SimulationRandom(seed)
+        self.rng = rng
         self.total_nodes = total_nodes
         self.total_endpoints = total_endpoints
         self.total_subnets = total_subnets
@@ -57,11 +107,22 @@ class Network:
 
         self.tags = []
         self.tag_priority = []
-        self.service_generator = services.ServicesGenerator()
+        self.service_generator = services.ServicesGenerator(rng=self.rng, persist_catalog=persist_catalog,
+                                                            catalog_seed=catalog_seed)
+        self.address_allocator = AddressAllocator()
         self.nodes = [n for n in range(total_nodes)]
         self.mtd_strategies = []
 
-        self.reachable = []
+        self.reachability = Reachability(self.exposed_endpoints)
+        # The hacker visible graph and the epoch it was built at
+        self._visible_graph = None
+        self._visible_graph_epoch = None
+        # The distance index from the exposed endpoints of the graph and of the hacker visible graph,
+        # with the epoch they were computed at
+        self._distance_indexes = {}
+        # LRU cache of the distance indexes from pivot hosts, keyed by (pivot host id, graph name, epoch)
+        self._pivot_distance_indexes = OrderedDict()
+        self._attack_path_exposure = AttackPathExposure()
         self.compromised_hosts = []
         self.node_per_layer = []
         # Network type 0 is a targetted attack, Network type 1 is a general attack (no target node)
@@ -96,9 +157,24 @@ class Network:
             host.swap_network(self)
 
     def gen_graph(self, min_nodes_per_subnet=3, max_subnets_per_layer=4, subnet_m_ratio=0.2,
-                  prob_inter_layer_edge=0.5):
+                  prob_inter_layer_edge=0.5, max_connect_rounds=1000):
+        """
+        Generates a network of subnets using the Barabasi-Albert Random Graph model and the positions
+        of its nodes, unless the network is headless. See gen_topology for the parameters.
         """
-        Generates a network of subnets using the Barabasi-Albert Random Graph model.
+        self.gen_topology(min_nodes_per_subnet, max_subnets_per_layer, subnet_m_ratio, prob_inter_layer_edge,
+                          max_connect_rounds)
+        if not self.headless:
+            self.gen_pos()
+
+    def gen_topology(self, min_nodes_per_subnet=3, max_subnets_per_layer=4, subnet_m_ratio=0.2,
+                     prob_inter_layer_edge=0.5, max_connect_rounds=1000):
+        """
+        Generates a network of subnets using the Barabasi-Albert Random Graph model, without node positions.
+
+        The edges of all subnets and the edges connecting them are collected into one edge array and the graph is
+        constructed once from it. Which subnets are already connected is tracked with union-find structures over
+        the subnets, so connecting the layers never runs a connectivity search on the graph.
 
         Parameters:
             min_nodes_per_subnet:
@@ -110,13 +186,17 @@ class Network:
                 m is the number of edges to attach from a new node to existing nodes
             prob_inter_layer_edge:
                 probability that a node connects to a different layer in the network.
+            max_connect_rounds:
+                the maximum number of rounds of random edges added between layers. Subnets that are still
+                disconnected afterwards are attached to the previous layer by their highest degree node.
         """
+        topology_random = self.rng.topology
         # Decide the number of subnets for each layer of the network
         subnets_per_layer = []
         while len(subnets_per_layer) < self.layers:
             # Adds 1 to start of array if array is empty
             if len(subnets_per_layer) == 0: subnets_per_layer.append(1)
-            l_subnets = random.randint(1, max_subnets_per_layer)
+            l_subnets = topology_random.randint(1, max_subnets_per_layer)
             # Only appends value if it doesn't exceed maximum number of subnets possible
             if self.total_subnets - (sum(subnets_per_layer) + l_subnets) > self.layers - len(subnets_per_layer):
                 subnets_per_layer.append(l_subnets)
@@ -124,21 +204,19 @@ class Network:
         # Randomly adds one to random subnets until there is the correct amount of subnets (Could be Optimised in
         # future)
         while sum(subnets_per_layer) < self.total_subnets:
-            s_index = random.randint(1, self.layers - 1)
+            s_index = topology_random.randint(1, self.layers - 1)
             if subnets_per_layer[s_index] < max_subnets_per_layer:
                 subnets_per_layer[s_index] = subnets_per_layer[s_index] + 1
 
-        max_subnet_in_layer = max(subnets_per_layer)
-
         # Assign nodes to each layer
         nodes_per_layer = [self.total_endpoints]
         # Appends the minimum number of nodes that should be in the layer
         for subs in subnets_per_layer[1:]:
             nodes_per_layer.append(min_nodes_per_subnet * subs)
 
-        # Randomly adds one to random subnets until there is the correct number of nodes (Could be Opitmised in future)
-        while sum(nodes_per_layer) < self.total_nodes:
-            n_index = random.randint(1, self.layers - 1)
+        # Randomly adds the remaining nodes one at a time to random layers
+        for _i in range(self.total_nodes - sum(nodes_per_layer)):
+            n_index = topology_random.randint(1, self.layers - 1)
             nodes_per_layer[n_index] = nodes_per_layer[n_index] + 1
 
         # Assign number of nodes to each subnet
@@ -146,21 +224,19 @@ class Network:
         for i, subnets in enumerate(subnets_per_layer):
             # List containing the minimum number of nodes for every subnet in layer
             temp_subnet_nodes = [min_nodes_per_subnet for _i in range(subnets)]
-            # Randomly adds one to random subnets until correct number of nodes for the layer
-            while sum(temp_subnet_nodes) < nodes_per_layer[i]:
-                n_index = random.randint(0, subnets - 1)
+            # Randomly adds the remaining nodes of the layer one at a time to random subnets
+            for _i in range(nodes_per_layer[i] - sum(temp_subnet_nodes)):
+                n_index = topology_random.randint(0, subnets - 1)
                 temp_subnet_nodes[n_index] = temp_subnet_nodes[n_index] + 1
             subnet_nodes.append(temp_subnet_nodes)
 
-        # self.graphenerate the graph
-        self.graph = nx.Graph()
+        # Generate the edges of every subnet
+        # subnet_info[s] = (layer, subnet in layer, first node id, number of nodes)
+        subnet_info = []
+        sources, targets = [], []
         # Node offset
         node_id = 0
         self.colour_map = []
-        self.pos = {}
-        attr = {}
-        min_y_pos = 200000
-        max_y_pos = -200000
         # Layer = i, subnet = j, s_nodes = # of nodes in subnet
         for i, subnet_node_list in enumerate(subnet_nodes):
             for j, s_nodes in enumerate(subnet_node_list):
@@ -169,119 +245,65 @@ class Network:
                     m = 1
                 elif m >= s_nodes:
                     m = s_nodes - 1
-                subgraph = nx.barabasi_albert_graph(s_nodes, m)
-                new_node_mapping = {k: k + node_id for k in range(s_nodes)}
-                subgraph = nx.relabel_nodes(subgraph, new_node_mapping)
-                new_attr = {k + node_id: {"subnet": j, "layer": i} for k in range(s_nodes)}
-                attr = {**attr, **new_attr}
+                s_sources, s_targets = Network.barabasi_albert_edges(s_nodes, m, node_id, topology_random)
+                sources.append(s_sources)
+                targets.append(s_targets)
+                subnet_info.append((i, j, node_id, s_nodes))
 
                 # Setting offset to next empty node
                 node_id += s_nodes
 
-                # Setting some parameters to decide the position of nodes
-                layer_distance = 1.5     # it will decide the distance between layers
-                node_distance = 5        # it will decide the distance between nodes in a same subnet
-
-                subgraph_pos = nx.spring_layout(subgraph, k=node_distance, iterations=60)
-                if i != 0:
-                    subgraph_pos = {
-                        k: np.array(
-                            [v[0] + i * layer_distance, v[1] + j * 3 + 1.5 * (max_subnet_in_layer - len(subnet_node_list))])
-                        for k, v in subgraph_pos.items()
-                    }
-
-                    for k, v in subgraph_pos.items():
-                        y = v[1] + j * 3 + 1.5 * (max_subnet_in_layer - len(subnet_node_list))
-                        subgraph_pos[k] = np.array(
-                            [v[0] + i * 2.25, y]
-                        )
-                        if y < min_y_pos:
-                            min_y_pos = y
-                        if y > max_y_pos:
-                            max_y_pos = y
-                else:
-                    subgraph_pos = {
-                        k: np.array([0, k])
-                        for k, _v in subgraph_pos.items()
-                    }
-                # Stores all the positions of items from subgraphs
-                self.pos = {**self.pos, **subgraph_pos}
-
                 # Selects Target Host
                 if i == self.target_layer and j == 1 and self.network_type == 0 and self.target_node != -1:
-                    self.target_node = node_id - random.randrange(0, s_nodes)
+                    self.target_node = node_id - topology_random.randrange(0, s_nodes)
                     print("Target Node is: ", self.target_node)
 
                 # Assigns Colour of nodes based on constant key
-                for k in range(s_nodes):
-                    self.colour_map.append(constants.NODE_COLOURS[i])
+                self.colour_map.extend([constants.NODE_COLOURS[i]] * s_nodes)
 
-                # Adds Subgraph to final graph
-                self.graph = nx.compose(self.graph, subgraph)
+        subnet_edges = np.stack([np.concatenate(sources), np.concatenate(targets)], axis=1)
+        total_graph_nodes = node_id
 
-        # save the min_y_pos and max_y_pos
-        self.min_y_pos = min_y_pos
-        self.max_y_pos = max_y_pos
+        # Connect the subnets
+        degrees = np.bincount(subnet_edges.ravel(), minlength=total_graph_nodes)
+        subnets = [(info[0], range(info[2], info[2] + info[3])) for info in subnet_info]
+        connect_edges = self.connect_subnets(subnets, degrees, topology_random, prob_inter_layer_edge,
+                                             max_connect_rounds)
+        edges = np.concatenate([subnet_edges, np.array(connect_edges, dtype=subnet_edges.dtype).reshape(-1, 2)])
 
-        # Defines Nodes for whole graph
-        nx.set_node_attributes(self.graph, attr)
+        # Remove edges between endpoint nodes (not needed since adversary can reach them all anyway)
+        edges = edges[(edges[:, 0] >= self.total_endpoints) | (edges[:, 1] >= self.total_endpoints)]
 
-        # Connect the graph
-        def get_other_node(node_list, node_degrees, other_node):
-            n = random.choices(node_list, weights=node_degrees, k=1)[0]
-            if n == other_node:
-                return get_other_node(node_list, node_degrees, other_node)
-            return n
+        # Connects the external nodes with no internal nodes to layer 1
+        degrees = np.bincount(edges.ravel(), minlength=total_graph_nodes)
+        layer_1_nodes = [n for layer, nodes in subnets if layer == 1 for n in nodes]
+        endpoint_edges = self.connect_blank_endpoints(degrees, layer_1_nodes, topology_random)
+        edges = np.concatenate([edges, np.array(endpoint_edges, dtype=edges.dtype).reshape(-1, 2)])
 
-        while not nx.is_connected(self.graph):
-            node_layers = nx.get_node_attributes(self.graph, "layer")
-            for i in range(self.layers - 1):
-                node_a = [n for n in node_layers if node_layers[n] == i]
-                degree_node_a = [self.graph.degree(n) for n in node_a]
-                node_b = [n for n in node_layers if node_layers[n] == i + 1]
-                degree_node_b = [self.graph.degree(n) for n in node_b]
-
-                n_a1 = random.choices(node_a, weights=degree_node_a, k=1)[0]
-                if not nx.is_connected(self.graph.subgraph(node_a + node_b)):
-                    n_b = random.choices(node_b, weights=degree_node_b, k=1)[0]
-                    self.graph.add_edge(n_a1, n_b)
-                if random.random() < prob_inter_layer_edge and subnets_per_layer[i] > 1 and not nx.is_connected(
-                        self.graph.subgraph(node_a)):
-                    n_a2 = get_other_node(node_a, degree_node_a, n_a1)
-                    self.graph.add_edge(n_a1, n_a2)
-
-        endpoint_nodes_list = [n for n in range(self.total_endpoints)]
-        blank_endpoints = []
+        # Updates the host registry, the hosts are kept when the graph is regenerated
+        self._layers = [info[0] for info in subnet_info for _n in range(info[3])]
+        self._subnets = [info[1] for info in subnet_info for _n in range(info[3])]
+        if len(self._hosts) != total_graph_nodes:
+            self._hosts = [None] * total_graph_nodes
 
-        # Remove edges between endpoint nodes (not needed since adversary can reach them all anyway)
-        # Store all external nodes with no internal nodes into blank_endpoints
-        for n in endpoint_nodes_list:
-            neighbors = list(self.graph.neighbors(n))
-            for neighbor in neighbors:
-                if neighbor in endpoint_nodes_list:
-                    self.graph.remove_edge(n, neighbor)
-            internal_connection = list(self.graph.neighbors(n))
-            if not internal_connection:
-                blank_endpoints.append(n)
-
-        # Pulls from blank_endpoints until all exposed endpoints are connected
-        node_layers = nx.get_node_attributes(self.graph, "layer")
-        layer1_nodes = [n for n in node_layers if node_layers[n] == 1]
-        layer1_weights = [self.graph.degree(n) for n in layer1_nodes]
-        while len(blank_endpoints):
-            endpoint = blank_endpoints.pop(0)
-            other_node = random.choices(layer1_nodes, weights=layer1_weights, k=1)[0]
-            self.graph.add_edge(endpoint, other_node)
+        # Constructs the graph in one pass
+        self.graph = nx.Graph()
+        self.graph.add_nodes_from(
+            (n, {"subnet": self._subnets[n], "layer": self._layers[n]})
+            if self._hosts[n] is None else
+            (n, {"subnet": self._subnets[n], "layer": self._layers[n], "host": self._hosts[n]})
+            for n in range(total_graph_nodes)
+        )
+        self.graph.add_edges_from(edges.tolist())
 
         # Updates Colour of target node to red
         if self.network_type == 0:
             self.colour_map[self.target_node] = "red"
 
-        # Fix positions for endpoints
-        for n in range(self.total_endpoints):
-            position = (n + 1) / self.total_endpoints * (max_y_pos - min_y_pos) + min_y_pos
-            new_pos = {n: np.array([0, position])}
-            self.pos.update(new_pos)
+        # The positions of the previous graph are no longer valid
+        self._pos = None
+        self.topology_delta = None
+        self.topology_version += 1
 
         # Update Nodes Per Layer for Complete topology shuffling
         self.node_per_layer = nodes_per_layer.copy()
@@ -292,6 +314,330 @@ class Network:
         # print("Exposed Endpoint list: ", self.exposed_endpoints)
         # print("nodes per layer: ", self.node_per_layer)
 
+    def connect_subnets(self, subnets, degrees, rng, prob_inter_layer_edge=0.5, max_connect_rounds=1000,
+                        joined_edges=(), rewire_layers=()):
+        """
+        Generates the edges that connect the subnets of the network into one component.
+        Nodes are picked with probability proportional to their degree inside their subnet.
+
+        Which subnets are already connected is tracked with union-find structures over the subnets, so no
+        connectivity search is run on the graph.
+
+        Parameters:
+            subnets:
+                a list of (layer, nodes) of every subnet, ordered by layer
+            degrees:
+                an array with the degree of every node inside its subnet
+            rng:
+                the random stream to draw from
+            prob_inter_layer_edge:
+                probability that a node connects to a different subnet of the same layer in a round.
+            max_connect_rounds:
+                the maximum number of rounds of random edges added between layers. Subnets that are still
+                disconnected afterwards are attached to the previous layer by their highest degree node.
+            joined_edges:
+                the edges between subnets that are already in the network
+            rewire_layers:
+                a list of (layer, layer) pairs. A random edge between two different subnets of the two layers is
+                generated for every pair before connecting the remaining subnets.
+
+        Returns:
+            a list of the generated edges
+        """
+        layer_subnets = [[] for _i in range(self.layers)]
+        layer_nodes = [[] for _i in range(self.layers)]
+        node_subnet = [0] * len(degrees)
+        for s, (layer, nodes) in enumerate(subnets):
+            layer_subnets[layer].append(s)
+            layer_nodes[layer].extend(nodes)
+            for n in nodes:
+                node_subnet[n] = s
+        layer_cum_weights = []
+        for nodes in layer_nodes:
+            weights = degrees[nodes] if len(nodes) > 0 else np.zeros(0)
+            # Layers without edges inside their subnets (e.g. the exposed endpoints) are picked from uniformly
+            if weights.sum() == 0:
+                weights = np.ones(len(nodes))
+            layer_cum_weights.append(np.cumsum(weights).tolist())
+
+        def get_layer_node(layer):
+            return rng.choices(layer_nodes[layer], cum_weights=layer_cum_weights[layer], k=1)[0]
+
+        def get_other_node(layer, other_node):
+            n = get_layer_node(layer)
+            if n == other_node:
+                return get_other_node(layer, other_node)
+            return n
+
+        def is_joined(union_find, subnets):
+            return len({union_find[s] for s in subnets}) == 1
+
+        # network_union: the whole network, layer_union[i]: subnets of layer i connected by edges inside layer i,
+        # pair_union[i]: subnets of layer i and i + 1 connected by edges inside the two layers
+        network_union = nx.utils.UnionFind(range(len(subnets)))
+        layer_union = [nx.utils.UnionFind(layer_subnets[i]) for i in range(self.layers)]
+        pair_union = [nx.utils.UnionFind(layer_subnets[i] + layer_subnets[i + 1]) for i in range(self.layers - 1)]
+        connect_edges = []
+
+        def join(n_a, n_b):
+            s_a, s_b = node_subnet[n_a], node_subnet[n_b]
+            l_a, l_b = subnets[s_a][0], subnets[s_b][0]
+            network_union.union(s_a, s_b)
+            if l_a == l_b:
+                for union_find in [layer_union[l_a]] + pair_union[max(l_a - 1, 0):l_a + 1]:
+                    union_find.union(s_a, s_b)
+            elif abs(l_a - l_b) == 1:
+                pair_union[min(l_a, l_b)].union(s_a, s_b)
+
+        for n_a, n_b in joined_edges:
+            join(n_a, n_b)
+
+        for l_a, l_b in rewire_layers:
+            for _i in range(max_connect_rounds):
+                n_a = get_layer_node(l_a)
+                n_b = get_layer_node(l_b)
+                if node_subnet[n_a] != node_subnet[n_b]:
+                    connect_edges.append((n_a, n_b))
+                    join(n_a, n_b)
+                    break
+
+        rounds = 0
+        while not is_joined(network_union, range(len(subnets))) and rounds < max_connect_rounds:
+            for i in range(self.layers - 1):
+                n_a1 = get_layer_node(i)
+                if not is_joined(pair_union[i], layer_subnets[i] + layer_subnets[i + 1]):
+                    n_b = get_layer_node(i + 1)
+                    connect_edges.append((n_a1, n_b))
+                    join(n_a1, n_b)
+                if rng.random() < prob_inter_layer_edge and len(layer_subnets[i]) > 1 and not is_joined(
+                        layer_union[i], layer_subnets[i]):
+                    n_a2 = get_other_node(i, n_a1)
+                    connect_edges.append((n_a1, n_a2))
+                    join(n_a1, n_a2)
+            rounds += 1
+
+        # Attaches the subnets that are still disconnected to the previous layer, layer by layer
+        for s, (layer, nodes) in enumerate(subnets):
+            if network_union[s] == network_union[0]:
+                continue
+            prev_subnet = layer_subnets[layer - 1][0]
+            prev_nodes = subnets[prev_subnet][1]
+            n_a = prev_nodes[int(np.argmax(degrees[prev_nodes]))]
+            n_b = nodes[int(np.argmax(degrees[nodes]))]
+            connect_edges.append((n_a, n_b))
+            network_union.union(prev_subnet, s)
+
+        return connect_edges
+
+    def connect_blank_endpoints(self, degrees, layer_1_nodes, rng):
+        """
+        Generates an edge to layer 1 for every exposed endpoint without edges.
+        The layer 1 node is picked with probability proportional to its degree.
+        """
+        layer_1_weights = degrees[layer_1_nodes].tolist()
+        return [
+            (endpoint, rng.choices(layer_1_nodes, weights=layer_1_weights, k=1)[0])
+            for endpoint in range(self.total_endpoints)
+            if degrees[endpoint] == 0
+        ]
+
+    def rewire_topology(self, fraction=1.0, prob_inter_layer_edge=0.5, max_connect_rounds=1000, rng=None):
+        """
+        Re-randomises the edges between subnets and between layers, keeping the subnet membership of every node
+        and the edges inside every subnet. Hosts, positions and colours are not changed.
+
+        Parameters:
+            fraction:
+                the fraction of the edges between subnets that is rewired. If 1, all of them are removed and the
+                subnets are connected again in the same way as gen_graph. Otherwise the chosen edges are replaced by
+                random edges between the same layers, and edges are only added if the network became disconnected.
+            prob_inter_layer_edge:
+                see connect_subnets
+            max_connect_rounds:
+                see connect_subnets
+            rng:
+                the random stream to draw from. If None, the topology stream is used.
+
+        Returns:
+            a tuple of the lists of the edges removed from and added to the graph. An edge that is removed and
+            joined again, or joined while it is already in the graph, is in neither list.
+        """
+        if rng is None:
+            rng = self.rng.topology
+        layers = self._layers
+        subnet_ids = self._subnets
+
+        subnet_nodes = {}
+        for n in sorted(self.graph.nodes):
+            subnet_nodes.setdefault((layers[n], subnet_ids[n]), []).append(n)
+        subnets = [(key[0], nodes) for key, nodes in sorted(subnet_nodes.items())]
+
+        inter_subnet_edges = [
+            (u, v) for u, v in self.graph.edges
+            if layers[u] != layers[v] or subnet_ids[u] != subnet_ids[v]
+        ]
+        if fraction >= 1:
+            removed_edges = inter_subnet_edges
+            rewire_layers = []
+        else:
+            removed_edges = rng.sample(inter_subnet_edges, int(round(fraction * len(inter_subnet_edges))))
+            rewire_layers = [tuple(sorted((layers[u], layers[v]))) for u, v in removed_edges]
+        removed = set(map(frozenset, removed_edges))
+        kept_edges = [(u, v) for u, v in inter_subnet_edges if frozenset((u, v)) not in removed]
+
+        degrees = np.zeros(max(self.graph.nodes) + 1, dtype=np.int64)
+        for n, degree in self.graph.degree:
+            degrees[n] = degree
+        for u, v in inter_subnet_edges:
+            degrees[u] -= 1
+            degrees[v] -= 1
+
+        added_edges = self.connect_subnets(subnets, degrees, rng, prob_inter_layer_edge, max_connect_rounds,
+                                           joined_edges=kept_edges, rewire_layers=rewire_layers)
+
+        # Remove edges between endpoint nodes (not needed since adversary can reach them all anyway)
+        added_edges = [
+            (u, v) for u, v in added_edges
+            if u >= self.total_endpoints or v >= self.total_endpoints
+        ]
+        for u, v in kept_edges + added_edges:
+            degrees[u] += 1
+            degrees[v] += 1
+        added_edges += self.connect_blank_endpoints(degrees, [n for layer, nodes in subnets if layer == 1
+                                                              for n in nodes], rng)
+
+        # connect_subnets and connect_blank_endpoints may join an edge that is still in the graph, either a removed
+        # edge that is joined again or an edge that was not removed. Neither is a change of the graph.
+        added = set(map(frozenset, added_edges))
+        removed_edges = [tuple(e) for e in removed - added]
+        added_edges = [tuple(e) for e in added if not self.graph.has_edge(*e)]
+        self.graph.remove_edges_from(removed_edges)
+        self.graph.add_edges_from(added_edges)
+        self.topology_delta = (removed_edges, added_edges)
+        self.topology_version += 1
+        return self.topology_delta
+
+    @staticmethod
+    def barabasi_albert_edges(total_nodes, m, offset, rng):
+        """
+        Generates the edges of a Barabasi-Albert random graph, following the same process as
+        nx.barabasi_albert_graph, without constructing a graph.
+
+        Parameters:
+            total_nodes:
+                the number of nodes of the graph
+            m:
+                the number of edges to attach from a new node to existing nodes
+            offset:
+                the node id of the first node, the nodes are numbered offset to offset + total_nodes - 1
+            rng:
+                the random stream to draw from
+
+        Returns:
+            a tuple of the source and target node arrays of the edges
+        """
+        targets = list(range(m))
+        repeated_nodes = []
+        sources, dests = [], []
+        for source in range(m, total_nodes):
+            sources.extend([source] * m)
+            dests.extend(targets)
+            repeated_nodes.extend(targets)
+            repeated_nodes.extend([source] * m)
+            # m distinct nodes chosen with probability proportional to their degree
+            chosen = set(rng.choices(repeated_nodes, k=m))
+            while len(chosen) < m:
+                chosen.add(rng.choice(repeated_nodes))
+            targets = list(chosen)
+        return np.array(sources, dtype=np.int64) + offset, np.array(dests, dtype=np.int64) + offset
+
+    def gen_pos(self):
+        """
+        Decides the position of every node for drawing the network.
+        Each subnet is placed with a spring layout and shifted by its layer and subnet index,
+        the exposed endpoints are spread evenly in the first column.
+        The spring layouts are taken from the subnet_layout cache, so subnets with the same structure as
+        a previously drawn subnet only have their offsets recomputed.
+        """
+        layer_subnets = self.get_unique_subnets()
+        max_subnet_in_layer = max(len(subnets) for subnets in layer_subnets.values())
+
+        pos = {}
+        min_y_pos = 200000
+        max_y_pos = -200000
+        for i in sorted(layer_subnets):
+            subnet_node_list = layer_subnets[i]
+            for j in sorted(subnet_node_list):
+                nodes = sorted(subnet_node_list[j])
+                if i == 0:
+                    subgraph_pos = {k: np.array([0, k]) for k in nodes}
+                else:
+                    # Setting some parameters to decide the position of nodes
+                    layer_distance = 1.5     # it will decide the distance between layers
+                    x_shift = i * layer_distance + i * 2.25
+                    y_shift = 2 * (j * 3 + 1.5 * (max_subnet_in_layer - len(subnet_node_list)))
+
+                    # The cache key numbers the nodes of the subnet from 0 in ascending node id order
+                    index = {n: k for k, n in enumerate(nodes)}
+                    edges = frozenset(
+                        (min(index[u], index[v]), max(index[u], index[v]))
+                        for u, v in self.graph.subgraph(nodes).edges()
+                    )
+                    layout = subnet_layout(len(nodes), edges)
+
+                    subgraph_pos = {}
+                    for k, n in enumerate(nodes):
+                        y = layout[k][1] + y_shift
+                        subgraph_pos[n] = np.array([layout[k][0] + x_shift, y])
+                        if y < min_y_pos:
+                            min_y_pos = y
+                        if y > max_y_pos:
+                            max_y_pos = y
+                # Stores all the positions of items from subgraphs
+                pos.update(subgraph_pos)
+
+        # Fix positions for endpoints
+        for n in range(self.total_endpoints):
+            position = (n + 1) / self.total_endpoints * (max_y_pos - min_y_pos) + min_y_pos
+            new_pos = {n: np.array([0, position])}
+            pos.update(new_pos)
+
+        # save the positions, the min_y_pos and max_y_pos
+        self._pos = pos
+        self._min_y_pos = min_y_pos
+        self._max_y_pos = max_y_pos
+
+    def _ensure_pos(self):
+        if self._pos is None and self.graph is not None:
+            self.gen_pos()
+
+    @property
+    def pos(self):
+        self._ensure_pos()
+        return self._pos
+
+    @pos.setter
+    def pos(self, pos):
+        self._pos = pos
+
+    @property
+    def min_y_pos(self):
+        self._ensure_pos()
+        return self._min_y_pos
+
+    @min_y_pos.setter
+    def min_y_pos(self, min_y_pos):
+        self._min_y_pos = min_y_pos
+
+    @property
+    def max_y_pos(self):
+        self._ensure_pos()
+        return self._max_y_pos
+
+    @max_y_pos.setter
+    def max_y_pos(self, max_y_pos):
+        self._max_y_pos = max_y_pos
+
     # def gen_graph(self, min_nodes_per_subnet=3, max_subnets_per_layer=5, subnet_m_ratio=0.2,
     #               prob_inter_layer_edge=0.4):
     #     """
@@ -543,14 +889,55 @@ class Network:
     def get_service_generator(self):
         return self.service_generator
 
+    def get_rng(self):
+        return self.rng
+
+    def get_address_allocator(self):
+        return self.address_allocator
+
     def get_hosts(self):
-        return dict(nx.get_node_attributes(self.graph, "host"))
+        return {host_id: host for host_id, host in enumerate(self._hosts) if host is not None}
 
     def get_subnets(self):
-        return dict(nx.get_node_attributes(self.graph, "subnet"))
+        return dict(enumerate(self._subnets))
 
     def get_layers(self):
-        return dict(nx.get_node_attributes(self.graph, "layer"))
+        return dict(enumerate(self._layers))
+
+    def get_subnet(self, host_id):
+        return self._subnets[host_id]
+
+    def get_layer(self, host_id):
+        return self._layers[host_id]
+
+    def set_host(self, host_id, host):
+        """
+        Places the Host instance on the node host_id, in the host registry and on the graph.
+        """
+        self._hosts[host_id] = host
+        self.graph.nodes[host_id]["host"] = host
+
+    def swap_hosts(self, host_id, other_host_id):
+        """
+        Swaps the Host instances on two nodes, updating the host ids of the instances.
+        """
+        host = self._hosts[host_id]
+        other_host = self._hosts[other_host_id]
+        host.host_id = other_host_id
+        other_host.host_id = host_id
+        self.set_host(host_id, other_host)
+        self.set_host(other_host_id, host)
+
+    def build_registry_from_graph(self):
+        """
+        Rebuilds the host registry from the node attributes of the graph, for graphs that were not generated
+        by gen_graph.
+        """
+        total_graph_nodes = max(self.graph.nodes) + 1
+        self._hosts = [self.graph.nodes[n].get("host") if n in self.graph else None for n in range(total_graph_nodes)]
+        self._layers = [self.graph.nodes[n].get("layer") if n in self.graph else None for n in range(total_graph_nodes)]
+        self._subnets = [self.graph.nodes[n].get("subnet") if n in self.graph else None
+                         for n in range(total_graph_nodes)]
 
     def get_graph(self):
         return self.graph
@@ -561,6 +948,9 @@ class Network:
     def get_pos(self):
         return self.pos
 
+    def get_topology_delta(self):
+        return self.topology_delta
+
     def get_colourmap(self):
         return self.colour_map
 
@@ -571,27 +961,28 @@ class Network:
         return self.network_type
 
     def get_unique_subnets(self):
-        subnets = self.get_subnets()
-        layers = self.get_layers()
-
         layer_subnets = {}
 
-        for host_id, subnet_id in subnets.items():
-            layer_id = layers[host_id]
+        for host_id, subnet_id in enumerate(self._subnets):
+            layer_id = self._layers[host_id]
 
             if not layer_id in layer_subnets:
                 layer_subnets[layer_id] = {}
 
-            layer_subnets[layer_id][subnet_id] = layer_subnets[layer_id].get(subnet_id, []) + [host_id]
+            layer_subnets[layer_id].setdefault(subnet_id, []).append(host_id)
 
         return layer_subnets
 
+    @property
+    def reachable(self):
+        return self.reachability.reachable
+
     def get_reachable(self):
         """
         Returns:
-            The reachable array
+            The set of reachable hosts
         """
-        return self.reachable
+        return self.reachability.reachable
 
     def get_node_per_layer(self):
         """
@@ -623,33 +1014,8 @@ class Network:
             ave_score: Score of each host added up, divided by the number of hosts
         """
         shortest_path = self.get_path_from_exposed(self.target_node, self.graph)[0]
-        vuln_list = []
-        total_score = 0
-        for host_id in shortest_path:
-            host = self.get_host(host_id)
-            service_id_list = host.get_path_from_exposed()
-            services = host.get_services_from_list(service_id_list)
-            not_unique_host_vulns = 0
-            total_host_vulns = 0
-
-            for service in services:
-                vulns = service.get_vulns()
-                total_host_vulns = len(vulns) + total_host_vulns
-
-                for vuln in vulns:
-                    if vuln not in vuln_list:
-                        vuln_list.append(vuln)
-                    else:
-                        not_unique_host_vulns = not_unique_host_vulns + 1
-            if total_host_vulns - not_unique_host_vulns == 0:
-                new_vuln_percent = 0
-            else:
-                new_vuln_percent = (total_host_vulns - not_unique_host_vulns) / total_host_vulns
-            total_score = total_score + new_vuln_percent
-        if len(shortest_path) > 0:
-            return total_score / len(shortest_path)
-        else:
-            return total_score
+        # Only the hosts whose path or vulnerabilities changed since the last score are scored again
+        return self._attack_path_exposure.score(self, shortest_path)
 
     def setup_users(self, user_to_nodes_ratio, prob_user_reuse_pass, users_per_host):
         """
@@ -670,9 +1036,9 @@ class Network:
 
         names = [x.decode() for x in pkg_resources.resource_string('mtdnetwork', "data/first-names.txt").splitlines()]
 
-        random_users = random.choices(names, k=self.total_users)
+        random_users = self.rng.topology.choices(names, k=self.total_users)
         self.users_list = [
-            (user, random.random() < prob_user_reuse_pass)
+            (user, self.rng.topology.random() < prob_user_reuse_pass)
             for user in random_users
         ]
 
@@ -680,68 +1046,25 @@ class Network:
 
     def update_reachable_mtd(self):
         """
-        Updates the Reachable array with only compromised nodes that are reachable after MTD
-        NOTE: Probably can be optimised for speed
-        """
-        self.reachable = self.exposed_endpoints.copy()
-        compromised_neighbour_nodes = []
-
-        # Appends all neighbouring hosts from endpoints
-        for endpoint in self.exposed_endpoints:
-            visible_hosts = list(self.graph.neighbors(endpoint))
-            for host in visible_hosts:
-                for c_host in self.compromised_hosts:
-                    if host == c_host:
-                        compromised_neighbour_nodes.append(host)
-                        self.reachable.append(host)
-
-        # Checks if neighbouring hosts of compromised node are also compromised, if so add them to the list
-        while len(compromised_neighbour_nodes) != 0:
-            appended_host = compromised_neighbour_nodes.pop(0)
-            visible_hosts = list(self.graph.neighbors(appended_host))
-            for host in visible_hosts:
-                for c_host in self.compromised_hosts:
-                    if host == c_host:
-                        if host not in self.reachable:
-                            compromised_neighbour_nodes.append(host)
-                            self.reachable.append(host)
-                        # repeated = False
-                        # for reachable in self.reachable:
-                        #     if reachable == host:
-                        #         repeated = True
-                        # if repeated == False:
-                        #     compromised_neighbour_nodes.append(host)
-                        #     self.reachable.append(host)
+        Updates the reachable hosts with only compromised nodes that are reachable after MTD.
+        Only the components of the compromised subgraph changed by the MTD are recomputed.
+        """
+        self.reachability.update_mtd(self.graph, self.compromised_hosts, self.topology_version,
+                                     self.topology_delta)
 
     def update_reachable_compromise(self, compromised_node_id, compromised_hosts):
         """
-        Updates the Reachable with the node_id of the compromised node
+        Updates the reachable hosts with the node_id of the compromised node
+        """
+        self.compromised_hosts = compromised_hosts
+        self.reachability.compromise(self.graph, compromised_node_id)
+
+    def update_reachable_recovery(self, recovered_node_id, compromised_hosts):
+        """
+        Updates the reachable hosts when the node_id is no longer compromised
         """
-        self.reachable.append(compromised_node_id)
-        appended_host = compromised_node_id
         self.compromised_hosts = compromised_hosts
-        all_reachable_hosts_added = False
-        compromised_neighbour_nodes = []
-
-        # Checks if neighbouring hosts of compromised node are also compromised, if so add them to the list
-        while all_reachable_hosts_added == False:
-            visible_hosts = list(self.graph.neighbors(appended_host))
-            for host in visible_hosts:
-                for c_host in compromised_hosts:
-                    if host == c_host:
-                        # repeated = False
-                        # for reachable in self.reachable:
-                        #     if reachable == host:
-                        #         repeated = True
-                        # if repeated == False:
-                        if host not in self.reachable:
-                            compromised_neighbour_nodes.append(host)
-                            self.reachable.append(host)
-
-            if len(compromised_neighbour_nodes) == 0:
-                all_reachable_hosts_added = True
-            else:
-                appended_host = compromised_neighbour_nodes.pop(0)
+        self.reachability.recover(self.graph, recovered_node_id)
 
     def get_host_id_priority(self, host_id):
         """
@@ -755,8 +1078,7 @@ class Network:
         """
         if host_id == self.target_node:
             return 0
-        layers = self.get_layers()
-        host_layer = layers.get(host_id)
+        host_layer = self.get_layer(host_id)
         priority = -1
         i = 0
         for tag in self.tag_priority:
@@ -810,29 +1132,80 @@ class Network:
         Returns:
             a tuple where the first element is the shortest path and the second element is the distance
         """
+        shortest_path = self.get_exposed_distance_index(graph).get_path(target_node)
+
+        # This function is used when the attacker can't find a path to host
+        if len(shortest_path) == 0:
+            return shortest_path, constants.LARGE_INT
+        return shortest_path, len(shortest_path)
+
+    def get_exposed_distance_index(self, graph=None):
+        """
+        Gets the distances and shortest paths from the exposed endpoints to every node of a graph.
+        The indexes of the network graph and of the hacker visible graph are cached until their epoch changes.
+
+        Parameters:
+            graph:
+                the graph to search, the network graph if None
+
+        Returns:
+            a DistanceIndex from the exposed endpoints
+        """
         if graph is None:
             graph = self.graph
+        name, epoch = self._get_graph_epoch(graph)
+        if name is None:
+            return DistanceIndex(graph, self.exposed_endpoints)
 
-        shortest_distance = constants.LARGE_INT
-        shortest_path = []
-
-        for ex_node in self.exposed_endpoints:
-            try:
-                path = nx.shortest_path(graph, ex_node, target_node)
-                path_len = len(path)
+        cached_epoch, index = self._distance_indexes.get(name, (None, None))
+        if cached_epoch != epoch:
+            index = DistanceIndex(graph, self.exposed_endpoints)
+            self._distance_indexes[name] = (epoch, index)
+        return index
 
-                if path_len < shortest_distance:
-                    shortest_distance = path_len
-                    shortest_path = path
-            except:
-                pass
+    def get_pivot_distance_index(self, pivot_host_id, graph=None):
+        """
+        Gets the distances from a pivot host to every node of a graph.
+        The indexes of the network graph and of the hacker visible graph are kept in a LRU cache
+        of NETWORK_PIVOT_DISTANCE_CACHE_SIZE indexes, until their epoch changes.
 
-        # This function is used when the attacker can't find a path to host
+        Parameters:
+            pivot_host_id:
+                the ID of the pivot host
+            graph:
+                the graph to search, the network graph if None
 
-        # if shortest_distance == constants.LARGE_INT:
-        #     raise exceptions.ActionBlockedError
+        Returns:
+            a DistanceIndex from the pivot host
+        """
+        if graph is None:
+            graph = self.graph
+        name, epoch = self._get_graph_epoch(graph)
+        if name is None:
+            return DistanceIndex(graph, [pivot_host_id])
+
+        key = (pivot_host_id, name, epoch)
+        index = self._pivot_distance_indexes.get(key)
+        if index is None:
+            index = DistanceIndex(graph, [pivot_host_id])
+            self._pivot_distance_indexes[key] = index
+            if len(self._pivot_distance_indexes) > constants.NETWORK_PIVOT_DISTANCE_CACHE_SIZE:
+                self._pivot_distance_indexes.popitem(last=False)
+        else:
+            self._pivot_distance_indexes.move_to_end(key)
+        return index
 
-        return shortest_path, shortest_distance
+    def _get_graph_epoch(self, graph):
+        """
+        Returns:
+            the name and epoch of the network graph or of the hacker visible graph,
+            (None, None) for any other graph since it cannot be cached
+        """
+        if graph is self.graph:
+            return "graph", self.topology_version
+        if graph is self._visible_graph:
+            return "visible", (self._visible_graph_epoch, self.topology_version)
+        return None, None
 
     def get_shortest_distance_from_exposed_or_pivot(self, host_id, pivot_host_id=-1, graph=None):
         if host_id in self.exposed_endpoints:
@@ -841,51 +1214,41 @@ class Network:
             graph = self.graph
         shortest_distance = self.get_path_from_exposed(host_id, graph=graph)[1]
         if pivot_host_id >= 0:
-            try:
-                path = nx.shortest_path(graph, host_id, pivot_host_id)
-                path_len = len(path)
-
-                if path_len < shortest_distance:
-                    shortest_distance = path_len
-            except:
-                pass
+            pivot_distance = self.get_pivot_distance_index(pivot_host_id, graph=graph).get_distance(host_id)
+            # The length of the path in number of hosts
+            if pivot_distance is not None and pivot_distance + 1 < shortest_distance:
+                shortest_distance = pivot_distance + 1
 
         return shortest_distance
 
-    def sort_by_distance_from_exposed_and_pivot_host(self, host_stack, compromised_hosts, pivot_host_id=-1):
+    def sort_host_stack(self, host_stack, pivot_host_id=-1):
         """
-        Sorts the Host Stack by the shortest number of hops to reach the target hosts.
+        Orders a HostStack by the shortest number of hops to reach the hosts from the exposed endpoints or the
+        pivot host: hosts at the same distance are popped at random and the exposed endpoints are popped last.
+        The hosts are only keyed again when the pivot host or the epoch of the network changes.
 
         Parameters:
             host_stack:
-                a list of host IDs the attacker wants to attack
-            compromised_hosts:
-                a list of host IDs the hacker has compromised
+                the HostStack of the hosts the attacker wants to attack
             pivot_host_id:
                 the ID of the host that is compromised that the hacker is using to pivot from.
-                if None then it only sorts by the exposed endpoints
+                if -1 then it only sorts by the exposed endpoints
         """
-
         visible_network = self.get_hacker_visible_graph()
+        exposed_endpoints = {host_id: rank for rank, host_id in enumerate(self.exposed_endpoints)}
 
-        non_exposed_endpoints = [
-            host_id
-            for host_id in host_stack
-            if not host_id in self.exposed_endpoints
-        ]
+        def get_key(host_id):
+            # The exposed endpoints are attacked last, in order
+            if host_id in exposed_endpoints:
+                return 1, exposed_endpoints[host_id]
+            distance = self.get_shortest_distance_from_exposed_or_pivot(host_id, pivot_host_id=pivot_host_id,
+                                                                         graph=visible_network)
+            # Unreachable hosts are not tied at random, they are attacked in the order they were pushed
+            if distance >= constants.LARGE_INT:
+                return 0, distance, host_stack.get_position(host_id)
+            return 0, distance
 
-        return sorted(
-            non_exposed_endpoints,
-            key=lambda host_id: self.get_shortest_distance_from_exposed_or_pivot(
-                host_id,
-                pivot_host_id=pivot_host_id,
-                graph=visible_network
-            ) + random.random()
-        ) + [
-                   host_id
-                   for host_id in self.exposed_endpoints
-                   if host_id in host_stack
-               ]
+        host_stack.reorder((pivot_host_id, self.get_epoch()), get_key)
 
     def get_neighbors(self, host_id):
         """
@@ -904,38 +1267,44 @@ class Network:
         """
         Using the generated graph, generates a host for each node on the graph.
         """
-        ip_addresses = []
+        topology_random = self.rng.topology
 
         for host_id in self.nodes:
-            node_os = Host.get_random_os()
-            node_os_version = Host.get_random_os_version(node_os)
-            node_ip = Host.get_random_address(existing_addresses=ip_addresses)
-            ip_addresses.append(node_ip)
-            self.graph.nodes[host_id]["host"] = Host(
+            node_os = Host.get_random_os(rng=topology_random)
+            node_os_version = Host.get_random_os_version(node_os, rng=topology_random)
+            node_ip = self.address_allocator.allocate(topology_random)
+            self.set_host(host_id, Host(
                 node_os,
                 node_os_version,
                 host_id,
                 node_ip,
-                random.choices(self.users_list, k=self.users_per_host),
+                topology_random.choices(self.users_list, k=self.users_per_host),
                 self,
-                self.service_generator
-            )
+                self.service_generator,
+                rng=self.rng
+            ))
 
-    def get_hacker_visible_graph(self):
+    def get_epoch(self):
         """
-        Returns the Network graph that is visible to the hacker depending on the hosts that have already been compromised
-
+        Returns:
+            the epoch of the topology and of the reachable hosts. It changes every time the graph is changed,
+            a host is compromised or recovered or an MTD updates the reachable hosts, so views of the network
+            cached with it are valid as long as it is unchanged.
         """
-        visible_hosts = []
-        for c_host in self.reachable:
-            visible_hosts = visible_hosts + list(self.graph.neighbors(c_host))
-
-        visible_hosts = visible_hosts + self.reachable
-        visible_hosts = visible_hosts + self.exposed_endpoints
+        return self.topology_version, self.reachability.epoch
 
-        return self.graph.subgraph(
-            list(set(visible_hosts))
-        )
+    def get_hacker_visible_graph(self):
+        """
+        Returns the Network graph that is visible to the hacker depending on the hosts that have already been compromised.
+        The read-only subgraph view is cached until the epoch changes.
+        """
+        epoch = self.get_epoch()
+        if self._visible_graph_epoch != epoch:
+            visible_hosts = set(self.reachability.get_visible())
+            visible_hosts.update(self.exposed_endpoints)
+            self._visible_graph = self.graph.subgraph(visible_hosts)
+            self._visible_graph_epoch = epoch
+        return self._visible_graph
 
     def get_host(self, host_id):
         """
@@ -948,7 +1317,9 @@ class Network:
             the corresponding Host instance
         """
 
-        return self.graph.nodes.get(host_id, {}).get("host", None)
+        if isinstance(host_id, (int, np.integer)) and 0 <= host_id < len(self._hosts):
+            return self._hosts[host_id]
+        return None
 
     def get_total_vulns(self):
         return self.total_vulns
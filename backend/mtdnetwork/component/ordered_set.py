@@ -0,0 +1,78 @@
+class OrderedSet:
+
+    def __init__(self, items=()):
+        """
+        A set that remembers the order its items were added in, used for the compromised hosts and users.
+
+        The items are kept in a list with the position of every item in a dict, so adding, removing, checking
+        and swapping items is O(1). Removed items leave a hole in the list, which is compacted once half of the
+        list is holes. The sorted items are cached until the set changes.
+
+        Parameters:
+            items:
+                the initial items, in order. None cannot be an item.
+        """
+        self._items = []
+        self._positions = {}
+        self._sorted = None
+        self.update(items)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __iter__(self):
+        return (item for item in self._items if item is not None)
+
+    def __repr__(self):
+        return "OrderedSet({})".format(list(self))
+
+    def add(self, item):
+        if item in self._positions:
+            return
+        self._positions[item] = len(self._items)
+        self._items.append(item)
+        self._sorted = None
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def remove(self, item):
+        position = self._positions.pop(item)
+        self._items[position] = None
+        self._sorted = None
+        if len(self._items) > 2 * len(self._positions):
+            self._items = list(self)
+            self._positions = {item: position for position, item in enumerate(self._items)}
+
+    def discard(self, item):
+        if item in self._positions:
+            self.remove(item)
+
+    def swap(self, item, other_item):
+        """
+        Swaps two items, so each item takes the place of the other. If only one of them is in the set,
+        it is replaced by the other one.
+        """
+        position = self._positions.pop(item, None)
+        other_position = self._positions.pop(other_item, None)
+        if position is not None:
+            self._items[position] = other_item
+            self._positions[other_item] = position
+        if other_position is not None:
+            self._items[other_position] = item
+            self._positions[item] = other_position
+        if (position is None) != (other_position is None):
+            self._sorted = None
+
+    def get_sorted(self):
+        """
+        Returns:
+            a sorted list of the items, cached until the set changes. Must not be modified.
+        """
+        if self._sorted is None:
+            self._sorted = sorted(self._positions)
+        return self._sorted
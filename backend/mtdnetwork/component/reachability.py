@@ -0,0 +1,240 @@
+class Reachability:
+
+    def __init__(self, exposed_endpoints):
+        """
+        Tracks the hosts of a network that are reachable by the adversary.
+
+        The compromised hosts are kept in a disjoint-set forest of the components of the compromised subgraph.
+        A component is reachable if it contains a compromised host that was reached by the adversary or, after
+        an MTD, if it is anchored: one of its hosts is an exposed endpoint or a neighbour of an exposed endpoint.
+        Compromising a host merges the components of its compromised neighbours, and a recovered host or a
+        rewired edge only dissolves and recomputes the components it belonged to.
+
+        The hosts visible to the adversary, the reachable hosts and their neighbours, are counted incrementally
+        with the number of reachable hosts they are seen from. The epoch is incremented every time the reachable
+        or visible hosts change, so views derived from them can be cached until the next change.
+
+        Parameters:
+            exposed_endpoints:
+                the node ids of the exposed endpoints of the network
+        """
+        self.exposed_endpoints = frozenset(exposed_endpoints)
+        self.reachable = set()
+        # The number of reachable hosts every visible host is seen from, including itself
+        self.visible = {}
+        self.epoch = 0
+        # The Network.topology_version of the graph the components were last computed on
+        self.topology_version = None
+        # Whether the exposed endpoints are reachable, they are only added by the first MTD
+        self.exposed_visible = False
+        self._parent = {}
+        self._members = {}
+        self._reachable_roots = set()
+        self._anchored_roots = set()
+
+    def find(self, node):
+        """
+        Returns:
+            the root of the component of a compromised node
+        """
+        root = node
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[node] != root:
+            self._parent[node], node = root, self._parent[node]
+        return root
+
+    def is_compromised(self, node):
+        return node in self._parent
+
+    def get_compromised(self):
+        return self._parent.keys()
+
+    def get_component(self, node):
+        """
+        Returns:
+            the compromised nodes connected to a compromised node through compromised nodes
+        """
+        return self._members[self.find(node)]
+
+    def get_visible(self):
+        """
+        Returns:
+            the hosts seen from the reachable hosts, without the exposed endpoints that are not reachable yet
+        """
+        return self.visible.keys()
+
+    def is_anchored(self, graph, node):
+        return node in self.exposed_endpoints or not self.exposed_endpoints.isdisjoint(graph.neighbors(node))
+
+    def _union(self, root, other_root):
+        if len(self._members[root]) < len(self._members[other_root]):
+            root, other_root = other_root, root
+        self._parent[other_root] = root
+        self._members[root].extend(self._members.pop(other_root))
+        if other_root in self._anchored_roots:
+            self._anchored_roots.discard(other_root)
+            self._anchored_roots.add(root)
+        if other_root in self._reachable_roots:
+            self._reachable_roots.discard(other_root)
+            self._reachable_roots.add(root)
+        return root
+
+    def _see(self, node, count):
+        seen_count = self.visible.get(node, 0) + count
+        if seen_count == 0:
+            del self.visible[node]
+        else:
+            self.visible[node] = seen_count
+
+    def _add_reachable(self, graph, nodes):
+        for node in nodes:
+            if node in self.reachable:
+                continue
+            self.reachable.add(node)
+            self._see(node, 1)
+            for neighbor in graph.neighbors(node):
+                self._see(neighbor, 1)
+        self.epoch += 1
+
+    def _remove_reachable(self, graph, nodes):
+        for node in nodes:
+            if node not in self.reachable:
+                continue
+            self.reachable.discard(node)
+            self._see(node, -1)
+            for neighbor in graph.neighbors(node):
+                self._see(neighbor, -1)
+        self.epoch += 1
+
+    def _set_reachable(self, graph, root):
+        if root not in self._reachable_roots:
+            self._reachable_roots.add(root)
+            self._add_reachable(graph, self._members[root])
+
+    def compromise(self, graph, node):
+        """
+        Adds a compromised node, which becomes reachable with every compromised node connected to it.
+        """
+        if node in self._parent:
+            self._set_reachable(graph, self.find(node))
+            return
+        self._parent[node] = node
+        self._members[node] = [node]
+        root = node
+        if self.is_anchored(graph, node):
+            self._anchored_roots.add(node)
+        for neighbor in graph.neighbors(node):
+            if neighbor in self._parent:
+                # The neighbouring component is reachable from now on
+                neighbor_root = self.find(neighbor)
+                if neighbor_root != root:
+                    self._set_reachable(graph, neighbor_root)
+                    root = self._union(root, neighbor_root)
+        self._reachable_roots.add(root)
+        self._add_reachable(graph, [node])
+
+    def _dissolve(self, graph, roots):
+        """
+        Removes the components of the roots.
+
+        Returns:
+            the nodes of the removed components
+        """
+        nodes = []
+        for root in roots:
+            members = self._members.pop(root)
+            nodes.extend(members)
+            self._reachable_roots.discard(root)
+            self._anchored_roots.discard(root)
+            for member in members:
+                del self._parent[member]
+        if self.exposed_visible:
+            self._remove_reachable(graph, [node for node in nodes if node not in self.exposed_endpoints])
+        else:
+            self._remove_reachable(graph, nodes)
+        return nodes
+
+    def _rebuild(self, graph, nodes):
+        """
+        Recomputes the components of compromised nodes that are not in a component, from the current graph.
+        Only the anchored components are reachable.
+        """
+        nodes = set(nodes)
+        for node in nodes:
+            if node in self._parent:
+                continue
+            self._parent[node] = node
+            members = [node]
+            anchored = False
+            for member in members:
+                anchored = anchored or self.is_anchored(graph, member)
+                for neighbor in graph.neighbors(member):
+                    if neighbor in nodes and neighbor not in self._parent:
+                        self._parent[neighbor] = node
+                        members.append(neighbor)
+            self._members[node] = members
+            if anchored:
+                self._anchored_roots.add(node)
+                self._set_reachable(graph, node)
+
+    def recover(self, graph, node):
+        """
+        Removes a node that is no longer compromised. Its component is split and every part only stays
+        reachable if it is anchored.
+        """
+        if node not in self._parent:
+            return
+        nodes = self._dissolve(graph, [self.find(node)])
+        nodes.remove(node)
+        self._rebuild(graph, nodes)
+
+    def update_mtd(self, graph, compromised_hosts, topology_version, topology_delta=None):
+        """
+        Recomputes the reachable nodes after an MTD, from the exposed endpoints.
+
+        Parameters:
+            graph:
+                the network graph after the MTD
+            compromised_hosts:
+                the compromised nodes after the MTD
+            topology_version:
+                the version of the graph, see Network.topology_version
+            topology_delta:
+                the (removed edges, added edges) that changed the previous version of the graph into this one,
+                if they are known. Only the components with a node on a changed edge are then recomputed.
+        """
+        compromised_hosts = set(compromised_hosts)
+        previous_version = self.topology_version
+        self.topology_version = topology_version
+        if previous_version == topology_version:
+            topology_delta = ([], [])
+        elif previous_version is None or previous_version != topology_version - 1:
+            topology_delta = None
+        if topology_delta is None or not self.exposed_visible or compromised_hosts != self._parent.keys():
+            self._parent = {}
+            self._members = {}
+            self._reachable_roots = set()
+            self._anchored_roots = set()
+            self.exposed_visible = True
+            self.reachable = set()
+            self.visible = {}
+            self._add_reachable(graph, self.exposed_endpoints)
+            self._rebuild(graph, compromised_hosts)
+            return
+
+        removed_edges, added_edges = topology_delta
+        # The hosts seen through the changed edges
+        for edges, count in ((removed_edges, -1), (added_edges, 1)):
+            for u, v in edges:
+                if u in self.reachable:
+                    self._see(v, count)
+                if v in self.reachable:
+                    self._see(u, count)
+        self.epoch += 1
+        roots = self._reachable_roots - self._anchored_roots
+        for u, v in removed_edges + added_edges:
+            for node in (u, v):
+                if node in self._parent:
+                    roots.add(self.find(node))
+        self._rebuild(graph, self._dissolve(graph, roots))
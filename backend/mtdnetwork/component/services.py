@@ -1,47 +1,285 @@
-import random, logging
+import collections
+import hashlib
+import threading
+import numpy as np
 import mtdnetwork.data.constants as constants
+from mtdnetwork.component.simulation_random import SimulationRandom
+from mtdnetwork.snapshot.service_catalog_snapshot import ServiceCatalogSnapshot
 import pkg_resources
 import uuid
 
 
-class Vulnerability:
-    def __init__(self, can_have_os_dependency=False, os_list=[]):
-        """
-        Creates a vulnerability that is assigned to a set of versions for a service.
+class VulnerabilityTable:
 
-        complexity: if set to 1 then the vulnerability is trivial to exploit, 0 for being impossible
-        impact: if 1 then exploiting the vulnerability is the most severe, 0 for not doing anything
+    def __init__(self):
+        """
+        The vulnerabilities of a ServiceCatalog, stored as NumPy columns with a row per vulnerability.
+        The row of a vulnerability is its id, and vulnerabilities are equal if they have the same table id and row,
+        so vulnerabilities of different catalogs are never equal.
+
+        The rows are added with `add` while the catalog is generated, and the columns are built by `freeze`.
+        The exploited state of the vulnerabilities is kept per network in a VulnerabilityState, and Vulnerability
+        instances are views of a row of the table and of a state.
+
+        Columns:
+            complexity:
+                if set to 1 then the vulnerability is trivial to exploit, 0 for being impossible
+            impact:
+                if 10 then exploiting the vulnerability is the most severe, 0 for not doing anything
+            cvss:
+                the mean of the complexity and the impact
+            has_os_dependency:
+                if True the vulnerability takes longer to exploit on the OS types that are not in its OS mask
+            os_mask:
+                a bit for every OS type of os_types the vulnerability is on
+            has_dependent_vulns:
+                if True the vulnerability can only be exploited with another vulnerability with the same dependency id
+            dependent_vuln_id:
+                the dependency id of the vulnerability
+        """
+        self.id = str(uuid.uuid4())
+        self.os_types = list(constants.OS_TYPES)
+        self.os_index = {os_type: index for index, os_type in enumerate(self.os_types)}
+        self._rows = []
+        self.complexity = None
+        self.impact = None
+        self.cvss = None
+        self.has_os_dependency = None
+        self.os_mask = None
+        self.has_dependent_vulns = None
+        self.dependent_vuln_id = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, can_have_os_dependency=False, os_list=[], rng=None):
+        """
+        Generates a vulnerability that is assigned to a set of versions for a service.
 
         Parameters:
             can_have_os_dependency:
                 if True it means that the vulnerability does have the possibility that it can only be exploited if it is on a particular operating system
             os_list:
                 a list of operating systems that the vulnerability can be on (depends on the service)
+            rng:
+                the SimulationRandom instance to draw from, only its services stream is used
+
+        Returns:
+            the row of the vulnerability
         """
+        services_random = rng.services
         # 1 for easy, 0 for impossible
         # Change to fit distributions
-        self.complexity = constants.VULN_MIN_COMPLEXITY + (1 - constants.VULN_MIN_COMPLEXITY) * random.random()
+        complexity = constants.VULN_MIN_COMPLEXITY + (1 - constants.VULN_MIN_COMPLEXITY) * services_random.random()
         # 1 for complete compromise
         # 0 for nothing
-        self.impact = random.random() * 10
-        self.cvss = (self.complexity + self.impact) / 2
-        self.exploitability = self.cvss/5.5
-        self.exploit_attempt = 0
-        self.exploited = False
-        self.has_os_dependency = False
-        self.vuln_os_list = []
-        self.has_dependent_vulns = random.random() < constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS
-        self.dependent_vuln_id = random.choice(
+        impact = services_random.random() * 10
+        has_os_dependency = False
+        os_mask = 0
+        has_dependent_vulns = services_random.random() < constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS
+        dependent_vuln_id = services_random.choice(
             [x for x in range(0, 101, int(100 * constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS))])
-        self.dependent_vulns = []
-
-        self.id = str(uuid.uuid4())
-        self.logger = logging.getLogger("vuln-{}".format(self.id))
         if can_have_os_dependency and len(os_list) > 1:
-            if random.random() < constants.VULN_PROB_DEPENDS_ON_OS:
-                self.has_os_dependency = True
-                self.vuln_os_list = random.sample(os_list, k=random.randint(1, len(os_list) - 1))
-                # self.vuln_os_list = random.sample(os_list, k=random.randint(1, 2))
+            if services_random.random() < constants.VULN_PROB_DEPENDS_ON_OS:
+                has_os_dependency = True
+                for os_type in services_random.sample(os_list, k=services_random.randint(1, len(os_list) - 1)):
+                    os_mask |= 1 << self.os_index[os_type]
+        self._rows.append((complexity, impact, has_os_dependency, os_mask, has_dependent_vulns, dependent_vuln_id))
+        return len(self._rows) - 1
+
+    def freeze(self):
+        """
+        Builds the columns from the added rows.
+        """
+        columns = list(zip(*self._rows)) if self._rows else [()] * 6
+        self.complexity = np.array(columns[0], dtype=np.float64)
+        self.impact = np.array(columns[1], dtype=np.float64)
+        self.cvss = (self.complexity + self.impact) / 2
+        self.has_os_dependency = np.array(columns[2], dtype=bool)
+        self.os_mask = np.array(columns[3], dtype=np.int64)
+        self.has_dependent_vulns = np.array(columns[4], dtype=bool)
+        self.dependent_vuln_id = np.array(columns[5], dtype=np.int64)
+
+    def is_on_os(self, rows, os_type):
+        """
+        Returns:
+            a boolean array, True for the rows whose OS mask has the OS type
+        """
+        if os_type not in self.os_index:
+            return np.zeros(np.shape(rows), dtype=bool)
+        return (self.os_mask[rows] >> self.os_index[os_type]) & 1 == 1
+
+    def get_os_list(self, row):
+        return [os_type for index, os_type in enumerate(self.os_types) if self.os_mask[row] >> index & 1]
+
+
+class VulnerabilityState:
+
+    def __init__(self, table):
+        """
+        The exploited state of the vulnerabilities of a VulnerabilityTable in one network, as NumPy columns
+        with a row per vulnerability of the table.
+
+        The methods work on arrays of rows at once, and Vulnerability calls them with its row.
+
+        Parameters:
+            table:
+                the VulnerabilityTable of the vulnerabilities
+        """
+        self.table = table
+        self.exploited = np.zeros(len(table), dtype=bool)
+        self.exploit_attempt = np.zeros(len(table), dtype=np.int64)
+        self.exploitability = table.cvss / 5.5
+        # The row of every change of the exploited state, in order
+        self.changed_rows = []
+
+    @property
+    def epoch(self):
+        """
+        The number of changes of the exploited state, so caches of the exploited vulnerabilities and services of
+        the network can be checked in O(1) and only update the rows changed since
+        """
+        return len(self.changed_rows)
+
+    def set_exploited(self, row, exploited):
+        if exploited != self.exploited[row]:
+            self.exploited[row] = exploited
+            self.changed_rows.append(row)
+
+    def get_changed_rows(self, epoch):
+        """
+        Returns:
+            the rows whose exploited state changed since the epoch, in order
+        """
+        return self.changed_rows[epoch:]
+
+    def exploit_time(self, rows, os_type=None):
+        """
+        Returns:
+            the time it would take to exploit the rows on a host of the OS type, halved for the exploited rows.
+            The rows with an OS dependency take longer on the OS types they are not on, unless os_type is None.
+        """
+        table = self.table
+        exp_time = constants.ATTACK_DURATION['EXPLOIT_VULN'] * (1 - table.complexity[rows])
+        if os_type is not None:
+            off_os = table.has_os_dependency[rows] & ~table.is_on_os(rows, os_type)
+            exp_time = np.where(off_os, exp_time * 2.5, exp_time)
+        return np.where(self.exploited[rows], exp_time / 2, exp_time)
+
+    def roa(self, rows):
+        """
+        Returns:
+            the pseudo return on attack of the rows, see Vulnerability.roa
+        """
+        return (self.table.complexity[rows] * self.table.impact[rows]) / self.exploit_time(rows)
+
+    def network(self, rows, rng):
+        """
+        Tries to exploit distinct rows, drawing once from the attack stream for every row that is not exploited
+        yet, in the order of the rows.
+
+        Returns:
+            the impact of the rows that are exploited, otherwise 0.0
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        attempted = rows[~self.exploited[rows]]
+        draws = np.array([rng.attack.random() for _row in attempted], dtype=np.float64)
+        self.exploit_attempt[attempted] += 1
+        for row in attempted[draws < self.table.complexity[attempted]]:
+            self.set_exploited(int(row), True)
+        return np.where(self.exploited[rows], self.table.impact[rows], 0.0)
+
+
+class Vulnerability:
+    # Views are created for every service of every host, so they only keep the row and read the table on demand
+    __slots__ = ('table', 'row', 'state', 'rng')
+
+    def __init__(self, table, row, state, rng=None):
+        """
+        A vulnerability that is assigned to a set of versions for a service, as a view of a row of a
+        VulnerabilityTable and of the row in the VulnerabilityState of a network.
+
+        complexity: if set to 1 then the vulnerability is trivial to exploit, 0 for being impossible
+        impact: if 10 then exploiting the vulnerability is the most severe, 0 for not doing anything
+
+        Parameters:
+            table:
+                the VulnerabilityTable of the vulnerability
+            row:
+                the row of the vulnerability in the table, which is also its id
+            state:
+                the VulnerabilityState the vulnerability is exploited in
+            rng:
+                the SimulationRandom instance of the simulation, the vulnerability is exploited with the attack stream.
+                None for the vulnerabilities of a catalog, which are never exploited.
+        """
+        self.table = table
+        self.row = row
+        self.state = state
+        self.rng = rng
+
+    @property
+    def id(self):
+        return self.row
+
+    @property
+    def complexity(self):
+        return float(self.table.complexity[self.row])
+
+    @property
+    def impact(self):
+        return float(self.table.impact[self.row])
+
+    @property
+    def cvss(self):
+        return float(self.table.cvss[self.row])
+
+    @property
+    def has_os_dependency(self):
+        return bool(self.table.has_os_dependency[self.row])
+
+    @property
+    def has_dependent_vulns(self):
+        return bool(self.table.has_dependent_vulns[self.row])
+
+    @property
+    def dependent_vuln_id(self):
+        return int(self.table.dependent_vuln_id[self.row])
+
+    @property
+    def exploited(self):
+        return bool(self.state.exploited[self.row])
+
+    @exploited.setter
+    def exploited(self, exploited):
+        self.state.set_exploited(self.row, exploited)
+
+    @property
+    def exploit_attempt(self):
+        return int(self.state.exploit_attempt[self.row])
+
+    @exploit_attempt.setter
+    def exploit_attempt(self, exploit_attempt):
+        self.state.exploit_attempt[self.row] = exploit_attempt
+
+    @property
+    def exploitability(self):
+        return float(self.state.exploitability[self.row])
+
+    @exploitability.setter
+    def exploitability(self, exploitability):
+        self.state.exploitability[self.row] = exploitability
+
+    @property
+    def vuln_os_list(self):
+        return self.table.get_os_list(self.row)
+
+    def copy(self, rng, state):
+        """
+        Returns:
+            a view of the same row in another state, exploited with the attack stream of rng
+        """
+        return Vulnerability(self.table, self.row, state, rng)
 
     def is_exploited(self):
         return self.exploited
@@ -74,12 +312,8 @@ class Vulnerability:
             the more attempts a hacker tries at exploiting a particular vulnerability the faster the exploit time becomes
 
         """
-        exp_time = constants.ATTACK_DURATION['EXPLOIT_VULN'] * (1 - self.complexity)
-        if self.has_os_dependency and host is not None and host.os_type not in self.vuln_os_list:
-            exp_time *= 2.5
-        if self.exploited:
-            return exp_time / 2
-        return exp_time
+        os_type = host.os_type if host is not None else None
+        return float(self.state.exploit_time(self.row, os_type))
         # return constants.VULN_MIN_EXPLOIT_TIME + (constants.VULN_MAX_EXPLOIT_TIME -
         # constants.VULN_MIN_EXPLOIT_TIME) * ( 1 - self.complexity) / ( self.exploit_attempt + 1)
 
@@ -94,19 +328,10 @@ class Vulnerability:
         Returns:
             the impact score if successfully exploited, otherwise 0.0
         """
-        if self.exploited:
-            return self.impact
-
         # if self.has_os_dependency and host is not None:
         #     if host.os_type not in self.vuln_os_list:
         #         return 0.0
-        self.exploit_attempt += 1
-        if random.random() < self.complexity:
-            self.exploited = True
-            # if self.has_os_dependency:
-            #     self.logger.info("OS DEPENDENT VULNERABILITY EXPLOITED!")
-            return self.impact
-        return 0.0
+        return float(self.state.network(self.row, self.rng)[0])
 
     # def network(self, host=None):
     #     """
@@ -138,7 +363,7 @@ class Vulnerability:
         
         The x100 is because impact is expressed as a value 1-10 on CVE
         """
-        return (self.complexity * self.impact) / self.exploit_time()
+        return float(self.state.roa(self.row))
 
     def initial_roa(self):
         return (self.complexity * self.impact) / (constants.VULN_MIN_EXPLOIT_TIME +
@@ -146,13 +371,19 @@ class Vulnerability:
                                                           constants.VULN_MAX_EXPLOIT_TIME - constants.VULN_MIN_EXPLOIT_TIME) * (
                                                           1 - self.complexity))
 
+    def is_on_os(self, os_type):
+        return bool(self.table.is_on_os(self.row, os_type))
+
     def __eq__(self, other):
         """
         Checks if two instances a Vulnerability are equal
         """
         if not isinstance(other, Vulnerability):
             return False
-        return other.id == self.id
+        return other.row == self.row and other.table.id == self.table.id
+
+    def __hash__(self):
+        return hash((self.table.id, self.row))
 
 
 class Service:
@@ -161,19 +392,59 @@ class Service:
         """
         Creates a Service instance that are assigned to Hosts
 
+        The RoA of every vulnerability while it is not exploited is computed once, and the exploited
+        vulnerabilities are kept as a mask with the sum of their impact, updated from the vulnerabilities exploited
+        since (see VulnerabilityState.epoch). So the top unexploited vulnerabilities are found in O(k) and checking if
+        the service is exploited is O(1) between exploits.
+
         Parameters:
             service_name:
                 the name of the service
             service_version:
                 the version of the service
             vulnerabilities:
-                a list of the vulnerabilities that are on the service
+                a list of the vulnerabilities that are on the service, exploited in the same VulnerabilityState
         """
         self.name = service_name
         self.version = service_version
-        self.vulnerabilities = sorted(vulnerabilities, key=lambda v: v.roa(), reverse=True)
+        self._state = vulnerabilities[0].state if vulnerabilities else None
+        roas = self._state.roa([v.row for v in vulnerabilities]).tolist() if vulnerabilities else []
+        order = sorted(range(len(vulnerabilities)), key=roas.__getitem__, reverse=True)
+        self.vulnerabilities = [vulnerabilities[index] for index in order]
         self.exploit_value = 0.0
         self.id = str(uuid.uuid4())
+        # The RoA of the vulnerabilities, in the order of self.vulnerabilities. It is only read while a
+        # vulnerability is not exploited, and vulnerabilities are never unexploited
+        self._roas = [roas[index] for index in order]
+        # The position of every row in self.vulnerabilities
+        self._positions = {v.row: position for position, v in enumerate(self.vulnerabilities)}
+        # The exploited mask of the vulnerabilities and the VulnerabilityState.epoch it was read at
+        self._exploited = [False] * len(self.vulnerabilities)
+        self._exploit_epoch = None
+
+    def _update_exploited(self):
+        state = self._state
+        if state is None or self._exploit_epoch == state.epoch:
+            return
+        if self._exploit_epoch is None or state.epoch - self._exploit_epoch > len(self._positions):
+            positions = range(len(self.vulnerabilities))
+        else:
+            positions = [self._positions[row] for row in state.get_changed_rows(self._exploit_epoch)
+                         if row in self._positions]
+        self._exploit_epoch = state.epoch
+        changed = False
+        for position in positions:
+            exploited = bool(state.exploited[self.vulnerabilities[position].row])
+            if exploited != self._exploited[position]:
+                self._exploited[position] = exploited
+                changed = True
+        if not changed:
+            return
+        # Summed in the order of the vulnerabilities, so the sum does not depend on the order they were exploited
+        self.exploit_value = 0
+        for vuln, exploited in zip(self.vulnerabilities, self._exploited):
+            if exploited:
+                self.exploit_value += vuln.impact
 
     def copy(self):
         """
@@ -187,11 +458,14 @@ class Service:
         Returns:
             the top X vulnerabilities in terms of RoA of the service that have not been exploited yet
         """
-        return [
-                   v
-                   for v in self.vulnerabilities
-                   if v.roa() > roa_threshold and not v.is_exploited()
-               ][:constants.SERVICE_TOP_X_VULNS_TO_RETURN]
+        self._update_exploited()
+        vulns = []
+        for vuln, roa, exploited in zip(self.vulnerabilities, self._roas, self._exploited):
+            if roa > roa_threshold and not exploited:
+                vulns.append(vuln)
+                if len(vulns) == constants.SERVICE_TOP_X_VULNS_TO_RETURN:
+                    break
+        return vulns
 
     def get_all_vulns(self):
         return self.vulnerabilities
@@ -200,20 +474,17 @@ class Service:
         return self.id
 
     def is_exploited(self):
-        self.exploit_value = 0
-        for vuln in self.vulnerabilities:
-            if vuln.exploited:
-                self.exploit_value += vuln.impact
+        self._update_exploited()
         return self.exploit_value > constants.SERVICE_COMPROMISED_THRESHOLD
 
     def discover_vuln_time(self, roa_threshold=0):
         return len(self.get_vulns(roa_threshold=roa_threshold)) * constants.SERVICE_DISCOVER_EACH_VULN_TIME
 
     def get_highest_roa_vuln(self):
-        vuln_len = len(self.get_vulns())
-        if vuln_len < 1:
+        vulns = self.get_vulns()
+        if len(vulns) < 1:
             return 0.0
-        return self.get_vulns()[0].roa()
+        return vulns[0].roa()
 
     def __eq__(self, other):
         if not isinstance(other, Service):
@@ -221,99 +492,95 @@ class Service:
         return other.name == self.name and other.version == self.version
 
 
-class ServicesGenerator:
+class ServiceVersions:
 
-    def __init__(self,
-                 services_per_os=constants.SERVICE_NO_OF_SERVICES_PER_OS,
-                 percent_cross_platform=constants.VULN_PERCENT_CROSS_PLATFORM,
-                 max_vuln_probability=constants.VULN_MAX_PROB_FOR_OCCURING_FOR_SERVICE_VERSION,
-                 vuln_patch_mean=constants.VULN_PATCH_MEAN,
-                 vuln_patch_range=constants.VULN_PATCH_RANGE,
-                 vuln_initial_chances=constants.VULN_INITIAL_CHANCES,
-                 os_dependent_vuln_chance=constants.VULN_PROB_DEPENDS_ON_OS,
-                 dependent_vuln_chance=constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS):
+    def __init__(self, name, versions, vulns, version_range=None, services=None):
         """
-        Used to generator services for the simulation
+        The versions of a service, as a read-only sequence of Service instances.
+
+        Every vulnerability is active in an interval of versions, from the first version up to the version index
+        it is patched after, so the vulnerabilities are stored once for all the versions. The Service of a version
+        is only created when it is first accessed, and slices are views that share the created services.
 
         Parameters:
-            services_per_os:
-                the number of the services for each OS
-            percent_cross_platform:
-                percent of services that avaliable across all platforms
-            max_vuln_probability:
-                the maximum probability for older versions of service having a vulnerability
-            vuln_patch_mean:
-                thae number of versions on average it takes for a vulnerability to be ptched
-            vuln_patch_range:
-                the range from the vuln_patch_mean
-            vuln_initial_chances:
-                for the first version of a service it iterates vuln_initial_chances testing if the first service gets a new vulnerability
-            os_dependent_vuln_chance (Unused):
-                the probability of a vulnerability being only enabled on specific OS (if the service is available across platforms)
-            dependent_vuln_chance (Unused):
-                the chance that a vulnerability can only be exploited if there is another particular type vulnerability that can also be exploited
+            name:
+                the name of the service
+            versions:
+                the versions of the service
+            vulns:
+                a list of (index of the last version the vulnerability is active in, Vulnerability),
+                in the order the vulnerabilities were generated
+            version_range:
+                the range of version indexes in the view, all the versions if None
+            services:
+                the services already created for the version indexes, shared between views
         """
+        self.name = name
+        self.versions = versions
+        # Sorted by RoA once, so the vulnerabilities of every version are in the order of Service.vulnerabilities
+        if vulns:
+            roas = vulns[0][1].state.roa([vuln.row for _last_index, vuln in vulns]).tolist()
+            vulns = [vulns[index] for index in sorted(range(len(vulns)), key=roas.__getitem__, reverse=True)]
+        self._vulns = vulns
+        self._range = range(len(versions)) if version_range is None else version_range
+        self._services = {} if services is None else services
+
+    def _get_service(self, version_index):
+        service = self._services.get(version_index)
+        if service is None:
+            active_vulns = [vuln for last_index, vuln in self._vulns if last_index >= version_index]
+            service = self._services[version_index] = Service(self.name, self.versions[version_index], active_vulns)
+        return service
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ServiceVersions(self.name, self.versions, self._vulns, self._range[index], self._services)
+        return self._get_service(self._range[index])
+
+    def __iter__(self):
+        for version_index in self._range:
+            yield self._get_service(version_index)
+
+
+class ServiceCatalog:
+    # Bump when the pickled layout of the catalog changes, saved catalogs of other versions are not loaded
+    FORMAT_VERSION = 7
+
+    def __init__(self, rng, services_per_os, percent_cross_platform, max_vuln_probability, vuln_patch_range,
+                 vuln_initial_chances):
+        """
+        The services and vulnerabilities for each OS type and version, generated once and shared read-only by every
+        network with the same parameters and services stream state (see get_service_catalog).
+
+        The services of the catalog are never given to hosts and its vulnerabilities are never exploited, the
+        ServicesGenerator of every network copies them with their own exploited state.
+
+        Parameters:
+            rng:
+                the SimulationRandom instance to generate the catalog from, only its services stream is used
+            services_per_os, percent_cross_platform, max_vuln_probability, vuln_patch_range, vuln_initial_chances:
+                see ServicesGenerator
+        """
+        self.format_version = ServiceCatalog.FORMAT_VERSION
         self.services = None
         self.service_names = None
         self.os_services = None
+        self.vulnerability_table = VulnerabilityTable()
+        self.vulnerability_state = None
+        self.vulnerabilities = None
+        self.service_index = None
+        self.os_version_index = None
+        self.os_service_names = None
+        self.compatibility = None
         self.services_per_os = services_per_os
         self.percent_cross_platform = percent_cross_platform
-        self.os_dependent_vuln_chance = os_dependent_vuln_chance
-        self.dependent_vuln_chance = dependent_vuln_chance
-        self.vuln_patch_mean = vuln_patch_mean
         self.vuln_patch_range = vuln_patch_range
         self.vuln_initial_chances = vuln_initial_chances
         self.max_vuln_probability = max_vuln_probability
-        self.gen_services()
-
-    def get_random_service(self, os_type, os_version):
-        """
-        Gets a random service for a given OS type and version
-
-        Parameters:
-            os_type:
-                the type of OS
-            os_version:
-                the version of the OS
-
-        Returns:
-            a random service for the provided os_type and os_version
-        """
-        service_name = random.choice(list(self.os_services[os_type][os_version].keys()))
-        return random.choice(self.os_services[os_type][os_version][service_name]).copy()
-
-    def get_random_service_latest_version(self, os_type, os_version):
-        """
-        Gets a random service set to the latest version for the provided OS type and version
-
-        Parameters:
-            os_type:
-                the type of OS
-            os_version:
-                the version of the OS
-
-        Returns:
-            a random service set to the latest version for the provided os_type and os_version
-        """
-        service_name = random.choice(list(self.os_services[os_type][os_version].keys()))
-        return self.os_services[os_type][os_version][service_name][-1].copy()
-
-    def service_is_compatible_with_os(self, os_type, os_version, service):
-        """
-        Checks if a service is comptabile with a particular OS type and version
-
-        Parameters:
-            os_type:
-                the type of OS
-            os_version:
-                the version of the OS
-            service:
-                the service to check if it is compatible with the provided os_type and os_version
-
-        Returns:
-            True is the service is compatible, false otherwise
-        """
-        return service in list(self.os_services[os_type][os_version].keys())
+        self.gen_services(rng)
 
     # def gen_services(self):
     #     """
@@ -384,9 +651,13 @@ class ServicesGenerator:
     #                         os_version_index + 1) * version_split:s_versions_len - os_version_index * version_split]
     #                 self.os_services[os_name][os_version][service] = service_versions
 
-    def gen_services(self):
+    def gen_services(self, rng):
         """
         Generates all of the services for each OS type and version for the simulation
+
+        Parameters:
+            rng:
+                the SimulationRandom instance to draw from, only its services stream is used
         """
         self.os_services = {os_name: {} for os_name in constants.OS_TYPES}
 
@@ -398,13 +669,16 @@ class ServicesGenerator:
         s_versions_len = len(s_versions)
 
         self.services = {}
+        services_random = rng.services
+        # service -> (the (patch index, row) of its vulnerabilities, the OS types it is on)
+        service_rows = {}
 
         cross_platform_services_count = int(self.services_per_os * self.percent_cross_platform)
         os_specific_services_count = self.services_per_os - cross_platform_services_count
 
         for os_type in constants.OS_TYPES:
-            selected_cross_platform_services = random.sample(constants.OS_SERVICE_NAMES["cross_platform"], cross_platform_services_count)
-            selected_os_services = random.sample(constants.OS_SERVICE_NAMES[os_type], os_specific_services_count)
+            selected_cross_platform_services = services_random.sample(constants.OS_SERVICE_NAMES["cross_platform"], cross_platform_services_count)
+            selected_os_services = services_random.sample(constants.OS_SERVICE_NAMES[os_type], os_specific_services_count)
             all_selected_services = selected_cross_platform_services + selected_os_services
             # print(all_selected_services)
 
@@ -415,39 +689,277 @@ class ServicesGenerator:
                     os_list = constants.OS_TYPES
 
                 # if the service already exists in self.services, skip to the next one
-                if service in self.services:
+                if service in service_rows:
                     continue
 
-                self.services[service] = []
                 vulns = {}
 
                 for i in range(self.vuln_initial_chances):
-                    if random.random() < self.max_vuln_probability:
-                        vuln_patch_dist = i + random.randint(-self.vuln_patch_range, self.vuln_patch_range)
-                        vulns[vuln_patch_dist] = Vulnerability(
+                    if services_random.random() < self.max_vuln_probability:
+                        vuln_patch_dist = i + services_random.randint(-self.vuln_patch_range, self.vuln_patch_range)
+                        vulns[vuln_patch_dist] = self.vulnerability_table.add(
                             can_have_os_dependency=(service not in selected_cross_platform_services),
-                            os_list=os_list
+                            os_list=os_list,
+                            rng=rng
                         )
 
-                vulns[99] = Vulnerability(
+                vulns[99] = self.vulnerability_table.add(
                     can_have_os_dependency=(service not in selected_cross_platform_services),
-                    os_list=os_list
+                    os_list=os_list,
+                    rng=rng
                 )
-                
-                for sv_index in range(s_versions_len):
-                    service_version = s_versions[sv_index]
-                    active_vulns = [vulns[i] for i in vulns if i >= sv_index]
-                    self.services[service] = self.services[service] + [Service(service, service_version, active_vulns)]
-
-                for os_name in os_list:
-                    os_versions = constants.OS_VERSION_DICT[os_name]
-                    total_os_versions = len(os_versions)
-                    version_split = s_versions_len // total_os_versions
-                    for os_version_index, os_version in enumerate(os_versions):
-                        service_versions = self.services[service][s_versions_len - (
-                                os_version_index + 1) * version_split:s_versions_len - os_version_index * version_split]
-                        self.os_services[os_name][os_version][service] = service_versions
+                service_rows[service] = (list(vulns.items()), os_list)
+
+        self.vulnerability_table.freeze()
+        # The vulnerabilities of the catalog are never exploited, see Vulnerability.copy
+        self.vulnerability_state = VulnerabilityState(self.vulnerability_table)
+        self.vulnerabilities = [
+            Vulnerability(self.vulnerability_table, row, self.vulnerability_state)
+            for row in range(len(self.vulnerability_table))
+        ]
+        for service, (rows, os_list) in service_rows.items():
+            # A vulnerability is active up to the version index it is patched after
+            self.services[service] = ServiceVersions(service, s_versions, [
+                (last_index, self.vulnerabilities[row]) for last_index, row in rows
+            ])
+
+            for os_name in os_list:
+                os_versions = constants.OS_VERSION_DICT[os_name]
+                total_os_versions = len(os_versions)
+                version_split = s_versions_len // total_os_versions
+                for os_version_index, os_version in enumerate(os_versions):
+                    service_versions = self.services[service][s_versions_len - (
+                            os_version_index + 1) * version_split:s_versions_len - os_version_index * version_split]
+                    self.os_services[os_name][os_version][service] = service_versions
+
+        self.gen_compatibility()
+
+    def gen_compatibility(self):
+        """
+        Indexes the services that are available for each OS type and version: a compatibility matrix with a row
+        per service name and a column per OS type and version, and the list of service names of every column.
+        """
+        self.service_index = {service: index for index, service in enumerate(self.services)}
+        self.os_version_index = {}
+        self.os_service_names = {}
+        for os_type, os_versions in self.os_services.items():
+            for os_version, os_version_services in os_versions.items():
+                self.os_version_index[(os_type, os_version)] = len(self.os_version_index)
+                self.os_service_names[(os_type, os_version)] = list(os_version_services.keys())
+        self.compatibility = np.zeros((len(self.service_index), len(self.os_version_index)), dtype=bool)
+        for os_version_key, service_names in self.os_service_names.items():
+            for service in service_names:
+                self.compatibility[self.service_index[service], self.os_version_index[os_version_key]] = True
+
+    def is_compatible(self, service_name, os_type, os_version):
+        """
+        Returns:
+            True if the service is available for the OS type and version
+        """
+        service_index = self.service_index.get(service_name)
+        os_version_index = self.os_version_index.get((os_type, os_version))
+        if service_index is None or os_version_index is None:
+            return False
+        return bool(self.compatibility[service_index, os_version_index])
+
+
+# key -> (ServiceCatalog, state of the services stream after generating it), the most recently used last
+_service_catalogs = collections.OrderedDict()
+_service_catalogs_lock = threading.Lock()
+
+
+def get_service_catalog(rng, services_per_os, percent_cross_platform, max_vuln_probability, vuln_patch_range,
+                        vuln_initial_chances, persist=False):
+    """
+    Returns the ServiceCatalog generated from the services stream of rng, generating it on first use.
+
+    The catalogs are shared by the networks of a process and, with persist, saved to the snapshots directory for
+    seeded simulations, keeping the SERVICE_CATALOG_PERSIST_LIMIT most recently used ones. Either way the services
+    stream is left in the state it would be in after generating the catalog, so the simulation is the same as with
+    a newly generated catalog.
+    """
+    parameters = (services_per_os, percent_cross_platform, max_vuln_probability, vuln_patch_range,
+                  vuln_initial_chances)
+    # The constants the catalog is generated from, so that a saved catalog is not used after they change
+    catalog_constants = repr((constants.OS_TYPES, constants.OS_VERSION_DICT, constants.OS_SERVICE_NAMES,
+                              constants.SERVICE_VERSIONS, constants.VULN_PROB_DEPENDS_ON_OS,
+                              constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS, constants.VULN_MIN_COMPLEXITY))
+    key = (ServiceCatalog.FORMAT_VERSION, parameters, catalog_constants, rng.services.getstate())
+
+    with _service_catalogs_lock:
+        cached = _service_catalogs.get(key)
+    persist = persist and rng.seeded
+    suffix = hashlib.sha1(repr(key).encode()).hexdigest()
+    if cached is None and persist:
+        cached = ServiceCatalogSnapshot().load_catalog(suffix)
+        if cached is not None and getattr(cached[0], 'format_version', None) != ServiceCatalog.FORMAT_VERSION:
+            cached = None
+    if cached is None:
+        catalog = ServiceCatalog(rng, *parameters)
+        cached = (catalog, rng.services.getstate())
+        if persist:
+            ServiceCatalogSnapshot().save_catalog(cached, suffix, limit=constants.SERVICE_CATALOG_PERSIST_LIMIT)
+    else:
+        rng.services.setstate(cached[1])
+
+    with _service_catalogs_lock:
+        _service_catalogs[key] = cached
+        _service_catalogs.move_to_end(key)
+        while len(_service_catalogs) > constants.SERVICE_CATALOG_CACHE_SIZE:
+            _service_catalogs.popitem(last=False)
+    return cached[0]
+
+
+class ServicesGenerator:
+
+    def __init__(self,
+                 services_per_os=constants.SERVICE_NO_OF_SERVICES_PER_OS,
+                 percent_cross_platform=constants.VULN_PERCENT_CROSS_PLATFORM,
+                 max_vuln_probability=constants.VULN_MAX_PROB_FOR_OCCURING_FOR_SERVICE_VERSION,
+                 vuln_patch_mean=constants.VULN_PATCH_MEAN,
+                 vuln_patch_range=constants.VULN_PATCH_RANGE,
+                 vuln_initial_chances=constants.VULN_INITIAL_CHANCES,
+                 os_dependent_vuln_chance=constants.VULN_PROB_DEPENDS_ON_OS,
+                 dependent_vuln_chance=constants.VULN_PROB_DEPENDS_ON_OTHER_VULNS,
+                 rng=None, persist_catalog=False, catalog_seed=None):
+        """
+        Used to generator services for the simulation
+
+        The services are drawn from a ServiceCatalog shared with the other networks generated from the same
+        services stream state. The vulnerabilities of the services given to hosts are copies of the catalog ones,
+        made once per network, so they are exploited independently from the other networks.
+
+        Parameters:
+            services_per_os:
+                the number of the services for each OS
+            percent_cross_platform:
+                percent of services that avaliable across all platforms
+            max_vuln_probability:
+                the maximum probability for older versions of service having a vulnerability
+            vuln_patch_mean:
+                thae number of versions on average it takes for a vulnerability to be ptched
+            vuln_patch_range:
+                the range from the vuln_patch_mean
+            vuln_initial_chances:
+                for the first version of a service it iterates vuln_initial_chances testing if the first service gets a new vulnerability
+            os_dependent_vuln_chance (Unused):
+                the probability of a vulnerability being only enabled on specific OS (if the service is available across platforms)
+            dependent_vuln_chance (Unused):
+                the chance that a vulnerability can only be exploited if there is another particular type vulnerability that can also be exploited
+            rng:
+                the SimulationRandom instance of the simulation, a new unseeded one is created if None
+            persist_catalog:
+                if True and the catalog is seeded, it is saved to and loaded from the snapshots directory
+            catalog_seed:
+                if set, the catalog is generated from this seed instead of the services stream of rng, so networks
+                with different seeds or no seed share it
+        """
+        if rng is None:
+            rng = SimulationRandom()
+        self.rng = rng
+        self.persist_catalog = persist_catalog
+        self.catalog_seed = catalog_seed
+        self.catalog = None
+        self.services = None
+        self.service_names = None
+        self.os_services = None
+        # The exploited state of the vulnerabilities in this network
+        self.vuln_state = None
+        # id of a catalog vulnerability -> the copy of the vulnerability for this network
+        self._vulns = {}
+        self.services_per_os = services_per_os
+        self.percent_cross_platform = percent_cross_platform
+        self.os_dependent_vuln_chance = os_dependent_vuln_chance
+        self.dependent_vuln_chance = dependent_vuln_chance
+        self.vuln_patch_mean = vuln_patch_mean
+        self.vuln_patch_range = vuln_patch_range
+        self.vuln_initial_chances = vuln_initial_chances
+        self.max_vuln_probability = max_vuln_probability
+        self.gen_services()
+
+    def get_random_service(self, os_type, os_version, rng=None):
+        """
+        Gets a random service for a given OS type and version
+
+        Parameters:
+            os_type:
+                the type of OS
+            os_version:
+                the version of the OS
+            rng:
+                the random stream to draw from, defaults to the services stream
+
+        Returns:
+            a random service for the provided os_type and os_version
+        """
+        if rng is None:
+            rng = self.rng.services
+        service_name = rng.choice(self.catalog.os_service_names[(os_type, os_version)])
+        return self.copy_service(rng.choice(self.os_services[os_type][os_version][service_name]))
+
+    def get_random_service_latest_version(self, os_type, os_version, rng=None):
+        """
+        Gets a random service set to the latest version for the provided OS type and version
 
+        Parameters:
+            os_type:
+                the type of OS
+            os_version:
+                the version of the OS
+            rng:
+                the random stream to draw from, defaults to the services stream
+
+        Returns:
+            a random service set to the latest version for the provided os_type and os_version
+        """
+        if rng is None:
+            rng = self.rng.services
+        service_name = rng.choice(self.catalog.os_service_names[(os_type, os_version)])
+        return self.copy_service(self.os_services[os_type][os_version][service_name][-1])
+
+    def service_is_compatible_with_os(self, os_type, os_version, service):
+        """
+        Checks if a service is comptabile with a particular OS type and version
+
+        Parameters:
+            os_type:
+                the type of OS
+            os_version:
+                the version of the OS
+            service:
+                the Service (or service name) to check if it is compatible with the provided os_type and os_version
+
+        Returns:
+            True is the service is compatible, false otherwise
+        """
+        service_name = service.name if isinstance(service, Service) else service
+        return self.catalog.is_compatible(service_name, os_type, os_version)
+
+    def gen_services(self):
+        """
+        Gets the services for each OS type and version for the simulation from the shared catalog
+        """
+        catalog_rng = self.rng if self.catalog_seed is None else SimulationRandom(self.catalog_seed)
+        self.catalog = get_service_catalog(catalog_rng, self.services_per_os, self.percent_cross_platform,
+                                           self.max_vuln_probability, self.vuln_patch_range, self.vuln_initial_chances,
+                                           persist=self.persist_catalog)
+        self.services = self.catalog.services
+        self.os_services = self.catalog.os_services
+        self.vuln_state = VulnerabilityState(self.catalog.vulnerability_table)
+        self._vulns = {}
+
+    def copy_service(self, service):
+        """
+        Returns:
+            a copy of a catalog service with the vulnerabilities of this network
+        """
+        vulns = []
+        for vuln in service.vulnerabilities:
+            network_vuln = self._vulns.get(vuln.id)
+            if network_vuln is None:
+                network_vuln = self._vulns[vuln.id] = vuln.copy(self.rng, self.vuln_state)
+            vulns.append(network_vuln)
+        return Service(service.name, service.version, vulns)
 
     @staticmethod
     def get_service_name_list():
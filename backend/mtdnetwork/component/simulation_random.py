@@ -0,0 +1,56 @@
+import random
+import numpy as np
+
+
+class SimulationRandom:
+    # python random streams (random.Random) used for discrete choices
+    STREAMS = ['topology', 'services', 'attack', 'mtd']
+    # numpy streams (np.random.Generator) used for the scipy time variates
+    TIMING_STREAMS = ['attack_timing', 'mtd_timing']
+
+    def __init__(self, seed=None):
+        """
+        A seedable group of independent random number streams for one simulation.
+
+        Every component of the simulation draws from its own stream, so that e.g. changing the MTD
+        strategy does not change the generated topology, and two simulations can run side by side in
+        one process without sharing the global `random` or numpy state.
+
+        Streams:
+            topology:
+                network graph, users, host OS/IP/ports and host internal service graphs
+            services:
+                service and vulnerability generation, random service assignment
+            attack:
+                adversary decisions and exploit/brute force outcomes
+            mtd:
+                MTD strategy selection and the randomness inside MTD operations
+            attack_timing, mtd_timing:
+                numpy generators passed as `random_state` to the time_generator functions
+
+        Parameters:
+            seed:
+                the seed of the simulation. If None, a random seed is drawn and stored in `self.seed`
+                so the simulation can be reproduced afterwards.
+        """
+        self.seed = None
+        # Whether the seed was given, simulations seeded alike can share what they generate
+        self.seeded = False
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """
+        Resets every stream in place from a new seed.
+        Objects that already hold a reference to this instance keep drawing from the reseeded streams.
+        """
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy
+        self.seeded = seed is not None
+        children = seed_sequence.spawn(len(self.STREAMS) + len(self.TIMING_STREAMS))
+        for name, child in zip(self.STREAMS, children):
+            setattr(self, name, random.Random(int(child.generate_state(1, dtype=np.uint64)[0])))
+        for name, child in zip(self.TIMING_STREAMS, children[len(self.STREAMS):]):
+            setattr(self, name, np.random.default_rng(child))
+
+    def get_seed(self):
+        return self.seed
@@ -17,6 +17,7 @@ class TargetNetwork(Network):
         self.network_type = 0
 
         self.graph = network.get_graph_copy().copy()
+        self.build_registry_from_graph()
         self.colour_map = network.get_colourmap()
         self.pos = network.get_pos()
         self.node_per_layer = network.get_node_per_layer()
@@ -5,21 +5,21 @@ from scipy.stats import weibull_min
 from scipy.stats import poisson
 
 
-def exponential_variates(loc, scale):
-    return expon.rvs(loc=loc, scale=scale, size=1)[0]
+def exponential_variates(loc, scale, random_state=None):
+    return expon.rvs(loc=loc, scale=scale, size=1, random_state=random_state)[0]
 
 
-def normal_variates(loc, scale):
-    return norm.rvs(loc=loc, scale=scale, size=1)[0]
+def normal_variates(loc, scale, random_state=None):
+    return norm.rvs(loc=loc, scale=scale, size=1, random_state=random_state)[0]
 
 
-def uniform_variates(loc, scale):
-    return uniform.rvs(loc=loc, scale=scale, size=1)[0]
+def uniform_variates(loc, scale, random_state=None):
+    return uniform.rvs(loc=loc, scale=scale, size=1, random_state=random_state)[0]
 
 
-def weibull_variates(loc, scale):
-    return weibull_min.rvs(loc=loc, scale=scale, size=1)[0]
+def weibull_variates(loc, scale, random_state=None):
+    return weibull_min.rvs(loc=loc, scale=scale, size=1, random_state=random_state)[0]
 
 
-def poisson_variates(loc, scale):
-    return poisson.rvs(loc=loc, scale=scale, size=1)[0]
+def poisson_variates(loc, scale, random_state=None):
+    return poisson.rvs(loc=loc, scale=scale, size=1, random_state=random_state)[0]
@@ -1,13 +1,13 @@
 from mtdnetwork.component.network import Network
 from mtdnetwork.statistic.mtd_statistics import MTDStatistics
 from mtdnetwork.component.host import Host
-import random
 
 
 class TimeNetwork(Network):
 
     def __init__(self, total_nodes=50, total_endpoints=5, total_subnets=8, total_layers=4,
-                 target_layer=4, total_database=5, terminate_compromise_ratio=0.8):
+                 target_layer=4, total_database=5, terminate_compromise_ratio=0.8, seed=None, rng=None,
+                 headless=False, persist_catalog=False, catalog_seed=None):
         # default parameters
         self._mtd_stats = MTDStatistics()
         self._mtd_queue = []
@@ -16,29 +16,31 @@ class TimeNetwork(Network):
         if total_nodes < 2 * total_subnets:
             total_nodes = 2 * total_subnets
         super().__init__(total_nodes=total_nodes, total_endpoints=total_endpoints, total_subnets=total_subnets,
-                         total_layers=total_layers, target_layer=target_layer, total_database=total_database)
+                         total_layers=total_layers, target_layer=target_layer, total_database=total_database,
+                         seed=seed, rng=rng, headless=headless, persist_catalog=persist_catalog,
+                         catalog_seed=catalog_seed)
         self.init_network()
 
     def setup_network(self):
         """
         Using the generated graph, generates a host for each node on the graph.
         """
-        ip_addresses = []
+        topology_random = self.rng.topology
 
         for host_id in self.nodes:
-            node_os = Host.get_random_os()
-            node_os_version = Host.get_random_os_version(node_os)
-            node_ip = Host.get_random_address(existing_addresses=ip_addresses)
-            ip_addresses.append(node_ip)
-            self.graph.nodes[host_id]["host"] = Host(
+            node_os = Host.get_random_os(rng=topology_random)
+            node_os_version = Host.get_random_os_version(node_os, rng=topology_random)
+            node_ip = self.address_allocator.allocate(topology_random)
+            self.set_host(host_id, Host(
                 node_os,
                 node_os_version,
                 host_id,
                 node_ip,
-                random.choices(self.users_list, k=self.users_per_host),
+                topology_random.choices(self.users_list, k=self.users_per_host),
                 self,
-                self.service_generator
-            )
+                self.service_generator,
+                rng=self.rng
+            ))
 
     def is_compromised(self, compromised_hosts):
         # 80% compromise ratio
@@ -108,6 +108,10 @@ USER_TOTAL_FOR_EACH_HOST = 5
 
 # Constants for Network
 # NETWORK_HOST_DISCOVER_TIME = 1
+# the number of subnet layouts kept by the layout cache
+NETWORK_LAYOUT_CACHE_SIZE = 256
+# the number of BFS distance maps from pivot hosts kept by the network
+NETWORK_PIVOT_DISTANCE_CACHE_SIZE = 32
 
 # Constants for Hosts
 HOST_SERVICES_MIN = 3
@@ -115,6 +119,8 @@ HOST_SERVICES_MAX = 7
 HOST_INTERNAL_SERVICE_MIN = 0
 HOST_PORT_RANGE = range(1, 65546)
 HOST_MAX_PROB_FOR_USER_COMPROMISE = 0.01
+# the number of pooled internal topologies for each number of services
+HOST_TOPOLOGY_POOL_BUCKETS = 64
 # HOST_USER_COMPROMISE_TIME = 5
 # HOST_AUTO_COMPROMISE_TIME = 1
 # HOST_PORT_SCAN_MIN_TIME = 10
@@ -139,6 +145,10 @@ SERVICE_NO_OF_SERVICES_PER_OS = 20
 SERVICE_COMPROMISED_THRESHOLD = 7
 SERVICE_DISCOVER_EACH_VULN_TIME = 10
 SERVICE_TOP_X_VULNS_TO_RETURN = 5
+# The number of service catalogs shared between the networks of a process
+SERVICE_CATALOG_CACHE_SIZE = 8
+# The number of service catalogs kept in the snapshots directory, the least recently used ones are removed
+SERVICE_CATALOG_PERSIST_LIMIT = 16
 
 #  Constants for Attackers
 # HACKER_BLOCKED_BY_MTD_PENALITY = 1000
@@ -170,6 +180,11 @@ MTD_PRIORITY = {
     'UserShuffle': 7,
 }
 
+# mtd name : keyword arguments of the MTD strategies created by an MTD scheme
+MTD_OPTIONS = {
+    'CompleteTopologyShuffle': {'incremental': False, 'rewire_fraction': 1.0},
+}
+
 # mtd name : (mean, std)
 MTD_DURATION = {
     'CompleteTopologyShuffle': (120, 0.5),
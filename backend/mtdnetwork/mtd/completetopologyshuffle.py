@@ -4,21 +4,29 @@ from mtdnetwork.mtd import MTD
 class CompleteTopologyShuffle(MTD):
     """
     Completely regenerates the network, preserving the hosts from previously.
+    In incremental mode, only the edges between subnets and between layers are re-randomised.
     """
 
-    def __init__(self, network=None):
+    def __init__(self, network=None, incremental=False, rewire_fraction=1.0):
+        """
+        :param network: network object
+        :param incremental: True: rewire the edges between subnets instead of regenerating the network
+        :param rewire_fraction: the fraction of the edges between subnets rewired in incremental mode
+        """
         super().__init__(name="CompleteTopologyShuffle",
                          mtd_type='shuffle',
                          resource_type='network',
                          network=network)
+        self.incremental = incremental
+        self.rewire_fraction = rewire_fraction
 
     def mtd_operation(self, adversary=None):
-        hosts = self.network.get_hosts()
-
-        # Regenerate the network graph
-        self.network.gen_graph()
-        for host_id, host_instance in hosts.items():
-            self.network.graph.nodes[host_id]["host"] = host_instance
+        if self.incremental:
+            # The subnets, hosts and positions are kept, the changed edges are in network.get_topology_delta()
+            self.network.rewire_topology(fraction=self.rewire_fraction, rng=self.network.get_rng().mtd)
+        else:
+            # Regenerate the network graph, the hosts are kept on their nodes by the host registry
+            self.network.gen_graph()
         self.network.update_reachable_mtd()
 
         # Update Attack Path Exposure for target networks
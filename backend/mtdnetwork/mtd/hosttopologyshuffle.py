@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-import random
 
 
 class HostTopologyShuffle(MTD):
@@ -14,26 +13,26 @@ class HostTopologyShuffle(MTD):
                          network=network)
 
     def random_different_host_id(self, curr_host_id, hosts_list):
-        other_host_id = random.choice(hosts_list)
+        other_host_id = self.network.get_rng().mtd.choice(hosts_list)
         if other_host_id == curr_host_id:
             return self.random_different_host_id(curr_host_id, hosts_list)
         return other_host_id
 
     def mtd_operation(self, adversary=None):
         hosts = self.network.get_hosts()
-        layer_dict = self.network.get_layers()
         cur_layer = -1
-        exposed_endpoints = self.network.exposed_endpoints
-        seen = []
+        exposed_endpoints = set(self.network.exposed_endpoints)
+        seen = set()
         host_id_list_in_layer = []
 
-        for host_id, host_instance in hosts.items():
-            if layer_dict[host_id] != cur_layer:
-                cur_layer = layer_dict[host_id]
-                host_id_list_in_layer = []
-                for host in hosts:
-                    if layer_dict[host] == cur_layer and host not in seen:
-                        host_id_list_in_layer.append(host)
+        layer_hosts = {}
+        for host_id in hosts:
+            layer_hosts.setdefault(self.network.get_layer(host_id), []).append(host_id)
+
+        for host_id in hosts:
+            if self.network.get_layer(host_id) != cur_layer:
+                cur_layer = self.network.get_layer(host_id)
+                host_id_list_in_layer = [host for host in layer_hosts[cur_layer] if host not in seen]
             if host_id in seen or host_id in exposed_endpoints:
                 continue
             if len(host_id_list_in_layer) == 1:
@@ -41,16 +40,11 @@ class HostTopologyShuffle(MTD):
             other_host_id = self.random_different_host_id(host_id, host_id_list_in_layer)
             if other_host_id in seen or host_id in exposed_endpoints:
                 continue
-            other_host_instance = hosts[other_host_id]
-
-            host_instance.host_id = other_host_id
-            other_host_instance.host_id = host_id
 
-            self.network.graph.nodes[host_id]["host"] = other_host_instance
-            self.network.graph.nodes[other_host_id]["host"] = host_instance
+            self.network.swap_hosts(host_id, other_host_id)
 
-            seen.append(host_id)
-            seen.append(other_host_id)
+            seen.add(host_id)
+            seen.add(other_host_id)
             host_id_list_in_layer.remove(host_id)
             host_id_list_in_layer.remove(other_host_id)
 
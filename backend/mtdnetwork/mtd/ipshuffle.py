@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-from mtdnetwork.component import host
 
 
 class IPShuffle(MTD):
@@ -12,11 +11,13 @@ class IPShuffle(MTD):
 
     def mtd_operation(self, adversary=None):
         hosts = self.network.get_hosts()
+        exposed_endpoints = set(self.network.exposed_endpoints)
 
-        ip_addresses = []
-        for host_id, host_instance in hosts.items():
-            if host_id in self.network.exposed_endpoints:
-                continue
-            host_ip = host.Host.get_random_address(existing_addresses=ip_addresses)
-            ip_addresses.append(host_ip)
+        # The exposed endpoints keep their addresses, every other host is reassigned in one draw
+        shuffled_hosts = [host_instance for host_id, host_instance in hosts.items() if host_id not in exposed_endpoints]
+        new_ips = self.network.get_address_allocator().reallocate_many(
+            [host_instance.ip for host_instance in shuffled_hosts],
+            rng=self.network.get_rng().mtd
+        )
+        for host_instance, host_ip in zip(shuffled_hosts, new_ips):
             host_instance.ip = host_ip
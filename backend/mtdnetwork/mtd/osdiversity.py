@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-import random
 from mtdnetwork.data import constants
 
 
@@ -16,6 +15,7 @@ class OSDiversity(MTD):
         """
         service_generator = self.network.get_service_generator()
         hosts = self.network.get_hosts()
+        mtd_random = self.network.get_rng().mtd
         for host_id, host_instance in hosts.items():
             if host_id in self.network.exposed_endpoints:
                 continue
@@ -26,7 +26,7 @@ class OSDiversity(MTD):
             # Make a copy of OS_TYPES and remove prev_os from it, so the type of the new OS will be changed
             available_os_choices = [os_type for os_type in constants.OS_TYPES if os_type != prev_os]
             
-            new_os = random.choice(available_os_choices)
+            new_os = mtd_random.choice(available_os_choices)
             new_os_version = constants.OS_VERSION_DICT[new_os][prev_os_version_index]
 
             host_instance.os_type = new_os
@@ -36,12 +36,13 @@ class OSDiversity(MTD):
                 if node_id == host_instance.target_node:
                     continue
 
-                curr_service = host_instance.graph.nodes[node_id]["service"]
+                curr_service = host_instance.get_service(node_id)
                 if not service_generator.service_is_compatible_with_os(new_os, new_os_version, curr_service):
-                    host_instance.graph.nodes[node_id]["service"] = service_generator.get_random_service_latest_version(
+                    host_instance.set_service(node_id, service_generator.get_random_service_latest_version(
                         host_instance.os_type,
-                        host_instance.os_version
-                    )
+                        host_instance.os_version,
+                        rng=mtd_random
+                    ))
         # Update Attack Path Exposure for target networks
         if self.network.get_network_type() == 0:
             self.network.add_attack_path_exposure()
@@ -1,5 +1,3 @@
-import random
-
 import networkx as nx
 from mtdnetwork.data.constants import OS_TYPES, OS_VERSION_DICT
 import matplotlib.pyplot as plt
@@ -39,6 +37,7 @@ class OSDiversityAssignment(MTD):
 
         service_generator = self.network.get_service_generator()
         hosts = self.network.get_hosts()
+        mtd_random = self.network.get_rng().mtd
         for host_id, host_instance in hosts.items():
             if host_id in self.network.exposed_endpoints:
                 continue
@@ -46,7 +45,7 @@ class OSDiversityAssignment(MTD):
             prev_os = host_instance.os_type
             prev_os_version = host_instance.os_version
             prev_os_version_index = OS_VERSION_DICT[prev_os].index(prev_os_version)
-            new_os = random.choice(self.os_types)
+            new_os = mtd_random.choice(self.os_types)
             for os_type, host in result:
                 if host == host_id:
                     new_os = os_type
@@ -59,12 +58,13 @@ class OSDiversityAssignment(MTD):
             for node_id in range(host_instance.total_nodes):
                 if node_id == host_instance.target_node:
                     continue
-                curr_service = host_instance.graph.nodes[node_id]["service"]
+                curr_service = host_instance.get_service(node_id)
                 if not service_generator.service_is_compatible_with_os(new_os, new_os_version, curr_service):
-                    host_instance.graph.nodes[node_id]["service"] = service_generator.get_random_service_latest_version(
+                    host_instance.set_service(node_id, service_generator.get_random_service_latest_version(
                         host_instance.os_type,
-                        host_instance.os_version
-                    )
+                        host_instance.os_version,
+                        rng=mtd_random
+                    ))
 
     def get_name(self):
         return self._os_name
@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-from mtdnetwork.component import host
 
 
 class PortShuffle(MTD):
@@ -12,18 +11,13 @@ class PortShuffle(MTD):
 
     def mtd_operation(self, adversary=None):
         hosts = self.network.get_hosts()
+        exposed_endpoints = set(self.network.exposed_endpoints)
+        mtd_random = self.network.get_rng().mtd
 
         for host_id, host_instance in hosts.items():
             # Do not change exposed endpoints as other organisations might
             # require to be fixed
-            if host_instance.host_id in self.network.exposed_endpoints:
+            if host_instance.host_id in exposed_endpoints:
                 continue
-            new_ports = []
-            for node_id in host_instance.graph.nodes:
-                if node_id == host_instance.target_node:
-                    continue
-                new_port = host.Host.get_random_port(
-                    existing_ports=new_ports
-                )
-                new_ports.append(new_port)
-                host_instance.graph.nodes[node_id]["port"] = new_port
+            # Remaps all the ports of the host in one draw
+            host_instance.allocate_ports(mtd_random)
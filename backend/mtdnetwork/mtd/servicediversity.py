@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-import random
 
 
 # class ServiceDiversity(MTD):
@@ -46,7 +45,7 @@ class ServiceDiversity(MTD):
                 print(f"No host with ID {specific_host_id} found.")
                 return
         else:
-            host_instance = random.choice(list(hosts.values()))
+            host_instance = self.network.get_rng().mtd.choice(list(hosts.values()))
             specific_host_id = host_instance.host_id
 
         if specific_host_id in self.network.exposed_endpoints:
@@ -55,10 +54,11 @@ class ServiceDiversity(MTD):
         for node_id in range(host_instance.total_nodes):
             if node_id == host_instance.target_node:
                 continue
-            host_instance.graph.nodes[node_id]["service"] = service_generator.get_random_service_latest_version(
+            host_instance.set_service(node_id, service_generator.get_random_service_latest_version(
                 host_instance.os_type,
-                host_instance.os_version
-            )
+                host_instance.os_version,
+                rng=self.network.get_rng().mtd
+            ))
         # Update Attack Path Exposure for target networks
         if self.network.get_network_type() == 0:
             self.network.add_attack_path_exposure()
@@ -1,5 +1,4 @@
 from mtdnetwork.mtd import MTD
-import random
 
 
 class UserShuffle(MTD):
@@ -14,7 +13,7 @@ class UserShuffle(MTD):
 
         for host_instance in hosts.values():
             host_instance.set_host_users(
-                random.choices(
+                self.network.get_rng().mtd.choices(
                     self.network.users_list,
                     k=self.network.users_per_host
                 )
@@ -1,18 +1,21 @@
 import simpy
 import logging
-import random
 from mtdnetwork.component.time_generator import exponential_variates
 from mtdnetwork.data.constants import ATTACK_DURATION
 
 
 class AttackOperation:
-    def __init__(self, env, end_event, adversary, proceed_time=0):
+    def __init__(self, env, end_event, adversary, proceed_time=0, rng=None):
         """
 
         :param env: the parameter to facilitate simPY env framework
         :param adversary: the simulation attacker
         :param proceed_time: the time to proceed attack simulation
+        :param rng: the SimulationRandom of the simulation, defaults to the one of the adversary's network
         """
+        if rng is None:
+            rng = adversary.get_network().get_rng()
+        self.rng = rng
 
         self.env = env
         self.end_event = end_event
@@ -118,7 +121,8 @@ class AttackOperation:
                                                                     self.env.now + self._proceed_time,
                                                                     adversary, self._interrupted_mtd)
         # confusion penalty caused by MTD operation
-        yield self.env.timeout(exponential_variates(ATTACK_DURATION['PENALTY'], 0.5))
+        yield self.env.timeout(exponential_variates(ATTACK_DURATION['PENALTY'], 0.5,
+                                                    random_state=self.rng.attack_timing))
 
         if self._interrupted_mtd.get_resource_type() == 'network':
             self._interrupted_mtd = None
@@ -146,29 +150,25 @@ class AttackOperation:
 
         adversary.set_pivot_host_id(-1)
         visible_network = network.get_hacker_visible_graph()
+        # The distances from the exposed endpoints on the visible network, from a single BFS
+        distance_index = network.get_exposed_distance_index(visible_network)
         # scan_time = constants.NETWORK_HOST_DISCOVER_TIME * visible_network.number_of_nodes()
-        uncompromised_hosts = []
         # Add every uncompromised host that is reachable and is not an exposed or compromised host
+        frontier = set()
         for c_host in compromised_hosts:
-            uncompromised_hosts = uncompromised_hosts + [
-                neighbor
-                for neighbor in network.graph.neighbors(c_host)
-                if neighbor not in compromised_hosts and neighbor not in network.exposed_endpoints and
-                   len(network.get_path_from_exposed(neighbor, graph=visible_network)[0]) > 0
-            ]
+            frontier.update(network.graph.neighbors(c_host))
+        frontier.difference_update(compromised_hosts, network.exposed_endpoints, stop_attack)
+        uncompromised_hosts = [host_id for host_id in sorted(frontier)
+                               if distance_index.get_distance(host_id) is not None]
 
         # Add random element from 0 to 1 so the scan does not return the same order of hosts each time for the hacker
-        uncompromised_hosts = sorted(
-            uncompromised_hosts,
-            key=lambda host_id: network.get_path_from_exposed(host_id, graph=visible_network)[1] + random.random()
-        )
+        uncompromised_hosts.sort(key=lambda host_id: distance_index.get_distance(host_id) + self.rng.attack.random())
 
-        uncompromised_hosts = uncompromised_hosts + [
+        discovered_hosts = uncompromised_hosts + [
             ex_node
             for ex_node in network.exposed_endpoints
-            if ex_node not in compromised_hosts
+            if ex_node not in compromised_hosts and ex_node not in stop_attack
         ]
-        discovered_hosts = [n for n in uncompromised_hosts if n not in stop_attack]
 
         adversary.set_host_stack(discovered_hosts)
         if len(adversary.get_host_stack()) > 0:
@@ -186,12 +186,8 @@ class AttackOperation:
         """
         adversary = self.adversary
         network = adversary.get_network()
-        adversary.set_host_stack(network.sort_by_distance_from_exposed_and_pivot_host(
-            adversary.get_host_stack(),
-            adversary.get_compromised_hosts(),
-            pivot_host_id=adversary.get_pivot_host_id()
-        ))
-        adversary.set_curr_host_id(adversary.get_host_stack().pop(0))
+        network.sort_host_stack(adversary.get_host_stack(), pivot_host_id=adversary.get_pivot_host_id())
+        adversary.set_curr_host_id(adversary.get_host_stack().pop())
         adversary.set_curr_host(network.get_host(adversary.get_curr_host_id()))
         # Sets node as unattackable if has been attack too many times
         adversary.get_attack_counter()[adversary.get_curr_host_id()] += 1
@@ -199,7 +195,7 @@ class AttackOperation:
             adversary.get_curr_host_id()] == adversary.get_attack_threshold():
             # target node feature
             if adversary.get_curr_host_id() != network.get_target_node() and network.network_type == 0:
-                adversary.get_stop_attack().append(adversary.get_curr_host_id())
+                adversary.get_stop_attack().add(adversary.get_curr_host_id())
 
         # Checks if max attack attempts has been reached, empty stacks if reached
         # if adversary.get_curr_attempts() >= adversary.get_max_attack_attempts():
@@ -244,7 +240,8 @@ class AttackOperation:
         """
         adversary = self.adversary
         for vuln in vulns:
-            exploit_time = exponential_variates(vuln.exploit_time(host=adversary.get_curr_host()), 0.5)
+            exploit_time = exponential_variates(vuln.exploit_time(host=adversary.get_curr_host()), 0.5,
+                                                random_state=self.rng.attack_timing)
             start_time = self.env.now + self._proceed_time
             try:
                 # logging.info(
@@ -300,12 +297,7 @@ class AttackOperation:
         """
         adversary = self.adversary
         found_neighbors = adversary.get_curr_host().discover_neighbors()
-        new__host_stack = found_neighbors + [
-            node_id
-            for node_id in adversary.get_host_stack()
-            if node_id not in found_neighbors
-        ]
-        adversary.set_host_stack(new__host_stack)
+        adversary.get_host_stack().push_front(found_neighbors)
         self._enum_host()
 
     def _set_next_pivot_host(self):
@@ -330,7 +322,7 @@ class AttackOperation:
         adversary = self.adversary
         adversary._pivot_host_id = adversary.get_curr_host_id()
         if adversary.get_curr_host_id() not in adversary.get_compromised_hosts():
-            adversary.get_compromised_hosts().append(adversary.get_curr_host_id())
+            adversary.get_compromised_hosts().add(adversary.get_curr_host_id())
             adversary.get_attack_stats().update_compromise_host(adversary.curr_host)
             logging.info(
                 "Adversary: Host %i has been compromised at %.1fs!" % (
@@ -341,8 +333,7 @@ class AttackOperation:
             for user in adversary.get_curr_host().get_compromised_users():
                 if user not in adversary.get_compromised_users():
                     adversary.get_attack_stats().update_compromise_user(user)
-            adversary._compromised_users = list(set(
-                adversary.get_compromised_users() + adversary.get_curr_host().get_compromised_users()))
+            adversary.get_compromised_users().update(adversary.get_curr_host().get_compromised_users())
             if adversary.get_network().is_compromised(adversary.get_compromised_hosts()):
                 # terminate the whole process
                 self.end_event.succeed()
@@ -7,7 +7,7 @@ from mtdnetwork.component.mtd_scheme import MTDScheme
 class MTDOperation:
 
     def __init__(self, env, end_event, network, attack_operation, scheme, proceed_time=0,
-                 mtd_trigger_interval=None, custom_strategies=None):
+                 mtd_trigger_interval=None, custom_strategies=None, rng=None, mtd_options=None):
         """
 
         :param env: the parameter to facilitate simPY env framework
@@ -16,14 +16,19 @@ class MTDOperation:
         :param scheme:alternatively, simultaneously, randomly
         :param proceed_time:the time to proceed MTD simulation
         :param custom_strategies:specific MTD priority strategy for alternative scheme or single scheme
+        :param rng: the SimulationRandom of the simulation, defaults to the one of the network
+        :param mtd_options: the keyword arguments of the MTD strategies by MTD name, defaults to MTD_OPTIONS
         """
+        if rng is None:
+            rng = network.get_rng()
+        self.rng = rng
         self.env = env
         self.end_event = end_event
         self.network = network
         self.attack_operation = attack_operation
 
         self._mtd_scheme = MTDScheme(network=network, scheme=scheme, mtd_trigger_interval=mtd_trigger_interval,
-                                     custom_strategies=custom_strategies)
+                                     custom_strategies=custom_strategies, rng=rng, mtd_options=mtd_options)
         self._proceed_time = proceed_time
 
         self.application_layer_resource = simpy.Resource(self.env, 1)
@@ -74,7 +79,8 @@ class MTDOperation:
 
             # exponential time interval for triggering MTD operations
             yield self.env.timeout(exponential_variates(self._mtd_scheme.get_mtd_trigger_interval(),
-                                                        self._mtd_scheme.get_mtd_trigger_std()))
+                                                        self._mtd_scheme.get_mtd_trigger_std(),
+                                                        random_state=self.rng.mtd_timing))
 
     def _mtd_batch_trigger_action(self):
         """
@@ -115,7 +121,8 @@ class MTDOperation:
 
             # exponential distribution for triggering MTD operations
             yield self.env.timeout(exponential_variates(self._mtd_scheme.get_mtd_trigger_interval(),
-                                                        self._mtd_scheme.get_mtd_trigger_std()))
+                                                        self._mtd_scheme.get_mtd_trigger_std(),
+                                                        random_state=self.rng.mtd_timing))
 
     def _mtd_execute_action(self, env, mtd):
         """
@@ -128,7 +135,8 @@ class MTDOperation:
         start_time = env.now + self._proceed_time
         # logging.info('MTD: %s deployed in the network at %.1fs.' % (mtd.get_name(), start_time))
         yield env.timeout(exponential_variates(mtd.get_execution_time_mean(),
-                                               mtd.get_execution_time_std()))
+                                               mtd.get_execution_time_std(),
+                                               random_state=self.rng.mtd_timing))
 
         # if network is already compromised while executing mtd:
         if self.network.is_compromised(compromised_hosts=self.attack_operation.get_adversary().get_compromised_hosts()):
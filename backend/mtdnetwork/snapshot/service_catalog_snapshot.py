@@ -0,0 +1,67 @@
+import glob
+import os
+import pickle
+import tempfile
+from mtdnetwork.snapshot import Snapshot
+
+
+class ServiceCatalogSnapshot(Snapshot):
+    def __init__(self):
+        super().__init__()
+
+    def save_catalog(self, catalog, suffix: str, limit=None):
+        """
+        saving a service catalog with the state of the services stream after generating it.
+        The file is written to a temporary file first and moved in place, so readers never see a partial file.
+        If limit is set, only the limit most recently used saved catalogs are kept.
+        """
+        file_name = self.get_file_by_suffix('service_catalog', suffix)
+        directory = os.path.dirname(file_name)
+        fd, temp_file_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(catalog, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file_name, file_name)
+        except BaseException:
+            os.remove(temp_file_name)
+            raise
+        if limit is not None:
+            self.remove_old_catalogs(limit)
+
+    def load_catalog(self, suffix: str):
+        """
+        loading a service catalog based on saved snapshot
+
+        Returns:
+            the saved catalog, None if there is none or it cannot be read
+        """
+        file_name = self.get_file_by_suffix('service_catalog', suffix)
+        try:
+            with open(file_name, 'rb') as f:
+                catalog = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        try:
+            # The modification time orders the saved catalogs by use, see remove_old_catalogs
+            os.utime(file_name)
+        except FileNotFoundError:
+            pass
+        return catalog
+
+    def remove_old_catalogs(self, limit):
+        """
+        removing the saved catalogs that were not used recently, so only limit of them are kept
+        """
+        file_names = glob.glob(self.get_file_by_suffix('service_catalog', '*'))
+        modified_times = {}
+        for file_name in file_names:
+            try:
+                modified_times[file_name] = os.path.getmtime(file_name)
+            except FileNotFoundError:
+                # Removed by another thread or process
+                pass
+        for file_name in sorted(modified_times, key=modified_times.get, reverse=True)[limit:]:
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
@@ -35,12 +35,15 @@ class SnapshotCheckpoint:
         self.set_proceed_time(time)
         time_network = NetworkSnapshot().load_network(str(time))
         adversary = AdversarySnapshot().load_adversary(str(time))
+        # The adversary is pickled with its own copy of the network
+        adversary.set_network(time_network)
         return time_network, adversary
 
     @staticmethod
     def load_snapshots_by_network_size(size):
         time_network = NetworkSnapshot().load_network(str(size)+'n')
         adversary = AdversarySnapshot().load_adversary(str(size)+'n')
+        adversary.set_network(time_network)
         return time_network, adversary
 
     @staticmethod
@@ -0,0 +1,372 @@
+import heapq
+import numpy as np
+import mtdnetwork.data.constants as constants
+
+
+class AttackGraph:
+
+    def __init__(self, network):
+        """
+        Compiles a network into a host-level attack graph with analytic time to compromise estimates, which are
+        computed without running the attack simulation.
+
+        The time to compromise a host follows the attack operation of the simulation:
+            - If a compromised user reused their password on the host, it is compromised right after the port scan.
+            - Otherwise every attempt costs ENUM_HOST, SCAN_PORT and the mean exploit time of the top unexploited
+              vulnerabilities of every service the port scan finds, which are the exposed services and the services
+              reachable through exploited services. Each vulnerability is exploited with probability equal to its
+              complexity, and a service is exploited once the impact of its exploited vulnerabilities reaches the
+              threshold. The host is compromised once a service next to the target service is exploited.
+            - Every attempt that does not compromise the host is followed by BRUTE_FORCE with the compromised users.
+        The attempts on a host form an absorbing Markov chain on its exploited services, which only grow, so it is
+        solved by back substitution.
+
+        The vulnerabilities of the service catalog are shared between hosts, and a vulnerability exploited on one
+        host is exploited on every host. The estimates keep the probability that every vulnerability is exploited,
+        starting from the current state of the network, and raise it for the vulnerabilities attacked on the hosts
+        compromised before. The partial progress of failed attempts, MTDs and the attack threshold are not
+        modelled, and the graph must be compiled again after the network changes.
+
+        Parameters:
+            network:
+                the Network (or TimeNetwork) to compile
+        """
+        self.network = network
+        self.graph = network.graph
+        self.exposed_endpoints = list(network.exposed_endpoints)
+        # The time to start attacking from the Internet
+        self.initial_time = constants.ATTACK_DURATION['SCAN_HOST']
+        # The time to move on from a compromised host
+        self.pivot_time = constants.ATTACK_DURATION['SCAN_NEIGHBOR']
+        self.attempt_time = constants.ATTACK_DURATION['ENUM_HOST'] + constants.ATTACK_DURATION['SCAN_PORT']
+        # The probability that every vulnerability of the network is exploited
+        self.exploited = network.get_service_generator().vuln_state.exploited.astype(np.float64)
+        # host id -> the services of the host, see _get_services
+        self._host_services = {}
+        # (host id, brute force probability, exploited probabilities of the rows of the host) ->
+        # (expected time to compromise the host, probability that every service of the host is attacked)
+        self._host_times = {}
+        self._shortest_times = None
+        self._shortest_predecessors = None
+        self._expected_times = None
+
+    def _get_services(self, host):
+        """
+        Returns:
+            the rows of the host, and a dict of service id -> (vulnerabilities in the order of their RoA,
+            True if the service is next to the target service). A vulnerability is a tuple
+            (row, impact, complexity, mean exploit time, has dependent vulnerabilities, dependency id).
+        """
+        host_services = self._host_services.get(host.host_id)
+        if host_services is None:
+            services = {}
+            rows = []
+            for service_id, service in enumerate(host.services):
+                if service is None:
+                    continue
+                vulns = [(vuln.row, vuln.impact, vuln.complexity, vuln.exploit_time(host=host) + 0.5,
+                          vuln.has_dependent_vulns, vuln.dependent_vuln_id) for vuln in service.get_all_vulns()]
+                services[service_id] = (vulns, host.target_node in host.topology.neighbors[service_id])
+                rows.extend(vuln[0] for vuln in vulns)
+            host_services = self._host_services[host.host_id] = (np.array(rows, dtype=np.int64), services)
+        return host_services
+
+    def _get_attacked_services(self, host, services, exploited_services):
+        """
+        Returns:
+            the services the port scan finds, in the order of a breadth first search from the exposed services
+        """
+        queue = [service_id for service_id in host.exposed_endpoints if service_id in services]
+        seen = set(queue)
+        for service_id in queue:
+            if service_id not in exploited_services:
+                continue
+            for neighbor in host.topology.neighbors[service_id]:
+                if neighbor in services and neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return queue
+
+    @staticmethod
+    def _get_exploited_prob(vulns, probs):
+        """
+        Returns:
+            the probability that the impact of the exploited vulnerabilities is above the threshold, with every
+            vulnerability exploited independently with its probability
+        """
+        impacts = {0.0: 1.0}
+        exploited_prob = 0.0
+        for (_row, impact, *_rest), prob in zip(vulns, probs):
+            if prob == 0:
+                continue
+            next_impacts = {}
+            for total, total_prob in impacts.items():
+                if prob < 1:
+                    next_impacts[total] = next_impacts.get(total, 0.0) + total_prob * (1 - prob)
+                if total + impact > constants.SERVICE_COMPROMISED_THRESHOLD:
+                    exploited_prob += total_prob * prob
+                else:
+                    next_impacts[total + impact] = next_impacts.get(total + impact, 0.0) + total_prob * prob
+            impacts = next_impacts
+        return exploited_prob
+
+    def _get_attempt(self, host, services, exploited, exploited_services):
+        """
+        Computes an attempt on a host with some of its services exploited.
+
+        Returns:
+            the expected cost of the attempt, the attacked services, and the probability that every service that is
+            not exploited yet is exploited by the attempt
+        """
+        attacked_services = self._get_attacked_services(host, services, exploited_services)
+        attacked_vulns = {}
+        for service_id in attacked_services:
+            vulns = [vuln for vuln in services[service_id][0] if exploited[vuln[0]] < 1]
+            attacked_vulns[service_id] = vulns[:constants.SERVICE_TOP_X_VULNS_TO_RETURN]
+        candidates = [vuln for vulns in attacked_vulns.values() for vuln in vulns]
+        cost = self.attempt_time
+        attacked_rows = set()
+        for row, _impact, _complexity, exploit_time, has_dependent_vulns, dependent_vuln_id in candidates:
+            if has_dependent_vulns and not any(vuln[5] == dependent_vuln_id and vuln[0] != row
+                                               for vuln in candidates):
+                continue
+            attacked_rows.add(row)
+            cost += (1 - exploited[row]) * exploit_time
+        exploited_probs = {}
+        for service_id, (vulns, _target_adjacent) in services.items():
+            if service_id in exploited_services:
+                continue
+            probs = [exploited[row] + (1 - exploited[row]) * complexity if row in attacked_rows else exploited[row]
+                     for row, _impact, complexity, *_rest in vulns]
+            exploited_probs[service_id] = self._get_exploited_prob(vulns, probs)
+        return cost, attacked_services, exploited_probs
+
+    def _attack_host(self, host, exploited, compromised_users):
+        """
+        Computes the expected time to compromise a host.
+
+        Parameters:
+            host:
+                the Host to compromise
+            exploited:
+                the probability that every vulnerability of the network is exploited
+            compromised_users:
+                the users the adversary has compromised
+
+        Returns:
+            the expected time, inf if the host cannot be compromised, and a dict with the probability that every
+            service of the host is attacked before the host is compromised
+        """
+        rows, services = self._get_services(host)
+        if host.possible_user_compromise() and any(host.users.get(username) for username in compromised_users):
+            return self.attempt_time, {}
+        brute_force_prob = 0.0
+        if host.total_users > 0:
+            attempt_users = [username for username in host.users if username in compromised_users]
+            brute_force_prob = constants.HOST_MAX_PROB_FOR_USER_COMPROMISE * len(attempt_users) / host.total_users
+        key = (host.host_id, brute_force_prob, exploited[rows].tobytes())
+        if key in self._host_times:
+            return self._host_times[key]
+
+        brute_force_time = constants.ATTACK_DURATION['BRUTE_FORCE']
+        # exploited services -> (cost of an attempt, attacked services, probability of the exploited services
+        # after the attempt if it does not compromise the host)
+        states = {}
+        queue = [frozenset()]
+        queued = set(queue)
+        for exploited_services in queue:
+            cost, attacked_services, exploited_probs = self._get_attempt(host, services, exploited,
+                                                                         exploited_services)
+            candidates = [(service_id, prob) for service_id, prob in exploited_probs.items() if prob > 0]
+            transitions = {}
+            # Every subset of the services that can be exploited can be exploited by the attempt
+            for subset in range(1 << len(candidates)):
+                prob = 1.0
+                next_services = set(exploited_services)
+                for bit, (service_id, service_prob) in enumerate(candidates):
+                    if subset >> bit & 1:
+                        prob *= service_prob
+                        next_services.add(service_id)
+                    else:
+                        prob *= 1 - service_prob
+                if prob == 0:
+                    continue
+                if any(services[service_id][1] for service_id in next_services):
+                    continue
+                next_services = frozenset(next_services)
+                transitions[next_services] = transitions.get(next_services, 0.0) + prob
+            for next_services in transitions:
+                if next_services not in queued:
+                    queued.add(next_services)
+                    queue.append(next_services)
+            states[exploited_services] = (cost, attacked_services, transitions)
+
+        # The exploited services only grow, so the states are solved from the largest
+        times = {}
+        for exploited_services in sorted(states, key=len, reverse=True):
+            cost, _attacked_services, transitions = states[exploited_services]
+            # Every attempt that does not compromise the host is followed by a brute force
+            fail_prob = sum(transitions.values())
+            stay_prob = transitions.get(exploited_services, 0.0) * (1 - brute_force_prob)
+            expected_next = sum(prob * times[next_services] for next_services, prob in transitions.items()
+                                if next_services != exploited_services)
+            if stay_prob >= 1:
+                times[exploited_services] = np.inf
+            else:
+                times[exploited_services] = (cost + brute_force_time * fail_prob +
+                                             (1 - brute_force_prob) * expected_next) / (1 - stay_prob)
+
+        # The probability that the attempts reach every state, from the smallest
+        visit_probs = {frozenset(): 1.0}
+        attacked_probs = {}
+        for exploited_services in sorted(states, key=len):
+            visit_prob = visit_probs.get(exploited_services, 0.0)
+            cost, attacked_services, transitions = states[exploited_services]
+            for service_id in attacked_services:
+                attacked_probs[service_id] = max(attacked_probs.get(service_id, 0.0), visit_prob)
+            stay_prob = transitions.get(exploited_services, 0.0) * (1 - brute_force_prob)
+            if stay_prob >= 1:
+                continue
+            for next_services, prob in transitions.items():
+                if next_services != exploited_services:
+                    visit_probs[next_services] = (visit_probs.get(next_services, 0.0) +
+                                                  visit_prob * prob * (1 - brute_force_prob) / (1 - stay_prob))
+        result = self._host_times[key] = (times[frozenset()], attacked_probs)
+        return result
+
+    def _get_exploited_after(self, host, exploited, attacked_probs):
+        """
+        Returns:
+            the probability that every vulnerability of the network is exploited after the host is compromised
+        """
+        _rows, services = self._get_services(host)
+        exploited = exploited.copy()
+        for service_id, attacked_prob in attacked_probs.items():
+            vulns = [vuln for vuln in services[service_id][0] if exploited[vuln[0]] < 1]
+            for row, _impact, complexity, *_rest in vulns[:constants.SERVICE_TOP_X_VULNS_TO_RETURN]:
+                exploited[row] += (1 - exploited[row]) * attacked_prob * complexity
+        return exploited
+
+    def host_time(self, host, compromised_users=()):
+        """
+        Computes the expected time to compromise a host in the current state of the network, with the ENUM_HOST
+        and SCAN_PORT of every attempt but without the scans to find the host.
+
+        Parameters:
+            host:
+                the Host to compromise
+            compromised_users:
+                the users the adversary has compromised
+
+        Returns:
+            the expected time, inf if the host cannot be compromised
+        """
+        return self._attack_host(host, self.exploited, set(compromised_users))[0]
+
+    def _dijkstra(self):
+        self._shortest_times = {}
+        self._shortest_predecessors = {}
+        # host id -> (exploited probabilities, compromised users) after the host is compromised on its path
+        path_states = {}
+        heap = []
+        for host_id in self.exposed_endpoints:
+            host = self.network.get_host(host_id)
+            if host is None:
+                continue
+            host_time, attacked_probs = self._attack_host(host, self.exploited, set())
+            edge_time = self.initial_time + host_time
+            if edge_time < self._shortest_times.get(host_id, np.inf):
+                self._shortest_times[host_id] = edge_time
+                self._shortest_predecessors[host_id] = None
+                path_states[host_id] = (self._get_exploited_after(host, self.exploited, attacked_probs),
+                                        set(host.users))
+                heapq.heappush(heap, (edge_time, host_id))
+        done = set()
+        while heap:
+            time, host_id = heapq.heappop(heap)
+            if host_id in done:
+                continue
+            done.add(host_id)
+            exploited, compromised_users = path_states[host_id]
+            for neighbor in self.graph.neighbors(host_id):
+                host = self.network.get_host(neighbor)
+                if neighbor in done or host is None:
+                    continue
+                host_time, attacked_probs = self._attack_host(host, exploited, compromised_users)
+                neighbor_time = time + self.pivot_time + host_time
+                if neighbor_time < self._shortest_times.get(neighbor, np.inf):
+                    self._shortest_times[neighbor] = neighbor_time
+                    self._shortest_predecessors[neighbor] = host_id
+                    # The vulnerabilities exploited on the path to the host are exploited on the host
+                    path_states[neighbor] = (self._get_exploited_after(host, exploited, attacked_probs),
+                                             compromised_users | set(host.users))
+                    heapq.heappush(heap, (neighbor_time, neighbor))
+
+    def get_shortest_times(self):
+        """
+        Returns:
+            a dict with the expected time to compromise every host along its fastest attack path, with the
+            vulnerabilities exploited and the users compromised on the path. The adversary of the simulation attacks
+            one host at a time and also uses what it found on other hosts, see get_expected_times. The hosts that
+            cannot be compromised are left out.
+        """
+        if self._shortest_times is None:
+            self._dijkstra()
+        return {host_id: time for host_id, time in self._shortest_times.items() if time < np.inf}
+
+    def get_shortest_path(self, host_id):
+        """
+        Returns:
+            the fastest attack path from an exposed endpoint to the host, an empty list if it cannot be compromised
+        """
+        if self._shortest_times is None:
+            self._dijkstra()
+        if self._shortest_times.get(host_id, np.inf) == np.inf:
+            return []
+        path = []
+        while host_id is not None:
+            path.append(host_id)
+            host_id = self._shortest_predecessors[host_id]
+        path.reverse()
+        return path
+
+    def get_expected_times(self):
+        """
+        Computes the expected time at which every host is compromised by an adversary that attacks one host at a
+        time, as in the simulation: it starts from the exposed endpoints, and after every compromised host it
+        scans the neighbours of the host and attacks the host it can compromise the fastest next. The
+        vulnerabilities exploited and the users compromised on the hosts compromised before are used on the
+        next hosts. The adversary of the simulation also fails attempts on hosts it compromises later, so the
+        simulated times are usually somewhat longer.
+
+        Returns:
+            a dict with the expected time every host is compromised, the hosts that cannot be compromised are
+            left out
+        """
+        if self._expected_times is not None:
+            return self._expected_times
+        self._expected_times = {}
+        exploited = self.exploited
+        compromised_users = set()
+        frontier = {host_id for host_id in self.exposed_endpoints if self.network.get_host(host_id) is not None}
+        time = self.initial_time
+        while frontier:
+            attacks = {host_id: self._attack_host(self.network.get_host(host_id), exploited, compromised_users)
+                       for host_id in sorted(frontier)}
+            host_id = min(attacks, key=lambda attack_host_id: attacks[attack_host_id][0])
+            host_time, attacked_probs = attacks[host_id]
+            if host_time == np.inf:
+                break
+            host = self.network.get_host(host_id)
+            time += host_time
+            self._expected_times[host_id] = time
+            time += self.pivot_time
+            # The compromised neighbours are pushed on the host stack too, and are enumerated again
+            time += constants.ATTACK_DURATION['ENUM_HOST'] * sum(
+                1 for neighbor in self.graph.neighbors(host_id) if neighbor in self._expected_times)
+            exploited = self._get_exploited_after(host, exploited, attacked_probs)
+            compromised_users.update(host.users)
+            frontier.discard(host_id)
+            frontier.update(neighbor for neighbor in self.graph.neighbors(host_id)
+                            if neighbor not in self._expected_times and self.network.get_host(neighbor) is not None)
+        return self._expected_times
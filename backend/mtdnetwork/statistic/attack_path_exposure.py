@@ -0,0 +1,86 @@
+class AttackPathExposure:
+
+    def __init__(self):
+        """
+        Computes the attack path exposure score of a network incrementally between MTDs.
+
+        Every host on the shortest path to the target node is scored by the fraction of the vulnerabilities on its
+        internal path that were not found on a previous host of the path. The vulnerabilities of every service are
+        cached until one of them is exploited, the services on the internal path of every host until the services
+        of the host change, and the scores of the hosts on the path until the path or their vulnerabilities change,
+        so only the part of the path after the first change is scored again.
+        """
+        # service id -> (service, the vulnerabilities returned by service.get_vulns())
+        self._service_vulns = {}
+        # host id -> (host, services version, the services on the internal path)
+        self._host_services = {}
+        # Scored hosts of the path: (host id, ids of the vulnerabilities, ids of the new vulnerabilities, cumulative score)
+        self._scored_path = []
+
+    def _get_vulns(self, service, service_vulns):
+        cached = self._service_vulns.get(service.id)
+        # Exploited vulnerabilities are never unexploited, so the cached vulnerabilities are
+        # valid as long as none of them is exploited
+        if cached is None or cached[0] is not service or any(vuln.is_exploited() for vuln in cached[1]):
+            cached = (service, service.get_vulns())
+        service_vulns[service.id] = cached
+        return cached[1]
+
+    def _get_services(self, host):
+        cached = self._host_services.get(host.host_id)
+        if cached is None or cached[0] is not host or cached[1] != host.services_version:
+            service_id_list = host.get_path_from_exposed()
+            cached = (host, host.services_version, host.get_services_from_list(service_id_list))
+            self._host_services[host.host_id] = cached
+        return cached[2]
+
+    def score(self, network, shortest_path):
+        """
+        Parameters:
+            network:
+                the Network instance the hosts are on
+            shortest_path:
+                the shortest path from the exposed endpoints to the target node
+
+        Returns:
+            ave_score: Score of each host added up, divided by the number of hosts
+        """
+        service_vulns = {}
+        path_vuln_ids = []
+        for host_id in shortest_path:
+            vuln_ids = []
+            for service in self._get_services(network.get_host(host_id)):
+                vuln_ids.extend(vuln.id for vuln in self._get_vulns(service, service_vulns))
+            path_vuln_ids.append(tuple(vuln_ids))
+        # Only the services still on the path are kept
+        self._service_vulns = service_vulns
+
+        # The scores are kept up to the first host that changed
+        unchanged = 0
+        for scored_host, host_id, vuln_ids in zip(self._scored_path, shortest_path, path_vuln_ids):
+            if scored_host[0] != host_id or scored_host[1] != vuln_ids:
+                break
+            unchanged += 1
+        del self._scored_path[unchanged:]
+
+        vuln_set = set()
+        for scored_host in self._scored_path:
+            vuln_set.update(scored_host[2])
+        total_score = self._scored_path[-1][3] if self._scored_path else 0
+        for host_id, vuln_ids in zip(shortest_path[unchanged:], path_vuln_ids[unchanged:]):
+            new_vuln_ids = []
+            for vuln_id in vuln_ids:
+                if vuln_id not in vuln_set:
+                    vuln_set.add(vuln_id)
+                    new_vuln_ids.append(vuln_id)
+            if len(new_vuln_ids) == 0:
+                new_vuln_percent = 0
+            else:
+                new_vuln_percent = len(new_vuln_ids) / len(vuln_ids)
+            total_score = total_score + new_vuln_percent
+            self._scored_path.append((host_id, vuln_ids, new_vuln_ids, total_score))
+
+        if len(shortest_path) > 0:
+            return total_score / len(shortest_path)
+        else:
+            return total_score
@@ -0,0 +1,152 @@
+import statistics
+import types
+import unittest
+import networkx as nx
+import numpy as np
+import simpy
+import mtdnetwork.data.constants as constants
+from mtdnetwork.component.adversary import Adversary
+from mtdnetwork.component.time_network import TimeNetwork
+from mtdnetwork.operation.attack_operation import AttackOperation
+from mtdnetwork.statistic.attack_graph import AttackGraph
+
+ATTEMPT_TIME = constants.ATTACK_DURATION['ENUM_HOST'] + constants.ATTACK_DURATION['SCAN_PORT']
+BRUTE_FORCE_TIME = constants.ATTACK_DURATION['BRUTE_FORCE']
+EXPLOIT_TIME = 10
+HIGH_IMPACT = constants.SERVICE_COMPROMISED_THRESHOLD + 1
+
+
+class StubVulnerability:
+    def __init__(self, row, complexity, impact=HIGH_IMPACT):
+        self.row = row
+        self.complexity = complexity
+        self.impact = impact
+        self.has_dependent_vulns = False
+        self.dependent_vuln_id = 0
+
+    def exploit_time(self, host=None):
+        return EXPLOIT_TIME
+
+
+class StubService:
+    def __init__(self, vulns):
+        self.vulns = vulns
+
+    def get_all_vulns(self):
+        return self.vulns
+
+
+class StubHost:
+    def __init__(self, host_id, services, users=None):
+        """
+        A host whose services form a chain from the exposed first service to the target service after the last one
+        """
+        self.host_id = host_id
+        self.services = services + [None]
+        self.target_node = len(services)
+        self.exposed_endpoints = [0]
+        self.topology = types.SimpleNamespace(
+            neighbors=[tuple(n for n in (i - 1, i + 1) if 0 <= n <= len(services)) for i in range(len(services) + 1)])
+        self.users = {} if users is None else users
+        self.total_users = len(self.users)
+
+    def possible_user_compromise(self):
+        return any(self.users.values())
+
+
+class StubNetwork:
+    def __init__(self, hosts, total_rows):
+        self.hosts = {host.host_id: host for host in hosts}
+        self.graph = nx.path_graph(len(hosts))
+        self.exposed_endpoints = [0]
+        vuln_state = types.SimpleNamespace(exploited=np.zeros(total_rows, dtype=bool))
+        self.service_generator = types.SimpleNamespace(vuln_state=vuln_state)
+
+    def get_host(self, host_id):
+        return self.hosts.get(host_id)
+
+    def get_service_generator(self):
+        return self.service_generator
+
+
+def single_time(complexity, exploited=0.0, brute_force_prob=0.0):
+    """
+    The expected time to exploit a single vulnerability next to the target service, retried until it is exploited or
+    a brute force succeeds
+    """
+    exploited_prob = exploited + (1 - exploited) * complexity
+    attempt_cost = ATTEMPT_TIME + (1 - exploited) * (EXPLOIT_TIME + 0.5) + (1 - exploited_prob) * BRUTE_FORCE_TIME
+    return attempt_cost / (1 - (1 - exploited_prob) * (1 - brute_force_prob))
+
+
+class TestAttackGraph(unittest.TestCase):
+
+    def get_host_time(self, services, compromised_users=(), users=None, total_rows=10):
+        host = StubHost(0, services, users=users)
+        return AttackGraph(StubNetwork([host], total_rows)).host_time(host, compromised_users)
+
+    def test_single_vulnerability_is_geometric(self):
+        for complexity in [0.1, 0.5, 0.9]:
+            host_time = self.get_host_time([StubService([StubVulnerability(0, complexity)])])
+            self.assertAlmostEqual(host_time, single_time(complexity))
+
+    def test_brute_force_with_compromised_users(self):
+        users = {'alice': False, 'bob': False}
+        host_time = self.get_host_time([StubService([StubVulnerability(0, 0.1)])], ['alice'], users=users)
+        brute_force_prob = constants.HOST_MAX_PROB_FOR_USER_COMPROMISE / 2
+        self.assertAlmostEqual(host_time, single_time(0.1, brute_force_prob=brute_force_prob))
+
+    def test_reused_password(self):
+        users = {'alice': True, 'bob': False}
+        host_time = self.get_host_time([StubService([StubVulnerability(0, 0.1)])], ['alice'], users=users)
+        self.assertEqual(host_time, ATTEMPT_TIME)
+
+    def test_services_are_found_through_exploited_services(self):
+        services = [StubService([StubVulnerability(0, 0.3)]), StubService([StubVulnerability(1, 0.6)])]
+        # Once the first service is exploited the second one is found, and both are attacked by every attempt
+        second_time = (ATTEMPT_TIME + 2 * (EXPLOIT_TIME + 0.5) + 0.4 * BRUTE_FORCE_TIME) / 0.6
+        first_time = (ATTEMPT_TIME + EXPLOIT_TIME + 0.5 + BRUTE_FORCE_TIME) / 0.3 + second_time
+        self.assertAlmostEqual(self.get_host_time(services), first_time)
+
+    def test_impact_below_threshold_needs_every_vulnerability(self):
+        impact = constants.SERVICE_COMPROMISED_THRESHOLD / 2 + 0.5
+        service = StubService([StubVulnerability(0, 0.5, impact=impact), StubVulnerability(1, 0.5, impact=impact)])
+        # Both vulnerabilities are exploited by an attempt with probability 1/4
+        expected = (ATTEMPT_TIME + 2 * (EXPLOIT_TIME + 0.5) + 0.75 * BRUTE_FORCE_TIME) / 0.25
+        self.assertAlmostEqual(self.get_host_time([service]), expected)
+
+    def test_unexploitable_host(self):
+        impact = constants.SERVICE_COMPROMISED_THRESHOLD / 2
+        service = StubService([StubVulnerability(0, 0.5, impact=impact)])
+        self.assertEqual(self.get_host_time([service]), np.inf)
+
+    def test_shared_vulnerability_on_the_next_host(self):
+        hosts = [StubHost(host_id, [StubService([StubVulnerability(0, 0.5)])]) for host_id in range(2)]
+        attack_graph = AttackGraph(StubNetwork(hosts, total_rows=1))
+        first_time = constants.ATTACK_DURATION['SCAN_HOST'] + single_time(0.5)
+        # The vulnerability was attacked on the first host, so it is exploited with probability 1/2
+        second_time = first_time + constants.ATTACK_DURATION['SCAN_NEIGHBOR'] + single_time(0.5, exploited=0.5)
+        self.assertAlmostEqual(attack_graph.get_expected_times()[0], first_time)
+        self.assertAlmostEqual(attack_graph.get_expected_times()[1], second_time)
+        self.assertAlmostEqual(attack_graph.get_shortest_times()[1], second_time)
+        self.assertEqual(attack_graph.get_shortest_path(1), [0, 1])
+
+    def test_expected_time_is_close_to_the_simulation(self):
+        network = TimeNetwork(total_nodes=30, seed=0)
+        host_num = int(network.get_total_nodes() * 0.8) + 1
+        expected_time = sorted(AttackGraph(network).get_expected_times().values())[host_num - 1]
+        simulated_times = []
+        for attack_seed in range(5):
+            network = TimeNetwork(total_nodes=30, seed=0)
+            network.get_rng().reseed(attack_seed)
+            env = simpy.Environment()
+            end_event = env.event()
+            adversary = Adversary(network=network, attack_threshold=constants.ATTACKER_THRESHOLD)
+            AttackOperation(env=env, end_event=end_event, adversary=adversary).proceed_attack()
+            env.run(until=end_event)
+            simulated_times.append(env.now)
+        self.assertLess(abs(expected_time / statistics.mean(simulated_times) - 1), 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
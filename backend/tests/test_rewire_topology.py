@@ -0,0 +1,40 @@
+import unittest
+from mtdnetwork.component.mtd_scheme import MTDScheme
+from mtdnetwork.component.time_network import TimeNetwork
+from mtdnetwork.mtd.completetopologyshuffle import CompleteTopologyShuffle
+
+
+def get_edges(graph):
+    return {frozenset(edge) for edge in graph.edges}
+
+
+class TestRewireTopology(unittest.TestCase):
+
+    def test_topology_delta_is_the_change_of_the_graph(self):
+        for seed in range(10):
+            for fraction in [0.2, 0.5, 1.0]:
+                network = TimeNetwork(total_nodes=60, seed=seed, headless=True)
+                edges = get_edges(network.graph)
+                removed_edges, added_edges = network.rewire_topology(fraction=fraction)
+                new_edges = get_edges(network.graph)
+                self.assertEqual({frozenset(edge) for edge in removed_edges}, edges - new_edges)
+                self.assertEqual({frozenset(edge) for edge in added_edges}, new_edges - edges)
+                self.assertEqual(len(added_edges), len(new_edges - edges))
+
+    def test_scheme_creates_incremental_shuffles_from_the_options(self):
+        network = TimeNetwork(total_nodes=60, seed=0, headless=True)
+        mtd_options = {'CompleteTopologyShuffle': {'incremental': True, 'rewire_fraction': 0.5}}
+        mtd_scheme = MTDScheme(scheme='single', network=network, custom_strategies=CompleteTopologyShuffle,
+                               mtd_trigger_interval=200, mtd_options=mtd_options)
+        mtd_scheme.register_mtd()
+        mtd_strategy = mtd_scheme.trigger_mtd()
+        self.assertTrue(mtd_strategy.incremental)
+        self.assertEqual(mtd_strategy.rewire_fraction, 0.5)
+        edges = get_edges(network.graph)
+        mtd_strategy.mtd_operation()
+        removed_edges, added_edges = network.get_topology_delta()
+        self.assertEqual({frozenset(edge) for edge in removed_edges}, edges - get_edges(network.graph))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from mtdnetwork.component.time_network import TimeNetwork
+
+
+class TestServiceCatalog(unittest.TestCase):
+
+    def test_catalog_seed_is_shared_by_unseeded_networks(self):
+        networks = [TimeNetwork(total_nodes=30, headless=True, catalog_seed=3) for _network in range(2)]
+        generators = [network.get_service_generator() for network in networks]
+        self.assertNotEqual(networks[0].get_rng().get_seed(), networks[1].get_rng().get_seed())
+        self.assertIs(generators[0].catalog, generators[1].catalog)
+        self.assertIsNot(generators[0].vuln_state, generators[1].vuln_state)
+        unseeded = TimeNetwork(total_nodes=30, headless=True).get_service_generator()
+        self.assertIsNot(unseeded.catalog, generators[0].catalog)
+
+    def test_catalog_seed_leaves_the_network_seed(self):
+        network = TimeNetwork(total_nodes=30, headless=True, seed=1, catalog_seed=3)
+        same_network = TimeNetwork(total_nodes=30, headless=True, seed=1, catalog_seed=3)
+        self.assertEqual(sorted(network.graph.edges), sorted(same_network.graph.edges))
+        self.assertEqual([network.get_host(host_id).os_type for host_id in network.graph.nodes],
+                         [same_network.get_host(host_id).os_type for host_id in same_network.graph.nodes])
+
+
+if __name__ == '__main__':
+    unittest.main()
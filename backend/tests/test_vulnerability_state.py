@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+import mtdnetwork.data.constants as constants
+from mtdnetwork.component.services import VulnerabilityTable, VulnerabilityState, Vulnerability
+from mtdnetwork.component.simulation_random import SimulationRandom
+
+
+class StubHost:
+    def __init__(self, os_type):
+        self.os_type = os_type
+
+
+def get_table(seed, total_vulns=200):
+    rng = SimulationRandom(seed)
+    table = VulnerabilityTable()
+    for _vuln in range(total_vulns):
+        table.add(can_have_os_dependency=True, os_list=constants.OS_TYPES, rng=rng)
+    table.freeze()
+    return table
+
+
+def get_state(table, exploited_rows):
+    state = VulnerabilityState(table)
+    for row in exploited_rows:
+        state.set_exploited(row, True)
+    return state
+
+
+class TestVulnerabilityState(unittest.TestCase):
+
+    def setUp(self):
+        self.table = get_table(seed=1)
+        self.rows = np.arange(len(self.table))
+        self.exploited_rows = list(range(0, len(self.table), 7))
+
+    def test_exploit_time_matches_every_row(self):
+        state = get_state(self.table, self.exploited_rows)
+        self.assertTrue(self.table.has_os_dependency.any())
+        for os_type in [None] + constants.OS_TYPES:
+            host = StubHost(os_type) if os_type is not None else None
+            exploit_times = state.exploit_time(self.rows, os_type)
+            for row in self.rows:
+                vuln = Vulnerability(self.table, row, state)
+                self.assertEqual(exploit_times[row], vuln.exploit_time(host))
+                expected = constants.ATTACK_DURATION['EXPLOIT_VULN'] * (1 - vuln.complexity)
+                if vuln.has_os_dependency and os_type is not None and os_type not in vuln.vuln_os_list:
+                    expected *= 2.5
+                if vuln.exploited:
+                    expected /= 2
+                self.assertAlmostEqual(vuln.exploit_time(host), expected)
+
+    def test_roa_matches_every_row(self):
+        state = get_state(self.table, self.exploited_rows)
+        roas = state.roa(self.rows)
+        for row in self.rows:
+            vuln = Vulnerability(self.table, row, state)
+            self.assertEqual(roas[row], vuln.roa())
+            self.assertAlmostEqual(vuln.roa(), vuln.complexity * vuln.impact / vuln.exploit_time())
+
+    def test_network_draws_like_every_row_in_turn(self):
+        vector_rng, scalar_rng = SimulationRandom(2), SimulationRandom(2)
+        vector_state = get_state(self.table, self.exploited_rows)
+        scalar_state = get_state(self.table, self.exploited_rows)
+        rows = self.rows[::-1]
+        impacts = vector_state.network(rows, vector_rng)
+        scalar_impacts = [Vulnerability(self.table, row, scalar_state, scalar_rng).network() for row in rows]
+        self.assertEqual(impacts.tolist(), scalar_impacts)
+        self.assertEqual(vector_state.exploited.tolist(), scalar_state.exploited.tolist())
+        self.assertEqual(vector_state.exploit_attempt.tolist(), scalar_state.exploit_attempt.tolist())
+        self.assertEqual(vector_state.changed_rows, scalar_state.changed_rows)
+        # Only the rows that were not exploited draw from the attack stream
+        self.assertEqual(vector_state.exploit_attempt.sum(), len(self.rows) - len(self.exploited_rows))
+        self.assertEqual(vector_rng.attack.getstate(), scalar_rng.attack.getstate())
+
+    def test_views_are_equal_by_table_and_row(self):
+        state = VulnerabilityState(self.table)
+        vuln = Vulnerability(self.table, 3, state)
+        self.assertEqual(vuln.id, 3)
+        self.assertEqual(vuln, vuln.copy(None, VulnerabilityState(self.table)))
+        self.assertEqual(hash(vuln), hash(vuln.copy(None, VulnerabilityState(self.table))))
+        self.assertNotEqual(vuln, Vulnerability(self.table, 4, state))
+        other_table = get_table(seed=1)
+        self.assertNotEqual(vuln, Vulnerability(other_table, 3, VulnerabilityState(other_table)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+
+current_directory = os.getcwd()
+if not os.path.exists(current_directory + '/experimental_data'):
+    os.makedirs(current_directory + '/experimental_data')
+    os.makedirs(current_directory + '/experimental_data/plots')
+    os.makedirs(current_directory + '/experimental_data/results')
+sys.path.append(current_directory.replace('experiments', ''))
+import time
+import pandas as pd
+import networkx as nx
+from mtdnetwork.component.network import Network
+from mtdnetwork.component.host import Host
+from mtdnetwork.component.internal_topology import InternalTopology
+
+
+def benchmark_gen_graph(network_size_list, layout_size_limit=2000, seed=0):
+    """
+    Times the topology generation (gen_topology) and the node layout (gen_pos) of Network.gen_graph
+    separately for every network size.
+    :param network_size_list: the total number of nodes of every benchmarked network
+    :param layout_size_limit: the layout is only timed for networks up to this size
+    :param seed: the seed of the generated networks
+    """
+    results = []
+    for size in network_size_list:
+        network = Network(total_nodes=size, total_endpoints=5, total_subnets=8, total_layers=4, target_layer=4,
+                          total_database=5, seed=seed)
+        start = time.perf_counter()
+        network.gen_topology()
+        topology_time = time.perf_counter() - start
+
+        layout_time = None
+        if size <= layout_size_limit:
+            start = time.perf_counter()
+            network.gen_pos()
+            layout_time = time.perf_counter() - start
+
+        result = {
+            'total_nodes': size,
+            'total_edges': network.graph.number_of_edges(),
+            'connected': nx.is_connected(network.graph),
+            'topology_time': topology_time,
+            'layout_time': layout_time,
+        }
+        print(result)
+        results.append(result)
+    pd.DataFrame(results).to_csv('experimental_data/results/benchmark_gen_graph.csv', index=False)
+    return results
+
+
+def benchmark_host_construction(total_hosts=1000, seed=0):
+    """
+    Times the construction of hosts, which pick their internal service network from the pool of internal
+    topologies, and the generation of the internal topologies of the hosts without the pool.
+    :param total_hosts: the number of hosts constructed
+    :param seed: the seed of the network the hosts are created for
+    """
+    network = Network(total_nodes=total_hosts, total_endpoints=5, total_subnets=8, total_layers=4, target_layer=4,
+                      total_database=5, seed=seed)
+    network.setup_users(network.users_to_nodes_ratio, network.prob_user_reuse_pass, 5)
+    topology_random = network.get_rng().topology
+    hosts = []
+    start = time.perf_counter()
+    for host_id in range(total_hosts):
+        node_os = Host.get_random_os(rng=topology_random)
+        hosts.append(Host(node_os, Host.get_random_os_version(node_os, rng=topology_random), host_id, '0.0.0.0',
+                          topology_random.choices(network.users_list, k=5), network, network.service_generator))
+    host_time = time.perf_counter() - start
+
+    # The pooled topologies are generated again, once per host as without the pool
+    start = time.perf_counter()
+    for host in hosts:
+        InternalTopology(*host.topology.key)
+    internal_topology_time = time.perf_counter() - start
+
+    result = {
+        'total_hosts': total_hosts,
+        'total_topologies': len({host.topology.key for host in hosts}),
+        'host_time': host_time,
+        'internal_topology_time': internal_topology_time,
+        'host_time_per_host': host_time / total_hosts,
+    }
+    print(result)
+    return result
+
+
+if __name__ == '__main__':
+    benchmark_gen_graph([100, 500, 1000, 2000, 5000, 10000])
+    benchmark_host_construction(1000)
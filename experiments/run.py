@@ -9,6 +9,7 @@ from mtdnetwork.component.adversary import Adversary
 from mtdnetwork.operation.attack_operation import AttackOperation
 from mtdnetwork.snapshot.snapshot_checkpoint import SnapshotCheckpoint
 from mtdnetwork.statistic.evaluation import Evaluation
+from mtdnetwork.statistic.attack_graph import AttackGraph
 from mtdnetwork.mtd.completetopologyshuffle import CompleteTopologyShuffle
 from mtdnetwork.mtd.ipshuffle import IPShuffle
 from mtdnetwork.mtd.hosttopologyshuffle import HostTopologyShuffle
@@ -45,15 +46,19 @@ def save_evaluation_result(file_name, evaluations):
                                          header=False)
 
 
-def thread_function(start, end, result_queue, simulation_function, file_name=None):
+def thread_function(start, end, result_queue, simulation_function, file_name=None, seed=None):
     results = []
     for i in range(start, end):
-        result = simulation_function(file_name)
+        # iteration i always runs with seed + i, so a single iteration can be rerun on its own
+        if seed is None:
+            result = simulation_function(file_name)
+        else:
+            result = simulation_function(file_name, seed=seed + i)
         results.append(result)
     result_queue.put(results)
 
 
-def execute_multithreading(simulation_function, iterations=10, num_threads=5, file_name=None):
+def execute_multithreading(simulation_function, iterations=10, num_threads=5, file_name=None, seed=None):
     # Define the range of the for loop
     start = 0
     end = iterations
@@ -77,7 +82,7 @@ def execute_multithreading(simulation_function, iterations=10, num_threads=5, fi
         if i == num_threads - 1:
             end_index = end  # Make sure the last thread takes care of the remaining items
         thread = threading.Thread(target=thread_function, args=(start_index, end_index,
-                                                                result_queue, simulation_function, file_name))
+                                                                result_queue, simulation_function, file_name, seed))
         threads.append(thread)
 
     # Start the threads
@@ -97,10 +102,14 @@ def execute_multithreading(simulation_function, iterations=10, num_threads=5, fi
     return results_avg
 
 
-def create_experiment_snapshots(network_size_list):
+def create_experiment_snapshots(network_size_list, seed=None):
+    """
+    :param network_size_list: the network sizes to save a network and adversary snapshot for
+    :param seed: the seed of the networks, so the snapshots can be generated again
+    """
     snapshot_checkpoint = SnapshotCheckpoint()
     for size in network_size_list:
-        time_network = TimeNetwork(total_nodes=size)
+        time_network = TimeNetwork(total_nodes=size, seed=seed)
         adversary = Adversary(network=time_network, attack_threshold=ATTACKER_THRESHOLD)
         snapshot_checkpoint.save_snapshots_by_network_size(time_network, adversary)
 
@@ -136,7 +145,25 @@ def construct_experiment_result(name, mtd_interval, item, network_size):
     }
 
 
-def single_mtd_simulation(file_name):
+def estimate_time_to_compromise(network_size, compromise_ratio=0.8):
+    """
+    Estimates the time to compromise the network snapshot of a network size from its attack graph, without running
+    a simulation. The simulation without MTDs usually takes somewhat longer, so sweep points whose MTD interval is
+    well above the estimate can be pruned.
+    :param network_size: the network size of the snapshot
+    :param compromise_ratio: the share of the hosts to compromise, the network is compromised above it
+    :return: the expected time by which an adversary attacking one host at a time compromises more than the share
+    of the hosts, inf if it cannot
+    """
+    time_network, _ = SnapshotCheckpoint().load_snapshots_by_network_size(network_size)
+    expected_times = sorted(AttackGraph(time_network).get_expected_times().values())
+    host_num = int(time_network.get_total_nodes() * compromise_ratio) + 1
+    if len(expected_times) < host_num:
+        return float('inf')
+    return float(expected_times[host_num - 1])
+
+
+def single_mtd_simulation(file_name, seed=None):
     """
     Simulations for single mtd and no mtd
     """
@@ -152,7 +179,8 @@ def single_mtd_simulation(file_name):
         for mtd_interval in [100, 200]:
             for network_size in [25, 50, 75, 100]:
                 evaluation = execute_simulation(scheme=scheme, mtd_interval=mtd_interval,
-                                                custom_strategies=mtd, total_nodes=network_size)
+                                                custom_strategies=mtd, total_nodes=network_size, seed=seed,
+                                                headless=True)
                 evaluation_results = evaluation.evaluation_result_by_compromise_checkpoint()
                 for item in evaluation_results:
                     result = construct_experiment_result(mtd_name, mtd_interval, item, network_size)
@@ -163,12 +191,14 @@ def single_mtd_simulation(file_name):
     return evaluations
 
 
-def dap_mtd_simulation(file_name):
+def dap_mtd_simulation(file_name, seed=None):
     """
     Simulation for DAP MTD with different number of variants.
     """
     snapshot_checkpoint = SnapshotCheckpoint()
-    os_types_list = [random.sample(OS_TYPES, 2), random.sample(OS_TYPES, 3), OS_TYPES]
+    # The variants are drawn from the seed too, so that the simulation can be reproduced
+    variant_random = random.Random(seed)
+    os_types_list = [variant_random.sample(OS_TYPES, 2), variant_random.sample(OS_TYPES, 3), OS_TYPES]
     evaluations = []
     for os_types in os_types_list:
         mtd_evaluation = []
@@ -177,7 +207,8 @@ def dap_mtd_simulation(file_name):
                 time_network, adversary = snapshot_checkpoint.load_snapshots_by_network_size(network_size)
                 mtd = OSDiversityAssignment(network=time_network, os_types=os_types)
                 evaluation = execute_simulation(scheme='single', mtd_interval=mtd_interval,
-                                                custom_strategies=mtd, total_nodes=network_size)
+                                                custom_strategies=mtd, total_nodes=network_size, seed=seed,
+                                                headless=True)
                 evaluation_results = evaluation.evaluation_result_by_compromise_checkpoint()
                 for item in evaluation_results:
                     result = construct_experiment_result(mtd.get_name(), mtd_interval, item, network_size)
@@ -188,7 +219,7 @@ def dap_mtd_simulation(file_name):
     return evaluations
 
 
-def multiple_mtd_simulation(file_name):
+def multiple_mtd_simulation(file_name, seed=None):
     """
     simulations for multiple mtd using three different execution schemes.
     """
@@ -200,7 +231,8 @@ def multiple_mtd_simulation(file_name):
                 scheme_interval = mtd_interval
                 if scheme == 'simultaneous':
                     scheme_interval *= 2
-                evaluation = execute_simulation(scheme=scheme, mtd_interval=scheme_interval, total_nodes=network_size)
+                evaluation = execute_simulation(scheme=scheme, mtd_interval=scheme_interval, total_nodes=network_size,
+                                                seed=seed, headless=True)
                 evaluation_results = evaluation.evaluation_result_by_compromise_checkpoint()
                 for item in evaluation_results:
                     result = construct_experiment_result(scheme, mtd_interval, item, network_size)
@@ -213,7 +245,8 @@ def multiple_mtd_simulation(file_name):
 
 def execute_simulation(start_time=0, finish_time=None, scheme='random', mtd_interval=None, custom_strategies=None,
                        checkpoints=None, total_nodes=50, total_endpoints=5, total_subnets=8, total_layers=4,
-                       target_layer=4, total_database=2, terminate_compromise_ratio=0.8, new_network=False):
+                       target_layer=4, total_database=2, terminate_compromise_ratio=0.8, new_network=False, seed=None,
+                       headless=False, persist_catalog=False, mtd_options=None):
     """
 
     :param start_time: the time to start the simulation, need to load timestamp-based snapshots if set start_time > 0
@@ -231,6 +264,12 @@ def execute_simulation(start_time=0, finish_time=None, scheme='random', mtd_inte
     :param total_database: the number of database nodes used for computing DAP algorithm
     :param terminate_compromise_ratio: terminate the simulation if reached compromise ratio
     :param new_network: True: create new snapshots based on network size, False: load snapshots based on network size
+    :param seed: the seed of the simulation random streams. Loaded snapshots are reseeded if it is set.
+    :param headless: True: skip computing the node positions of the network, they are computed on first use
+    :param persist_catalog: True: save the service catalog of a new seeded network to the snapshots directory and
+    load it from there in the next runs with the same seed
+    :param mtd_options: the keyword arguments of the MTD strategies by MTD name, e.g.
+    {'CompleteTopologyShuffle': {'incremental': True, 'rewire_fraction': 0.3}}. Defaults to MTD_OPTIONS.
     """
     # initialise the simulation
     env = simpy.Environment()
@@ -254,11 +293,16 @@ def execute_simulation(start_time=0, finish_time=None, scheme='random', mtd_inte
         time_network = TimeNetwork(total_nodes=total_nodes, total_endpoints=total_endpoints,
                                    total_subnets=total_subnets, total_layers=total_layers,
                                    target_layer=target_layer, total_database=total_database,
-                                   terminate_compromise_ratio=terminate_compromise_ratio)
+                                   terminate_compromise_ratio=terminate_compromise_ratio, seed=seed,
+                                   headless=headless, persist_catalog=persist_catalog)
         adversary = Adversary(network=time_network, attack_threshold=ATTACKER_THRESHOLD)
         # snapshot_checkpoint.save_initialised(time_network, adversary)
         snapshot_checkpoint.save_snapshots_by_network_size(time_network, adversary)
 
+    if seed is not None and (start_time > 0 or not new_network):
+        time_network.get_rng().reseed(seed)
+    time_network.headless = headless
+
     # start attack
     attack_operation = AttackOperation(env=env, end_event=end_event, adversary=adversary, proceed_time=0)
     attack_operation.proceed_attack()
@@ -267,7 +311,8 @@ def execute_simulation(start_time=0, finish_time=None, scheme='random', mtd_inte
     if scheme != 'None':
         mtd_operation = MTDOperation(env=env, end_event=end_event, network=time_network, scheme=scheme,
                                      attack_operation=attack_operation, proceed_time=0,
-                                     mtd_trigger_interval=mtd_interval, custom_strategies=custom_strategies)
+                                     mtd_trigger_interval=mtd_interval, custom_strategies=custom_strategies,
+                                     mtd_options=mtd_options)
         mtd_operation.proceed_mtd()
 
     # save snapshot by time